@@ -0,0 +1,60 @@
+"""
+Post-game analysis script
+Checks every move of finished games against perfect play and stores
+blunders, missed wins and accuracy per game and per player
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import AsyncSessionLocal
+from app.game.analysis import analyze_games
+
+
+async def main(batch_size: int, workers: int, time_limit: float):
+    """Main analysis function"""
+    print("=" * 60)
+    print("POST-GAME ANALYSIS")
+    print("=" * 60)
+
+    started = time.monotonic()
+
+    try:
+        async with AsyncSessionLocal() as stream_session, AsyncSessionLocal() as lookup_session:
+            summary = await analyze_games(
+                stream_session,
+                lookup_session,
+                batch_size=batch_size,
+                workers=workers,
+                time_limit=time_limit
+            )
+
+        print(f"\n[OK] Games analyzed: {summary['games_analyzed']}")
+        print(f"[OK] High-water mark: game {summary['high_water_mark']}")
+        print(f"[OK] Finished in {time.monotonic() - started:.1f}s")
+
+    except Exception as e:
+        print(f"\n[ERROR] Analysis failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze finished games for blunders and accuracy")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Games per fetch and per write transaction")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Analysis processes (0 = a thread in this process)")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Search seconds per position (defaults to ANALYSIS_TIME_LIMIT_SECONDS)")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size, args.workers, args.time_limit))
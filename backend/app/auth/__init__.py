@@ -4,7 +4,9 @@ Authentication module
 from .auth import (
     create_access_token,
     verify_token,
+    get_current_user_id,
     get_current_user,
+    get_current_admin,
     authenticate_user
 )
 from .password import hash_password, verify_password
@@ -12,7 +14,9 @@ from .password import hash_password, verify_password
 __all__ = [
     "create_access_token",
     "verify_token",
+    "get_current_user_id",
     "get_current_user",
+    "get_current_admin",
     "authenticate_user",
     "hash_password",
     "verify_password"
@@ -81,28 +81,34 @@ async def authenticate_user(username: str, password: str, db: AsyncSession) -> O
     return user
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+def _credentials_exception() -> HTTPException:
+    """401 response for a missing, invalid or expired token"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> int:
     """
-    Get current user from JWT token
+    Get current user ID from the JWT token alone, without a database query
+
+    For hot read-only routes (e.g. typeahead); a valid token of a deleted
+    user is still accepted until it expires.
 
     Args:
         credentials: HTTP authorization credentials
-        db: Database session
 
     Returns:
-        Current user object
+        User ID from the token
 
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: If token is invalid
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    credentials_exception = _credentials_exception()
 
     token = credentials.credentials
     payload = verify_token(token)
@@ -115,14 +121,56 @@ async def get_current_user(
         raise credentials_exception
     
     try:
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (ValueError, TypeError):
         raise credentials_exception
 
+
+async def get_current_user(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Get current user from JWT token
+
+    Args:
+        user_id: User ID from the token
+        db: Database session
+
+    Returns:
+        Current user object
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
+
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Get current user and require admin privileges
+
+    Args:
+        current_user: Authenticated user
+
+    Returns:
+        Current user object
+
+    Raises:
+        HTTPException: If user is not an admin
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+
+    return current_user
@@ -3,12 +3,39 @@ Session management for reconnection support
 """
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import logging
 import secrets
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, update, delete
 
 from app.models import Session, User
 from app.config import settings
+from app.database import AsyncSessionLocal
+from .auth import verify_token
+
+logger = logging.getLogger(__name__)
+
+
+def session_expiry(token: str, now: datetime) -> Optional[datetime]:
+    """
+    Expiry for a session renewed now: REFRESH_TOKEN_EXPIRE_DAYS ahead, but
+    never past the expiry of the JWT it was opened with
+
+    Args:
+        token: JWT token of the session
+        now: Current time (UTC)
+
+    Returns:
+        Expiry time, or None if the token is no longer valid
+    """
+    payload = verify_token(token)
+    if payload is None:
+        return None
+    expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    if payload.get('exp') is not None:
+        expires_at = min(expires_at, datetime.utcfromtimestamp(payload['exp']))
+    return expires_at
 
 
 class SessionManager:
@@ -38,7 +65,8 @@ class SessionManager:
             Created session object
         """
         session_id = secrets.token_urlsafe(32)
-        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        now = datetime.utcnow()
+        expires_at = session_expiry(token, now) or now
 
         session = Session(
             id=session_id,
@@ -55,6 +83,64 @@ class SessionManager:
         await db.refresh(session)
         return session
 
+    @staticmethod
+    async def open_session(
+        user_id: int,
+        token: str,
+        socket_id: str,
+        ip_address: str,
+        user_agent: str,
+        db: AsyncSession
+    ) -> Session:
+        """
+        Bind a socket to the token's live session, creating one if there is none
+
+        Page loads and reconnects with the same token reuse one row instead
+        of adding a session per connection.
+
+        Args:
+            user_id: User ID
+            token: JWT token
+            socket_id: Socket.IO session ID
+            ip_address: Client IP address
+            user_agent: Client user agent
+            db: Database session
+
+        Returns:
+            Session object
+        """
+        session = await SessionManager.get_session_by_token(token, db)
+        if session is None or session.user_id != user_id:
+            return await SessionManager.create_session(user_id, token, socket_id, ip_address, user_agent, db)
+
+        now = datetime.utcnow()
+        session.socket_id = socket_id
+        session.ip_address = ip_address
+        session.user_agent = user_agent
+        session.last_activity = now
+        session.expires_at = session_expiry(token, now) or now
+        await db.commit()
+        return session
+
+    @staticmethod
+    async def release_socket(socket_id: str, db: AsyncSession) -> None:
+        """
+        Shorten the session of a disconnected socket to the resume grace period
+
+        The session stays resumable for SESSION_RESUME_GRACE_SECONDS; a resume
+        or a new authenticate extends it again, otherwise cleanup removes it.
+
+        Args:
+            socket_id: Socket.IO session ID
+            db: Database session
+        """
+        await db.execute(
+            update(Session)
+            .where(Session.socket_id == socket_id)
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=settings.SESSION_RESUME_GRACE_SECONDS))
+        )
+        await db.commit()
+
     @staticmethod
     async def get_session_by_token(token: str, db: AsyncSession) -> Optional[Session]:
         """
@@ -113,23 +199,40 @@ class SessionManager:
             await db.commit()
 
     @staticmethod
-    async def update_socket_id(session_id: str, socket_id: str, db: AsyncSession) -> None:
+    async def update_socket_id(session_id: str, socket_id: str, db: AsyncSession) -> Optional[int]:
         """
-        Update socket ID for reconnection
+        Update socket ID (and renew expiry) for reconnection (caller commits)
+
+        A session is only as good as the JWT it was opened with: the resume
+        is refused once the token has expired or its user no longer exists,
+        and the renewed expiry never goes past the token's.
 
         Args:
             session_id: Session ID
             socket_id: New socket ID
             db: Database session
+
+        Returns:
+            User ID of the session, or None if it does not exist or expired
         """
+        now = datetime.utcnow()
         result = await db.execute(
-            select(Session).where(Session.id == session_id)
+            select(Session)
+            .join(User, User.id == Session.user_id)
+            .where(Session.id == session_id, Session.expires_at > now)
         )
         session = result.scalar_one_or_none()
-        if session:
-            session.socket_id = socket_id
-            session.last_activity = datetime.utcnow()
-            await db.commit()
+        if session is None:
+            return None
+
+        expires_at = session_expiry(session.token, now)
+        if expires_at is None:
+            return None
+
+        session.socket_id = socket_id
+        session.last_activity = now
+        session.expires_at = expires_at
+        return session.user_id
 
     @staticmethod
     async def delete_session(session_id: str, db: AsyncSession) -> None:
@@ -171,3 +274,50 @@ class SessionManager:
         )
         await db.commit()
         return result.rowcount
+
+
+class SessionCleanup:
+    """Periodic removal of expired sessions"""
+
+    def __init__(self, interval: float = 3600.0):
+        """
+        Initialize cleanup task
+
+        Args:
+            interval: Seconds between passes
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the cleanup task"""
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the cleanup task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Cleanup loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    expired = await SessionManager.cleanup_expired_sessions(db)
+                if expired:
+                    logger.info(f"Removed {expired} expired sessions")
+            except Exception as e:
+                logger.error(f"Session cleanup failed: {str(e)}")
+
+
+# Global session cleanup task
+session_cleanup = SessionCleanup(settings.SESSION_CLEANUP_INTERVAL_SECONDS)
@@ -22,9 +22,16 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    SESSION_RESUME_GRACE_SECONDS: int = 300  # a disconnected socket's session stays resumable this long
+    SESSION_CLEANUP_INTERVAL_SECONDS: float = 3600.0  # expired session removal (0 = startup only)
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./tictactoe.db"
+    DATABASE_READ_URL: str = ""  # read replica; empty = primary through its own pool (SQLite: read-only file)
+    DATABASE_READ_POOL_SIZE: int = 5
+    DATABASE_READ_MAX_OVERFLOW: int = 10
+    DATABASE_READ_POOL_TIMEOUT_SECONDS: float = 10.0
+    SQLITE_WAL: bool = True  # WAL journaling, so reads do not block writes
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -71,9 +78,86 @@ class Settings(BaseSettings):
     ADMIN_USERNAME: str = "admin"
     ADMIN_PASSWORD: str = "admin123"
 
+    # Matchmaking
+    MATCHMAKING_INTERVAL_SECONDS: float = 1.0
+    MATCHMAKING_BASE_WINDOW: int = 50
+    MATCHMAKING_WINDOW_GROWTH: float = 10.0  # rating points per second waited
+    MATCHMAKING_MAX_WINDOW: int = 400
+    MATCHMAKING_BUCKET_WIDTH: int = 25  # rating points per queue bucket
+
+    # Schema migrations (backfills run in the background after startup)
+    MIGRATION_BATCH_SIZE: int = 500  # rows per backfill transaction
+    MIGRATION_BATCH_PAUSE_SECONDS: float = 0.05  # pause between backfill batches
+
+    # Reconnect / resume
+    MOVE_LOG_SIZE: int = 64  # moves kept in memory per game for resume
+
+    # Move storage: 'packed' (one blob per game) or 'rows' (one Move row per move)
+    MOVE_STORAGE: str = "packed"
+
+    # Replays
+    REPLAY_CACHE_SIZE: int = 512  # finished-game replays kept in memory
+    REPLAY_EVAL_TIME_LIMIT_SECONDS: float = 0.2  # search time per evaluated position
+    REPLAY_BUILD_WORKERS: int = 2  # threads building replays, separate from the default executor
+
+    # Metric time series (raw samples rolled up into 1m/1h/1d buckets)
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = 10.0  # registry sampling + batched write (0 = off)
+    METRICS_ROLLUP_INTERVAL_SECONDS: float = 60.0  # rollup + retention pass
+    METRICS_RAW_RETENTION_HOURS: int = 48  # must cover the 1d bucket being rolled up
+    METRICS_1M_RETENTION_DAYS: int = 14
+    METRICS_1H_RETENTION_DAYS: int = 180
+    METRICS_1D_RETENTION_DAYS: int = 0  # 0 = keep forever
+    METRICS_MAX_POINTS: int = 1000  # range queries pick the finest resolution within this
+
+    # Post-game analysis (blunders, missed wins, accuracy)
+    ANALYSIS_INTERVAL_SECONDS: float = 300.0  # background pass interval (0 = off)
+    ANALYSIS_BATCH_SIZE: int = 500
+    ANALYSIS_WORKERS: int = 1  # background pass processes (0 = a thread in the server process)
+    ANALYSIS_MAX_BOARD_CELLS: int = 16  # larger boards (gomoku, ultimate) are not analyzed (0 = no limit)
+    ANALYSIS_TIME_LIMIT_SECONDS: float = 0.1  # search time per position
+
+    # Spectators
+    SPECTATOR_MAX_PER_GAME: int = 1000
+    SPECTATOR_FLUSH_INTERVAL_SECONDS: float = 0.25
+    SPECTATOR_DELAY_SECONDS: float = 0.0
+
+    # Bot
+    BOT_MEDIUM_DEPTH: int = 3
+    BOT_MEDIUM_TIME_LIMIT_SECONDS: float = 0.25
+    BOT_HARD_TIME_LIMIT_SECONDS: float = 1.0
+    BOT_OPENING_BOOK_ENABLED: bool = True
+    BOT_OPENING_BOOK_DIR: str = "books"  # relative to backend/, built with build_opening_book.py
+    BOT_TRACE_DECISIONS: bool = False  # log every bot decision (move, score, nodes)
+    BOT_BATCH_WINDOW_SECONDS: float = 0.005
+    BOT_BATCH_MAX_SIZE: int = 1024
+    BOT_POSITION_TABLE_SIZE: int = 100000
+    BOT_BATCH_TIME_BUDGET_SECONDS: float = 2.0  # shared by MCTS/ultimate turns in one batch
+    BOT_STRATEGY: str = "auto"  # 'minimax', 'mcts' or 'auto' (mcts on boards larger than 3x3)
+    MCTS_PLAYOUTS_EASY: int = 200
+    MCTS_PLAYOUTS_MEDIUM: int = 2000
+    MCTS_PLAYOUTS_HARD: int = 20000
+    MCTS_TIME_LIMIT_SECONDS: float = 2.0
+    MCTS_WORKERS: int = 1  # >1 enables root-parallel search across processes
+
+    # Ratings
+    RATING_SYSTEM: str = "elo"  # 'elo' or 'glicko2'
+    RATING_INITIAL: int = 1000
+    ELO_K_FACTOR: float = 32.0
+    GLICKO2_TAU: float = 0.5
+    GLICKO2_INITIAL_RD: float = 350.0
+    GLICKO2_INITIAL_VOLATILITY: float = 0.06
+    RATING_PERIOD_DAYS: float = 1.0  # Glicko-2 rating period; RD grows for each one a player sits out (0 = off)
+    USER_INDEX_REFRESH_SECONDS: float = 60.0  # reload the user search index after a recompute (0 = off)
+
+    # Stats
+    STATS_RECENT_FORM_SIZE: int = 20  # results kept in UserStats.recent_form
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/server.log"
+    LOG_PARTITIONING: bool = True  # server logs in one table per UTC day
+    LOG_RETENTION_DAYS: int = 90  # day partitions kept (0 = keep forever)
+    LOG_ARCHIVE_DIR: str = ""  # write expired partitions here before dropping them
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,11 @@
 """
 Database connection and session management
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from app.models import Base
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy import event
 from app.config import settings
+from typing import Dict
 import logging
 import os
 from pathlib import Path
@@ -33,19 +34,126 @@ engine = create_async_engine(
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
-# Create async session factory
+# SQLite in WAL mode lets readers and the writer run at the same time
+if "sqlite" in DATABASE_URL and settings.SQLITE_WAL:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        """Switch the database file to WAL journaling (persistent, cheap once set)"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+# Read engine for heavy GET endpoints (leaderboard, history, stats, admin
+# queries, exports, replays): its own connection pool, so those reads never
+# wait on or hold up the connections game writes use. SQLite opens the same
+# file read-only; other databases use DATABASE_READ_URL (a replica), or the
+# primary through a separate pool when it is not set.
+if "sqlite" in DATABASE_URL:
+    READ_DATABASE_URL = f"sqlite+aiosqlite:///file:{db_path}?mode=ro&uri=true"
+else:
+    READ_DATABASE_URL = settings.DATABASE_READ_URL or DATABASE_URL
+
+read_engine = create_async_engine(
+    READ_DATABASE_URL,
+    echo=settings.DEBUG,
+    pool_size=settings.DATABASE_READ_POOL_SIZE,
+    max_overflow=settings.DATABASE_READ_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_READ_POOL_TIMEOUT_SECONDS,
+    connect_args={"check_same_thread": False} if "sqlite" in READ_DATABASE_URL else {}
+)
+
+# Create async session factories
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+
+class PoolStats:
+    """Connection counters of one engine's pool, fed by pool events"""
+
+    def __init__(self, engine: AsyncEngine):
+        """
+        Initialize counters and attach to the engine's pool
+
+        Args:
+            engine: Async engine
+        """
+        self.pool = engine.sync_engine.pool
+        self.connects = 0
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        event.listen(self.pool, "connect", self._on_connect)
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        """New DBAPI connection opened"""
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        """Connection handed to a session"""
+        self.checkouts += 1
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        """Connection returned by a session"""
+        self.in_use = max(0, self.in_use - 1)
+
+    def snapshot(self) -> Dict:
+        """
+        Get the pool's current state
+
+        Returns:
+            Dictionary with pool class, connections in use (and the peak),
+            checkouts, connects, and for queue pools size, idle and overflow
+        """
+        stats = {
+            "pool": type(self.pool).__name__,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "checkouts": self.checkouts,
+            "connects": self.connects
+        }
+        if isinstance(self.pool, QueuePool):
+            stats["size"] = self.pool.size()
+            stats["idle"] = self.pool.checkedin()
+            stats["overflow"] = max(0, self.pool.overflow())
+        return stats
+
+
+_pool_stats = {
+    "write": PoolStats(engine),
+    "read": PoolStats(read_engine)
+}
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Get the state of the write and read connection pools"""
+    return {name: stats.snapshot() for name, stats in _pool_stats.items()}
+
 
 async def init_db():
-    """Initialize database - create all tables"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    Initialize database - create missing tables and apply schema migrations
+
+    Returns:
+        Migrations whose data backfill is still pending (see app/migrations)
+    """
+    from app.migrations import upgrade_schema
+
+    pending = await upgrade_schema()
     logger.info("Database initialized successfully")
+    return pending
 
 
 async def get_db():
@@ -59,3 +167,14 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """
+    Dependency to get a read-only session from the read pool
+
+    For GET routes that only read. On a replica, rows written moments
+    ago may not be visible yet.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
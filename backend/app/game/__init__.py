@@ -1,14 +1,40 @@
 """
 Game module - handles game logic and management
 """
-from .game_logic import TicTacToeLogic, GameResult
+from .game_logic import TicTacToeLogic, GameResult, MNKLogic, BOARD_VARIANTS, get_logic, get_variant_logic, get_game_logic, BatchEvaluation
 from .game_manager import GameManager, game_manager
 from .bot_ai import BotAI
+from .mcts import MCTSEngine
+from .opening_book import OpeningBook, get_opening_book
+from .bot_scheduler import BotMoveScheduler, bot_scheduler
+from .move_history import load_game_moves
+from .replay import ReplayCache, replay_cache
+from .analysis import AnalysisWorker, analysis_worker, analyze_games
+from .matchmaking import MatchmakingQueue, matchmaker
 
 __all__ = [
     "TicTacToeLogic",
     "GameResult",
+    "MNKLogic",
+    "BOARD_VARIANTS",
+    "get_logic",
+    "get_variant_logic",
+    "get_game_logic",
+    "BatchEvaluation",
     "GameManager",
     "game_manager",
-    "BotAI"
+    "BotAI",
+    "MCTSEngine",
+    "OpeningBook",
+    "get_opening_book",
+    "BotMoveScheduler",
+    "bot_scheduler",
+    "load_game_moves",
+    "ReplayCache",
+    "replay_cache",
+    "AnalysisWorker",
+    "analysis_worker",
+    "analyze_games",
+    "MatchmakingQueue",
+    "matchmaker"
 ]
@@ -0,0 +1,351 @@
+"""
+Post-game analysis - blunders, missed wins and accuracy
+
+Every move of a finished game is checked against perfect play (the bot's
+negamax solver, see replay.evaluate_position):
+
+    best move   keeps the outcome the position had under perfect play
+    blunder     turns a won or drawn position into a lost one
+    missed win  leaves a won position without winning
+
+Accuracy is best moves over moves whose outcome could be proved (every
+move on the classic board; on larger boards only what the time-limited
+search solves). Boards over ANALYSIS_MAX_BOARD_CELLS (gomoku, ultimate)
+are skipped: the search would spend its full time limit on nearly every
+position and prove almost nothing. Results are stored per game
+(GameAnalysis) and summed per user (UserAnalysis).
+
+Games are streamed with a server-side cursor in id order and analyzed in
+batches across a process pool; each batch is written in its own short
+transaction. A high-water mark (JobState 'analysis') records the id below
+which every game is done, so a pass resumes where the last one stopped
+and only new games are analyzed.
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Game, Move, GameAnalysis, UserAnalysis, JobState
+from app.utils.metrics import metrics
+from .game_logic import MNKLogic, get_game_logic
+from .move_codec import decode_positions
+from .replay import evaluate_position, grade_moves, FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'analysis'
+
+# (game id, variant, rows, cols, win length, positions, time limit)
+AnalysisJob = Tuple[int, Optional[str], int, int, int, List[int], float]
+
+# Per-process memo of evaluated positions (openings repeat across games)
+EVALUATION_CACHE_SIZE = 200000
+_evaluations: Dict[Tuple, Dict] = {}
+
+
+def _evaluate(logic: MNKLogic, board: str, symbol: str, time_limit: float) -> Dict:
+    """Evaluate a position, memoized per process"""
+    key = (type(logic).__name__, logic.rows, logic.cols, logic.win_length, board, symbol)
+    evaluation = _evaluations.get(key)
+    if evaluation is None:
+        evaluation = evaluate_position(logic, board, symbol, time_limit)
+        if len(_evaluations) >= EVALUATION_CACHE_SIZE:
+            _evaluations.clear()
+        _evaluations[key] = evaluation
+    return dict(evaluation)
+
+
+def _empty_totals() -> Dict[str, int]:
+    """Per-side counters"""
+    return {'moves': 0, 'best_moves': 0, 'blunders': 0, 'missed_wins': 0}
+
+
+def analyze_game(job: AnalysisJob) -> Dict:
+    """
+    Analyze one game
+
+    Args:
+        job: Game to analyze
+
+    Returns:
+        Dictionary with game_id and counters for 'X' and 'O'
+    """
+    game_id, variant, rows, cols, win_length, positions, time_limit = job
+    logic = get_game_logic(variant, rows, cols, win_length)
+
+    board = logic.create_empty_board()
+    timeline = []
+    for index, position in enumerate(positions):
+        symbol = 'X' if index % 2 == 0 else 'O'
+        evaluation = _evaluate(logic, board, symbol, time_limit)
+        board = logic.make_move(board, position, symbol)
+        timeline.append({'position': position, 'symbol': symbol, 'board': board, 'evaluation': evaluation})
+    grade_moves(logic, timeline)
+
+    totals = {'X': _empty_totals(), 'O': _empty_totals()}
+    for entry in timeline:
+        evaluation = entry['evaluation']
+        outcome, played = evaluation['outcome'], evaluation['played_outcome']
+        if outcome is None or played is None:
+            continue
+
+        side = totals[entry['symbol']]
+        side['moves'] += 1
+        if evaluation['best_played']:
+            side['best_moves'] += 1
+            continue
+        if played == 'loss':
+            side['blunders'] += 1
+        if outcome == 'win':
+            side['missed_wins'] += 1
+
+    return {'game_id': game_id, 'X': totals['X'], 'O': totals['O']}
+
+
+def analyze_batch(jobs: List[AnalysisJob]) -> List[Dict]:
+    """Analyze a list of games (process pool entry point)"""
+    return [analyze_game(job) for job in jobs]
+
+
+def _accuracy(best_moves: int, moves: int) -> Optional[float]:
+    """Best-move percentage, or None without graded moves"""
+    return round(best_moves / moves * 100, 1) if moves else None
+
+
+async def _run_jobs(pool: Optional[ProcessPoolExecutor], jobs: List[AnalysisJob], workers: int) -> List[Dict]:
+    """Spread a batch over the pool (or a thread without one)"""
+    if pool is None:
+        return await asyncio.to_thread(analyze_batch, jobs)
+
+    loop = asyncio.get_running_loop()
+    chunk = max(1, -(-len(jobs) // workers))
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(pool, analyze_batch, jobs[i:i + chunk])
+        for i in range(0, len(jobs), chunk)
+    ))
+    return [result for part in parts for result in part]
+
+
+async def _store_results(db: AsyncSession, rows: List, results: List[Dict]) -> None:
+    """Write per-game rows and add the totals to each player's UserAnalysis"""
+    players = {row.id: (row.player1_id, row.player2_id) for row in rows}
+    user_totals: Dict[int, Dict[str, int]] = {}
+
+    for result in results:
+        player1_id, player2_id = players[result['game_id']]
+        x, o = result['X'], result['O']
+        db.add(GameAnalysis(
+            game_id=result['game_id'],
+            player1_moves=x['moves'],
+            player1_best_moves=x['best_moves'],
+            player1_blunders=x['blunders'],
+            player1_missed_wins=x['missed_wins'],
+            player1_accuracy=_accuracy(x['best_moves'], x['moves']),
+            player2_moves=o['moves'],
+            player2_best_moves=o['best_moves'],
+            player2_blunders=o['blunders'],
+            player2_missed_wins=o['missed_wins'],
+            player2_accuracy=_accuracy(o['best_moves'], o['moves']),
+            analyzed_at=datetime.utcnow()
+        ))
+
+        # Bots (no player2_id) have no user totals
+        for user_id, side in ((player1_id, x), (player2_id, o)):
+            if not user_id:
+                continue
+            total = user_totals.setdefault(user_id, dict(_empty_totals(), games=0))
+            total['games'] += 1
+            for name, value in side.items():
+                total[name] += value
+
+    if not user_totals:
+        return
+
+    existing = await db.execute(select(UserAnalysis).where(UserAnalysis.user_id.in_(list(user_totals))))
+    by_user = {row.user_id: row for row in existing.scalars()}
+    for user_id, total in user_totals.items():
+        row = by_user.get(user_id)
+        if row is None:
+            row = UserAnalysis(
+                user_id=user_id, games_analyzed=0, moves_analyzed=0,
+                best_moves=0, blunders=0, missed_wins=0
+            )
+            db.add(row)
+        row.games_analyzed += total['games']
+        row.moves_analyzed += total['moves']
+        row.best_moves += total['best_moves']
+        row.blunders += total['blunders']
+        row.missed_wins += total['missed_wins']
+        row.accuracy = _accuracy(row.best_moves, row.moves_analyzed)
+        row.updated_at = datetime.utcnow()
+
+
+async def analyze_games(
+    db: AsyncSession,
+    lookup_db: AsyncSession,
+    batch_size: int = 500,
+    workers: int = 1,
+    time_limit: Optional[float] = None,
+    max_cells: Optional[int] = None
+) -> Dict:
+    """
+    Analyze finished games not analyzed yet
+
+    Args:
+        db: Session for the streaming game cursor
+        lookup_db: Session for move lookups and result writes
+        batch_size: Games per cursor fetch and per write transaction
+        workers: Analysis processes (0 = a thread in this process, no pool)
+        time_limit: Search seconds per position (defaults to ANALYSIS_TIME_LIMIT_SECONDS)
+        max_cells: Largest board analyzed (defaults to ANALYSIS_MAX_BOARD_CELLS, 0 = no limit)
+
+    Returns:
+        Dictionary with games analyzed and the high-water mark
+    """
+    if time_limit is None:
+        time_limit = settings.ANALYSIS_TIME_LIMIT_SECONDS
+    if max_cells is None:
+        max_cells = settings.ANALYSIS_MAX_BOARD_CELLS
+
+    state = await lookup_db.get(JobState, JOB_NAME)
+    if state is None:
+        state = JobState(name=JOB_NAME, high_water_mark=0)
+        lookup_db.add(state)
+    after_id = state.high_water_mark
+
+    # Games still in progress hold the high-water mark back; finished games
+    # past them are analyzed now and skipped on later passes. The newest id
+    # is read first so a game created in between counts as unfinished.
+    last_game = (await lookup_db.execute(select(func.max(Game.id)))).scalar()
+    first_unfinished = (await lookup_db.execute(
+        select(func.min(Game.id))
+        .where(Game.id > after_id, Game.status.notin_(FINISHED_STATUSES))
+    )).scalar()
+
+    stmt = (
+        select(
+            Game.id, Game.player1_id, Game.player2_id, Game.variant, Game.board_rows,
+            Game.board_cols, Game.win_length, Game.move_positions
+        )
+        .outerjoin(GameAnalysis, GameAnalysis.game_id == Game.id)
+        .where(Game.id > after_id)
+        .where(Game.status.in_(FINISHED_STATUSES))
+        .where(GameAnalysis.game_id.is_(None))
+        .order_by(Game.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if max_cells:
+        stmt = stmt.where(func.coalesce(Game.board_rows, 3) * func.coalesce(Game.board_cols, 3) <= max_cells)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    analyzed = 0
+    last_id = after_id
+    try:
+        stream = await db.stream(stmt)
+        async for rows in stream.partitions():
+            # Packed games carry their moves; one query per batch for the rest
+            moves: Dict[int, List[int]] = {}
+            row_game_ids = [row.id for row in rows if row.move_positions is None]
+            if row_game_ids:
+                move_rows = await lookup_db.execute(
+                    select(Move.game_id, Move.position)
+                    .where(Move.game_id.in_(row_game_ids))
+                    .order_by(Move.game_id, Move.move_number)
+                )
+                for game_id, position in move_rows:
+                    moves.setdefault(game_id, []).append(position)
+
+            jobs = [
+                (
+                    row.id, row.variant, row.board_rows or 3, row.board_cols or 3, row.win_length or 3,
+                    decode_positions(row.move_positions) if row.move_positions is not None else moves.get(row.id, []),
+                    time_limit
+                )
+                for row in rows
+            ]
+            results = await _run_jobs(pool, jobs, workers)
+
+            await _store_results(lookup_db, rows, results)
+            await lookup_db.commit()
+
+            analyzed += len(rows)
+            last_id = rows[-1].id
+            metrics.increment('analysis.games', len(rows))
+            logger.info(f"Analysis: {analyzed} games analyzed (up to game {last_id})")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Every finished game below the first unfinished one is now analyzed
+    # (or skipped for its board size); with none unfinished, every game is
+    if first_unfinished is not None:
+        last_id = first_unfinished - 1
+    elif last_game is not None:
+        last_id = max(last_id, last_game)
+    state.high_water_mark = max(after_id, last_id)
+    state.updated_at = datetime.utcnow()
+    await lookup_db.commit()
+
+    return {'games_analyzed': analyzed, 'high_water_mark': state.high_water_mark}
+
+
+class AnalysisWorker:
+    """Periodic background analysis of newly finished games"""
+
+    def __init__(self, interval: float = 300.0):
+        """
+        Initialize worker
+
+        Args:
+            interval: Seconds between passes (0 disables the worker)
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic analysis task"""
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Post-game analysis started")
+
+    async def stop(self) -> None:
+        """Stop the periodic analysis task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_pass(self) -> Dict:
+        """Analyze everything finished since the last pass"""
+        async with AsyncSessionLocal() as stream_session, AsyncSessionLocal() as lookup_session:
+            return await analyze_games(
+                stream_session,
+                lookup_session,
+                batch_size=settings.ANALYSIS_BATCH_SIZE,
+                workers=settings.ANALYSIS_WORKERS
+            )
+
+    async def _run(self) -> None:
+        """Analysis loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_pass()
+            except Exception as e:
+                logger.error(f"Post-game analysis pass failed: {str(e)}")
+
+
+# Global analysis worker
+analysis_worker = AnalysisWorker(settings.ANALYSIS_INTERVAL_SECONDS)
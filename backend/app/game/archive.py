@@ -0,0 +1,375 @@
+"""
+Archive export - finished games and their moves in compact columnar files
+
+Games are streamed in id order with a server-side cursor and written in
+batches, one file per batch, partitioned by the month they finished:
+
+    <output>/year=YYYY/month=MM/games-<first id>-<last id>.parquet (or .ttta)
+
+Each game is one row; its moves are a single packed move sequence (see
+move_codec) instead of one row per move. Parquet is used when pyarrow is
+installed, otherwise the packed columnar format below. A manifest in the
+output directory records the last archived game id so runs resume.
+
+Packed columnar format (.ttta, little-endian):
+    4s   magic b'TTTA'
+    u16  format version
+    u16  column count
+    u32  row count
+  per column:
+    u8   name length, then the name (utf-8)
+    u8   type: 'q' int64, 'i' int32, 'b' int8, 's' utf-8 string, 'B' bytes
+    u64  payload length, then the payload:
+         fixed types: row count values (NULL stored as -1)
+         's'/'B': (row count + 1) u32 offsets, then the concatenated values
+"""
+from typing import Dict, List, Optional, Tuple
+from array import array
+from datetime import datetime
+import json
+import os
+import struct
+import sys
+import logging
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Game, Move, ChatMessage, Invitation, ServerLog, GameAnalysis
+from app.migrations.base import has_autoincrement
+from .move_codec import encode_positions, encode_times, decode_positions
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Fall back to the packed columnar format
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MAGIC = b'TTTA'
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = '_manifest.json'
+
+_FILE_HEADER = struct.Struct('<4sHHI')
+_COLUMN_LENGTH = struct.Struct('<Q')
+
+# Column name -> type code
+ARCHIVE_COLUMNS: List[Tuple[str, str]] = [
+    ('id', 'q'),
+    ('player1_id', 'q'),
+    ('player2_id', 'q'),
+    ('winner_id', 'q'),
+    ('is_bot_game', 'b'),
+    ('bot_difficulty', 's'),
+    ('variant', 's'),
+    ('board_rows', 'b'),
+    ('board_cols', 'b'),
+    ('win_length', 'b'),
+    ('status', 's'),
+    ('result', 's'),
+    ('started_at_ms', 'q'),
+    ('finished_at_ms', 'q'),
+    ('move_count', 'i'),
+    ('moves', 'B'),
+    ('move_times', 'B'),
+    ('chat', 's')  # JSON list of [user_id, ms since start, message], '' if none
+]
+
+_ARRAY_TYPES = {'q': 'q', 'i': 'i', 'b': 'b'}
+
+
+def _epoch_ms(value: Optional[datetime]) -> int:
+    """Datetime as epoch milliseconds (-1 for NULL)"""
+    return int(value.timestamp() * 1000) if value else -1
+
+
+def write_packed(path: str, columns: Dict[str, list]) -> None:
+    """
+    Write columns in the packed columnar format
+
+    Args:
+        path: Output path
+        columns: Column name -> values (all ARCHIVE_COLUMNS)
+    """
+    row_count = len(columns['id'])
+    with open(path, 'wb') as f:
+        f.write(_FILE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(ARCHIVE_COLUMNS), row_count))
+        for name, type_code in ARCHIVE_COLUMNS:
+            values = columns[name]
+            if type_code in _ARRAY_TYPES:
+                data = array(_ARRAY_TYPES[type_code], [-1 if v is None else int(v) for v in values])
+                if sys.byteorder != 'little':
+                    data.byteswap()
+                payload = data.tobytes()
+            else:
+                items = [
+                    (v or '').encode('utf-8') if type_code == 's' else (v or b'')
+                    for v in values
+                ]
+                offsets = array('I', [0])
+                for item in items:
+                    offsets.append(offsets[-1] + len(item))
+                if sys.byteorder != 'little':
+                    offsets.byteswap()
+                payload = offsets.tobytes() + b''.join(items)
+
+            encoded_name = name.encode('utf-8')
+            f.write(bytes([len(encoded_name)]) + encoded_name + type_code.encode('ascii'))
+            f.write(_COLUMN_LENGTH.pack(len(payload)))
+            f.write(payload)
+
+
+def read_packed(path: str) -> Dict[str, list]:
+    """
+    Read a packed columnar archive file
+
+    Args:
+        path: Archive file path
+
+    Returns:
+        Column name -> values
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, column_count, row_count = _FILE_HEADER.unpack_from(data)
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"Not an archive file: {path}")
+    if version != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version {version}")
+
+    offset = _FILE_HEADER.size
+    columns: Dict[str, list] = {}
+    for _ in range(column_count):
+        name_length = data[offset]
+        name = data[offset + 1:offset + 1 + name_length].decode('utf-8')
+        type_code = chr(data[offset + 1 + name_length])
+        offset += 2 + name_length
+        (length,) = _COLUMN_LENGTH.unpack_from(data, offset)
+        offset += _COLUMN_LENGTH.size
+        payload = data[offset:offset + length]
+        offset += length
+
+        if type_code in _ARRAY_TYPES:
+            values = array(_ARRAY_TYPES[type_code])
+            values.frombytes(payload)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            columns[name] = values.tolist()
+        else:
+            offsets = array('I')
+            offsets.frombytes(payload[:(row_count + 1) * 4])
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            body = payload[(row_count + 1) * 4:]
+            items = [body[offsets[i]:offsets[i + 1]] for i in range(row_count)]
+            columns[name] = [item.decode('utf-8') for item in items] if type_code == 's' else items
+
+    return columns
+
+
+def read_archive(path: str) -> Dict[str, list]:
+    """
+    Read an archive file in either format
+
+    Args:
+        path: .parquet or .ttta file
+
+    Returns:
+        Column name -> values
+    """
+    if path.endswith('.parquet'):
+        if pyarrow is None:
+            raise RuntimeError("Reading parquet archives requires pyarrow")
+        return pyarrow.parquet.read_table(path).to_pydict()
+    return read_packed(path)
+
+
+def _write_partition(path: str, columns: Dict[str, list], use_parquet: bool) -> None:
+    """Write one archive file atomically"""
+    temp_path = f"{path}.tmp"
+    if use_parquet:
+        pyarrow.parquet.write_table(pyarrow.table(columns), temp_path, compression='zstd')
+    else:
+        write_packed(temp_path, columns)
+    os.replace(temp_path, path)
+
+
+def _load_manifest(output_dir: str) -> Dict:
+    """Load the archive manifest (empty for a new archive)"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'last_game_id': 0, 'games': 0, 'files': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(output_dir: str, manifest: Dict) -> None:
+    """Save the archive manifest atomically"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+async def _prune_games(db: AsyncSession, game_ids: List[int]) -> None:
+    """Delete archived games and their moves and chat from the live tables"""
+    await db.execute(update(Invitation).where(Invitation.game_id.in_(game_ids)).values(game_id=None))
+    await db.execute(update(ServerLog).where(ServerLog.game_id.in_(game_ids)).values(game_id=None))
+    await db.execute(delete(Move).where(Move.game_id.in_(game_ids)))
+    await db.execute(delete(ChatMessage).where(ChatMessage.game_id.in_(game_ids)))
+    await db.execute(delete(GameAnalysis).where(GameAnalysis.game_id.in_(game_ids)))
+    await db.execute(delete(Game).where(Game.id.in_(game_ids)))
+    await db.commit()
+
+
+async def archive_games(
+    db: AsyncSession,
+    lookup_db: AsyncSession,
+    output_dir: str,
+    batch_size: int = 5000,
+    prune: bool = False,
+    file_format: Optional[str] = None
+) -> Dict:
+    """
+    Archive finished and abandoned games not archived yet
+
+    Args:
+        db: Session for the streaming game cursor
+        lookup_db: Session for move/chat lookups and pruning
+        output_dir: Archive root directory
+        batch_size: Games per cursor fetch and per file
+        prune: Delete archived games, moves and chat from the live tables
+        file_format: 'parquet' or 'packed' (defaults to parquet when available)
+
+    Returns:
+        Dictionary with games archived, files written and the high-water mark
+    """
+    use_parquet = (file_format or ('parquet' if pyarrow else 'packed')) == 'parquet'
+    if use_parquet and pyarrow is None:
+        raise RuntimeError("Parquet output requires pyarrow")
+    if prune and not await lookup_db.run_sync(lambda session: has_autoincrement(session.connection(), 'games')):
+        # Otherwise new games would reuse pruned ids at or below the high-water mark
+        raise RuntimeError("Pruning needs game ids that are never reused; run migrate_db.py --upgrade first")
+    extension = 'parquet' if use_parquet else 'ttta'
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    after_id = manifest['last_game_id']
+    archived = 0
+    files: List[str] = []
+
+    stmt = (
+        select(
+            Game.id, Game.player1_id, Game.player2_id, Game.winner_id, Game.is_bot_game,
+            Game.bot_difficulty, Game.variant, Game.board_rows, Game.board_cols,
+            Game.win_length, Game.status, Game.result, Game.started_at, Game.finished_at,
+            Game.move_positions, Game.move_times
+        )
+        .where(Game.status.in_(('finished', 'abandoned')))
+        .where(Game.id > after_id)
+        .order_by(Game.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    stream = await db.stream(stmt)
+    async for rows in stream.partitions():
+        game_ids = [row.id for row in rows]
+
+        # Packed games already carry their moves in archive form; one query
+        # per batch for the rest, in game then move order
+        moves: Dict[int, List[Tuple[int, Optional[datetime]]]] = {}
+        row_game_ids = [row.id for row in rows if row.move_positions is None]
+        if row_game_ids:
+            move_rows = await lookup_db.execute(
+                select(Move.game_id, Move.position, Move.timestamp)
+                .where(Move.game_id.in_(row_game_ids))
+                .order_by(Move.game_id, Move.move_number)
+            )
+            for game_id, position, timestamp in move_rows:
+                moves.setdefault(game_id, []).append((position, timestamp))
+
+        chat: Dict[int, List] = {}
+        chat_rows = await lookup_db.execute(
+            select(ChatMessage.game_id, ChatMessage.user_id, ChatMessage.timestamp, ChatMessage.message)
+            .where(ChatMessage.game_id.in_(game_ids))
+            .order_by(ChatMessage.game_id, ChatMessage.id)
+        )
+        for game_id, user_id, timestamp, message in chat_rows:
+            chat.setdefault(game_id, []).append((user_id, timestamp, message))
+
+        # Partition the batch by finish month
+        partitions: Dict[Tuple[int, int], Dict[str, list]] = {}
+        for row in rows:
+            finished = row.finished_at or row.started_at or datetime.utcfromtimestamp(0)
+            columns = partitions.setdefault(
+                (finished.year, finished.month),
+                {name: [] for name, _ in ARCHIVE_COLUMNS}
+            )
+
+            started_ms = _epoch_ms(row.started_at)
+            game_moves = moves.get(row.id, [])
+            game_chat = chat.get(row.id)
+            board_size = (row.board_rows or 3) * (row.board_cols or 3)
+
+            values = {
+                'id': row.id,
+                'player1_id': row.player1_id,
+                'player2_id': row.player2_id,
+                'winner_id': row.winner_id,
+                'is_bot_game': 1 if row.is_bot_game else 0,
+                'bot_difficulty': row.bot_difficulty,
+                'variant': row.variant or 'classic',
+                'board_rows': row.board_rows or 3,
+                'board_cols': row.board_cols or 3,
+                'win_length': row.win_length or 3,
+                'status': row.status,
+                'result': row.result,
+                'started_at_ms': started_ms,
+                'finished_at_ms': _epoch_ms(row.finished_at),
+                'move_count': len(game_moves),
+                'moves': encode_positions([position for position, _ in game_moves], board_size),
+                'move_times': encode_times([
+                    max(0, _epoch_ms(timestamp) - started_ms) if timestamp and started_ms >= 0 else 0
+                    for _, timestamp in game_moves
+                ]),
+                'chat': json.dumps([
+                    [user_id, max(0, _epoch_ms(timestamp) - started_ms), message]
+                    for user_id, timestamp, message in game_chat
+                ]) if game_chat else ''
+            }
+            if row.move_positions is not None:
+                values['move_count'] = len(decode_positions(row.move_positions))
+                values['moves'] = row.move_positions
+                values['move_times'] = row.move_times or encode_times([])
+            for name, value in values.items():
+                columns[name].append(value)
+
+        for (year, month), columns in sorted(partitions.items()):
+            directory = os.path.join(output_dir, f"year={year}", f"month={month:02d}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"games-{columns['id'][0]}-{columns['id'][-1]}.{extension}")
+            _write_partition(path, columns, use_parquet)
+            files.append(os.path.relpath(path, output_dir))
+
+        if prune:
+            await _prune_games(lookup_db, game_ids)
+        else:
+            # End the read transaction so the lookup session does not pin old snapshots
+            await lookup_db.rollback()
+
+        archived += len(game_ids)
+        manifest['last_game_id'] = game_ids[-1]
+        manifest['games'] += len(game_ids)
+        manifest['files'].extend(files[-len(partitions):])
+        _save_manifest(output_dir, manifest)
+        logger.info(f"Archive: {archived} games written (last id {game_ids[-1]})")
+
+    return {
+        'games_archived': archived,
+        'files_written': len(files),
+        'last_game_id': manifest['last_game_id'],
+        'format': extension,
+        'pruned': prune
+    }
@@ -1,45 +1,200 @@
 """
-Bot AI implementation using Minimax algorithm
+Bot AI implementation using Minimax (negamax) search
+Monte Carlo Tree Search is used for boards too large for exhaustive search
 """
 import random
-from typing import Optional, Tuple
-from .game_logic import TicTacToeLogic
+import time
+from typing import Optional, Tuple, List, Dict
+from app.config import settings
+from .game_logic import TicTacToeLogic, MNKLogic, CLASSIC, EMPTY
+from .mcts import MCTSEngine
+from .opening_book import get_opening_book
+from .ultimate import UltimateLogic, UltimateEngine
+
+WIN_SCORE = 1000
+WIN_SCORE_MARGIN = 100  # scores beyond WIN_SCORE - margin are forced results
+INFINITY = float('inf')
+
+MEDIUM_RANDOM_MOVE_CHANCE = 0.5
+
+# Time limit of replayed searches: they stop on the recorded depth or playouts
+REPLAY_TIME_LIMIT = INFINITY
+
+# Difficulty -> MCTS playout budget
+MCTS_PLAYOUTS = {
+    'easy': settings.MCTS_PLAYOUTS_EASY,
+    'medium': settings.MCTS_PLAYOUTS_MEDIUM,
+    'hard': settings.MCTS_PLAYOUTS_HARD
+}
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
 
 
 class BotAI:
     """
     AI Bot for playing Tic-Tac-Toe
-    Implements Minimax algorithm with different difficulty levels
+    Implements iterative-deepening negamax (alpha-beta) with different difficulty levels
+
+    All randomness comes from the bot's own RNG, reseeded from (seed, ply)
+    before every move; MCTS engines are reseeded from it too and start each
+    move from a fresh tree. Live searches stop on the clock, so the trace
+    records how far each one got (completed depth, or playouts per MCTS
+    worker) and replay_decision() repeats it to that point without a clock.
     """
 
-    def __init__(self, difficulty: str = 'medium', symbol: str = 'O'):
+    def __init__(
+        self,
+        difficulty: str = 'medium',
+        symbol: str = 'O',
+        logic: Optional[MNKLogic] = None,
+        strategy: Optional[str] = None,
+        seed: Optional[int] = None,
+        trace: bool = False
+    ):
         """
         Initialize Bot AI
 
         Args:
             difficulty: Difficulty level ('easy', 'medium', 'hard')
             symbol: Bot's symbol ('X' or 'O')
+            logic: Board configuration (defaults to classic 3x3)
+            strategy: 'minimax' or 'mcts' (defaults to settings.BOT_STRATEGY)
+            seed: RNG seed (a random one is drawn if omitted)
+            trace: Record every decision in self.trace
         """
+        self.logic = logic or CLASSIC
         self.difficulty = difficulty.lower()
         self.symbol = symbol
         self.opponent_symbol = TicTacToeLogic.get_opponent_symbol(symbol)
 
-    def get_best_move(self, board: str) -> int:
+        strategy = (strategy or settings.BOT_STRATEGY).lower()
+        if isinstance(self.logic, UltimateLogic):
+            # Ultimate rules need their own move generator and evaluation
+            strategy = 'ultimate'
+        elif strategy == 'auto':
+            # Exhaustive search only fits the classic board
+            strategy = 'minimax' if self.logic.size <= 9 else 'mcts'
+        self.strategy = strategy
+        self._mcts: Optional[MCTSEngine] = None
+        self._ultimate: Optional[UltimateEngine] = None
+        self._time_cap: Optional[float] = None
+
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.rng = random.Random(self.seed)
+        self.trace: Optional[List[Dict]] = [] if trace else None
+
+        # Search state and statistics
+        self.nodes_searched = 0
+        self.search_depth = 0
+        self.search_complete = False  # last search() reached its depth limit or a forced result
+        self.last_score: Optional[int] = None
+        self.last_source = 'random'
+        self.last_playouts: Optional[List[int]] = None
+        self._replay: Optional[Dict] = None
+        self._deadline = 0.0
+        self._killers: List[List[Optional[int]]] = []
+
+    def get_best_move(self, board: str, time_limit: Optional[float] = None) -> int:
         """
         Get the best move for the bot based on difficulty
 
         Args:
             board: Current board state
+            time_limit: Cap on search time for this move (e.g. a share of a batch budget)
 
         Returns:
             Position to play (0-8)
         """
-        if self.difficulty == 'easy':
-            return self._get_easy_move(board)
-        elif self.difficulty == 'medium':
-            return self._get_medium_move(board)
-        else:  # hard
-            return self._get_hard_move(board)
+        self.begin_move(board)
+        self._time_cap = time_limit
+
+        if self.strategy == 'mcts':
+            move = self._get_mcts_move(board)
+            self.record_decision(board, move, 'mcts')
+            return move
+
+        move = self._get_search_move(board)
+        self.record_decision(board, move, self.last_source)
+        return move
+
+    def begin_move(self, board: str) -> None:
+        """
+        Reset per-move state and reseed the RNG for this ply
+
+        Args:
+            board: Current board state
+        """
+        ply = len(board) - board.count(EMPTY)
+        self.rng.seed(f"{self.seed}:{ply}")
+        self.nodes_searched = 0
+        self.search_depth = 0
+        self.last_score = None
+        self.last_source = 'random'
+        self.last_playouts = None
+
+    def record_decision(self, board: str, move: int, source: str, searched: Optional[str] = None) -> None:
+        """
+        Append a decision to the trace (no-op unless tracing or replaying)
+
+        Args:
+            board: Board the decision was made on
+            move: Chosen position
+            source: 'search', 'book', 'table', 'random' or 'mcts'
+            searched: Board the search ran on, when it was another
+                orientation of board (the scheduler's canonical position)
+        """
+        if self.trace is None or self._replay is not None:
+            return
+
+        self.trace.append({
+            'ply': len(board) - board.count(EMPTY),
+            'board': board,
+            'move': move,
+            'source': source,
+            'score': self.last_score,
+            'nodes': self.nodes_searched,
+            'depth': self.search_depth,
+            'playouts': self.last_playouts,
+            'searched': searched
+        })
+
+    def replay_decision(self, decision: Dict) -> int:
+        """
+        Recompute a traced decision offline
+
+        The RNG is reseeded for the decision's ply as it was live, and the
+        search stops at the recorded depth (or per-worker playouts for
+        MCTS) instead of on the clock, so the result does not depend on
+        machine speed or load. A 'table' answer was searched for another
+        game and is returned as recorded.
+
+        Args:
+            decision: Entry from a trace of a bot with the same seed
+
+        Returns:
+            Position the bot played
+        """
+        board = decision['board']
+        if decision['source'] == 'table':
+            return decision['move']
+
+        self._replay = decision
+        try:
+            if decision['source'] == 'search' and decision.get('searched'):
+                # Scheduler turn: searched in canonical orientation, mapped back
+                self.begin_move(board)
+                self.pick_search_limits()
+                searched = decision['searched']
+                _, move = self.search(searched, decision['depth'], REPLAY_TIME_LIMIT)
+                if move is None:
+                    move = self._get_easy_move(searched)
+                _, permutation = self.logic.canonicalize(board)
+                return permutation[move]
+            return self.get_best_move(board)
+        finally:
+            self._replay = None
 
     def _get_easy_move(self, board: str) -> int:
         """
@@ -51,180 +206,292 @@ class BotAI:
         Returns:
             Random valid position
         """
-        available_moves = TicTacToeLogic.get_available_moves(board)
-        return random.choice(available_moves)
+        available_moves = self.logic.get_available_moves(board)
+        return self.rng.choice(available_moves)
 
-    def _get_medium_move(self, board: str) -> int:
+    def pick_search_limits(self) -> Optional[Tuple[Optional[int], float]]:
         """
-        Medium difficulty: Minimax with limited depth (3)
-        50% chance to make a random move for unpredictability
+        Decide how this turn is played
+
+        Easy always plays randomly; medium plays randomly half of the time
+        for unpredictability, otherwise searches BOT_MEDIUM_DEPTH plies;
+        hard searches to the end of the game within its time budget.
+
+        Returns:
+            Tuple of (max_depth, time_limit) for search, or None for a random move
+        """
+        if self.difficulty == 'easy':
+            return None
+        if self.difficulty == 'medium':
+            if self.rng.random() < MEDIUM_RANDOM_MOVE_CHANCE:
+                return None
+            return settings.BOT_MEDIUM_DEPTH, settings.BOT_MEDIUM_TIME_LIMIT_SECONDS
+        return None, settings.BOT_HARD_TIME_LIMIT_SECONDS
+
+    def _get_search_move(self, board: str) -> int:
+        """
+        Play a move with the limits from pick_search_limits
 
         Args:
             board: Current board state
 
         Returns:
-            Best position found
+            Position to play
         """
-        # 50% chance to make a random move
-        if random.random() < 0.5:
+        limits = self.pick_search_limits()
+        if limits is None:
             return self._get_easy_move(board)
 
-        # Otherwise use minimax with depth 3
-        _, move = self._minimax(board, depth=0, max_depth=3, is_maximizing=True)
+        max_depth, time_limit = limits
+        if self._time_cap is not None:
+            time_limit = min(time_limit, self._time_cap)
+        if self._replay is not None:
+            max_depth, time_limit = self._replay['depth'], REPLAY_TIME_LIMIT
+
+        if self.strategy == 'ultimate':
+            if self._ultimate is None:
+                self._ultimate = UltimateEngine()
+            self.last_score, move = self._ultimate.search(board, self.symbol, max_depth, time_limit)
+            self.nodes_searched = self._ultimate.nodes_searched
+            self.search_depth = self._ultimate.search_depth
+            self.last_source = 'search'
+            return move if move is not None else self._get_easy_move(board)
+
+        # Full-strength turns play from the opening book when it has the position
+        if limits[0] is None:
+            book_move = self.lookup_book(board)
+            if book_move is not None:
+                return book_move
+
+        self.last_score, move = self.search(board, max_depth, time_limit)
+        self.last_source = 'search'
         return move if move is not None else self._get_easy_move(board)
 
-    def _get_hard_move(self, board: str) -> int:
+    def lookup_book(self, board: str) -> Optional[int]:
         """
-        Hard difficulty: Full Minimax with alpha-beta pruning
-        Unbeatable AI
+        Pick a move from the opening book (any of the equally best moves)
 
         Args:
             board: Current board state
 
         Returns:
-            Optimal position
-        """
-        _, move = self._minimax_alpha_beta(
-            board,
-            depth=0,
-            alpha=float('-inf'),
-            beta=float('inf'),
-            is_maximizing=True
-        )
-        return move if move is not None else self._get_easy_move(board)
+            Position to play, or None if the book does not have the position
+        """
+        book = get_opening_book(self.logic)
+        entry = book.lookup(board) if book else None
+        if not entry:
+            return None
+
+        moves, self.last_score = entry
+        self.last_source = 'book'
+        return self.rng.choice(moves)
+
+    def _get_mcts_move(self, board: str) -> int:
+        """
+        MCTS strategy: difficulty maps to the playout budget
+        The engine is reseeded from the per-ply RNG and searches from a
+        fresh tree, so a move depends only on (seed, ply, board, playouts)
 
-    def _minimax(
+        Args:
+            board: Current board state
+
+        Returns:
+            Best position found
+        """
+        if self._mcts is None:
+            self._mcts = MCTSEngine(
+                self.logic,
+                playouts=MCTS_PLAYOUTS.get(self.difficulty, settings.MCTS_PLAYOUTS_MEDIUM),
+                time_limit=settings.MCTS_TIME_LIMIT_SECONDS,
+                workers=settings.MCTS_WORKERS,
+                reuse_tree=False
+            )
+        self._mcts.rng.seed(self.rng.getrandbits(32))
+
+        if self._replay is not None:
+            move = self._mcts.search(board, self.symbol, budgets=self._replay['playouts'])
+        else:
+            self._mcts.time_limit = settings.MCTS_TIME_LIMIT_SECONDS
+            if self._time_cap is not None:
+                self._mcts.time_limit = min(self._mcts.time_limit, self._time_cap)
+            move = self._mcts.search(board, self.symbol)
+        self.nodes_searched = self._mcts.last_playouts
+        self.last_playouts = list(self._mcts.last_worker_playouts)
+        return move
+
+    def search(
         self,
         board: str,
-        depth: int,
-        max_depth: int,
-        is_maximizing: bool
+        max_depth: Optional[int] = None,
+        time_limit: float = 1.0
     ) -> Tuple[int, Optional[int]]:
         """
-        Minimax algorithm with depth limit
+        Iterative-deepening negamax with alpha-beta pruning
+
+        Each iteration searches one ply deeper, trying the previous
+        iteration's best move first. When the time budget runs out the
+        result of the last completed iteration is returned, so latency is
+        bounded on any board size; search_complete tells whether the result
+        is final (depth limit or forced result reached) or was cut short.
 
         Args:
             board: Current board state
-            depth: Current depth in the game tree
-            max_depth: Maximum depth to search
-            is_maximizing: True if maximizing player, False if minimizing
+            max_depth: Maximum depth in plies (None = until the board is full)
+            time_limit: Seconds allowed for the search
 
         Returns:
-            Tuple of (score, best_move)
+            Tuple of (score, best_move) from the bot's point of view
         """
-        # Check terminal states
-        winner = TicTacToeLogic.check_winner(board)
-        if winner == self.symbol:
-            return (10 - depth, None)
-        elif winner == self.opponent_symbol:
-            return (-10 + depth, None)
-        elif TicTacToeLogic.is_board_full(board):
-            return (0, None)
-
-        # Depth limit reached
-        if depth >= max_depth:
-            return (0, None)
-
-        available_moves = TicTacToeLogic.get_available_moves(board)
+        cells = list(board)
+        empties = cells.count(EMPTY)
+        depth_limit = empties if max_depth is None else min(max_depth, empties)
+
+        self.nodes_searched = 0
+        self.search_depth = 0
+        self._deadline = time.monotonic() + time_limit
+        self._killers = [[None, None] for _ in range(empties + 1)]
+
+        self.search_complete = False
+        best_score, best_move = 0, None
+        for depth in range(1, depth_limit + 1):
+            try:
+                score, move = self._search_root(cells, depth, best_move, empties)
+            except _SearchTimeout:
+                break
+
+            best_score, best_move = score, move
+            self.search_depth = depth
+
+            # A forced win or loss will not change with more depth
+            if abs(best_score) > WIN_SCORE - WIN_SCORE_MARGIN:
+                self.search_complete = True
+                break
+        else:
+            self.search_complete = True
 
-        if is_maximizing:
-            max_score = float('-inf')
-            best_move = None
+        return best_score, best_move
 
-            for move in available_moves:
-                new_board = TicTacToeLogic.make_move(board, move, self.symbol)
-                score, _ = self._minimax(new_board, depth + 1, max_depth, False)
+    def _search_root(
+        self,
+        cells: List[str],
+        depth: int,
+        pv_move: Optional[int],
+        empties: int
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Search all root moves to a fixed depth
 
-                if score > max_score:
-                    max_score = score
-                    best_move = move
+        Args:
+            cells: Board cells (modified in place and restored)
+            depth: Depth in plies
+            pv_move: Best move of the previous iteration
+            empties: Number of empty cells
 
-            return (max_score, best_move)
-        else:
-            min_score = float('inf')
-            best_move = None
+        Returns:
+            Tuple of (score, best_move)
+        """
+        alpha, beta = -INFINITY, INFINITY
+        best_score, best_move = -INFINITY, None
 
-            for move in available_moves:
-                new_board = TicTacToeLogic.make_move(board, move, self.opponent_symbol)
-                score, _ = self._minimax(new_board, depth + 1, max_depth, True)
+        for move in self._order_moves(cells, 0, pv_move):
+            cells[move] = self.symbol
+            score = -self._negamax(cells, depth - 1, -beta, -alpha, self.opponent_symbol, 1, move, empties - 1)
+            cells[move] = EMPTY
 
-                if score < min_score:
-                    min_score = score
-                    best_move = move
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
 
-            return (min_score, best_move)
+        return best_score, best_move
 
-    def _minimax_alpha_beta(
+    def _negamax(
         self,
-        board: str,
+        cells: List[str],
         depth: int,
         alpha: float,
         beta: float,
-        is_maximizing: bool
-    ) -> Tuple[int, Optional[int]]:
+        symbol: str,
+        ply: int,
+        last_move: int,
+        empties: int
+    ) -> int:
         """
-        Minimax algorithm with alpha-beta pruning
-        More efficient for full game tree search
+        Negamax with alpha-beta pruning
 
         Args:
-            board: Current board state
-            depth: Current depth in the game tree
+            cells: Board cells (modified in place and restored)
+            depth: Remaining depth in plies
             alpha: Alpha value for pruning
             beta: Beta value for pruning
-            is_maximizing: True if maximizing player, False if minimizing
+            symbol: Symbol to move
+            ply: Distance from the root
+            last_move: Cell played by the opponent to reach this node
+            empties: Number of empty cells
 
         Returns:
-            Tuple of (score, best_move)
+            Score from the point of view of the side to move
         """
-        # Check terminal states
-        winner = TicTacToeLogic.check_winner(board)
-        if winner == self.symbol:
-            return (10 - depth, None)
-        elif winner == self.opponent_symbol:
-            return (-10 + depth, None)
-        elif TicTacToeLogic.is_board_full(board):
-            return (0, None)
-
-        available_moves = TicTacToeLogic.get_available_moves(board)
-
-        if is_maximizing:
-            max_score = float('-inf')
-            best_move = None
-
-            for move in available_moves:
-                new_board = TicTacToeLogic.make_move(board, move, self.symbol)
-                score, _ = self._minimax_alpha_beta(
-                    new_board, depth + 1, alpha, beta, False
-                )
-
-                if score > max_score:
-                    max_score = score
-                    best_move = move
+        self.nodes_searched += 1
+        if self.nodes_searched & 1023 == 0 and time.monotonic() >= self._deadline:
+            raise _SearchTimeout()
+
+        # The opponent's last move may have ended the game (O(k) check)
+        if self.logic.get_line_at(cells, last_move):
+            return -(WIN_SCORE - ply)
+        if empties == 0 or depth == 0:
+            return 0
 
-                alpha = max(alpha, score)
-                if beta <= alpha:
-                    break  # Beta cutoff
+        opponent = 'O' if symbol == 'X' else 'X'
+        best_score = -INFINITY
+
+        for move in self._order_moves(cells, ply, None):
+            cells[move] = symbol
+            score = -self._negamax(cells, depth - 1, -beta, -alpha, opponent, ply + 1, move, empties - 1)
+            cells[move] = EMPTY
+
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                # Remember the refutation for sibling nodes at this ply
+                killers = self._killers[ply]
+                if killers[0] != move:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                break
+
+        return best_score
+
+    def _order_moves(self, cells: List[str], ply: int, pv_move: Optional[int]) -> List[int]:
+        """
+        Order moves: previous best move, killer moves, then cells on the
+        most winning lines (center, then corners on the classic board)
 
-            return (max_score, best_move)
-        else:
-            min_score = float('inf')
-            best_move = None
+        Args:
+            cells: Board cells
+            ply: Distance from the root
+            pv_move: Best move of the previous iteration (root only)
 
-            for move in available_moves:
-                new_board = TicTacToeLogic.make_move(board, move, self.opponent_symbol)
-                score, _ = self._minimax_alpha_beta(
-                    new_board, depth + 1, alpha, beta, True
-                )
+        Returns:
+            Ordered list of empty cells
+        """
+        weights = self.logic.cell_weights
+        moves = sorted(
+            (i for i, cell in enumerate(cells) if cell == EMPTY),
+            key=lambda i: -weights[i]
+        )
 
-                if score < min_score:
-                    min_score = score
-                    best_move = move
+        for move in reversed(self._killers[ply]):
+            if move is not None and cells[move] == EMPTY:
+                moves.remove(move)
+                moves.insert(0, move)
 
-                beta = min(beta, score)
-                if beta <= alpha:
-                    break  # Alpha cutoff
+        if pv_move is not None:
+            moves.remove(pv_move)
+            moves.insert(0, pv_move)
 
-            return (min_score, best_move)
+        return moves
 
     def evaluate_position(self, board: str) -> int:
         """
@@ -236,7 +503,7 @@ class BotAI:
         Returns:
             Evaluation score (positive is good for bot, negative is bad)
         """
-        winner = TicTacToeLogic.check_winner(board)
+        winner = self.logic.check_winner(board)
 
         if winner == self.symbol:
             return 100
@@ -0,0 +1,217 @@
+"""
+Batched bot-move scheduler
+
+Bot turns from all live games are collected for a short window and resolved
+together in one worker-thread call. Positions are reduced to their canonical
+form under board rotations and reflections, so identical positions (very
+common in openings) are searched once per batch, and solved positions are
+kept in a bounded table so repeated positions become lookups. Only searches
+that finished (reached their depth limit or a forced result) are stored: a
+search cut short by its time limit depends on machine load and would
+otherwise be served to every later game.
+
+MCTS and ultimate turns share one deadline per batch. Turns that would
+start after it are carried over to the front of the next batch.
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.utils.metrics import metrics
+from .bot_ai import BotAI
+
+logger = logging.getLogger(__name__)
+
+# (rows, cols, win_length, canonical board, symbol, max_depth) -> (canonical move, score)
+PositionKey = Tuple[int, int, int, str, str, Optional[int]]
+
+
+class BotMoveScheduler:
+    """Collect bot turns into batches and resolve them through a position table"""
+
+    def __init__(
+        self,
+        window: float = 0.005,
+        max_batch: int = 1024,
+        table_size: int = 100000,
+        time_budget: float = 2.0
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            window: Seconds to wait for more requests before resolving a batch
+            max_batch: Maximum requests resolved in one call
+            table_size: Maximum solved positions kept in the table
+            time_budget: Search seconds shared by MCTS/ultimate turns in one batch
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self.table_size = table_size
+        self.time_budget = time_budget
+
+        self._pending: List[Tuple[BotAI, str, asyncio.Future]] = []
+        self._table: 'OrderedDict[PositionKey, Tuple[int, Optional[int]]]' = OrderedDict()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def request_move(self, bot: BotAI, board: str) -> int:
+        """
+        Queue a bot turn and wait for its move
+
+        Args:
+            bot: Bot of the game
+            board: Current board state
+
+        Returns:
+            Position to play
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((bot, board, future))
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+        return await future
+
+    async def _flush_loop(self) -> None:
+        """Resolve batches until no requests are pending (carried-over turns go first)"""
+        while self._pending:
+            await asyncio.sleep(self.window)
+
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+
+            try:
+                moves = await asyncio.to_thread(
+                    self.resolve_batch, [(bot, board) for bot, board, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"Bot batch failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            carried = []
+            for request, move in zip(batch, moves):
+                if move is None:
+                    carried.append(request)
+                elif not request[2].done():
+                    request[2].set_result(move)
+            self._pending[:0] = carried
+
+    def resolve_batch(self, requests: List[Tuple[BotAI, str]]) -> List[Optional[int]]:
+        """
+        Resolve a batch of bot turns
+
+        Random turns (easy, and medium half of the time), opening book hits,
+        MCTS bots (which use their own engine) and ultimate bots are
+        played by their own bot. Those engines share one deadline: each
+        turn gets an even share of the time left, and once the deadline has
+        passed no further turn is started (at least one always is). A batch
+        therefore overruns BOT_BATCH_TIME_BUDGET_SECONDS by at most one
+        turn's clock-check interval however many heavy games are waiting.
+        Search turns are grouped by canonical position; each unique position
+        is looked up in the table or searched once.
+
+        Args:
+            requests: List of (bot, board) pairs
+
+        Returns:
+            Moves in request order; None for turns carried over to the next batch
+        """
+        moves: List[Optional[int]] = [None] * len(requests)
+        groups: Dict[PositionKey, List[Tuple[int, BotAI, str, List[int]]]] = {}
+        searchers: Dict[PositionKey, Tuple[BotAI, Tuple[Optional[int], float]]] = {}
+
+        deadline = time.monotonic() + self.time_budget
+        heavy_left = sum(1 for bot, _ in requests if bot.strategy != 'minimax')
+        heavy_started = 0
+        carried = 0
+
+        for index, (bot, board) in enumerate(requests):
+            if bot.strategy != 'minimax':
+                remaining = deadline - time.monotonic()
+                heavy_left -= 1
+                if remaining <= 0 and heavy_started:
+                    carried += 1
+                    continue
+                # get_best_move records its own decision
+                moves[index] = bot.get_best_move(board, time_limit=max(0.0, remaining) / (heavy_left + 1))
+                heavy_started += 1
+                continue
+
+            bot.begin_move(board)
+            limits = bot.pick_search_limits()
+            if limits is None:
+                moves[index] = bot._get_easy_move(board)
+                bot.record_decision(board, moves[index], 'random')
+                continue
+
+            if limits[0] is None:
+                book_move = bot.lookup_book(board)
+                if book_move is not None:
+                    moves[index] = book_move
+                    bot.record_decision(board, book_move, 'book')
+                    continue
+
+            logic = bot.logic
+            canonical, permutation = logic.canonicalize(board)
+            key = (logic.rows, logic.cols, logic.win_length, canonical, bot.symbol, limits[0])
+            groups.setdefault(key, []).append((index, bot, board, permutation))
+            searchers.setdefault(key, (bot, limits))
+
+        table_hits = 0
+        for key, members in groups.items():
+            searcher = None
+            entry = self._table.get(key)
+            if entry is not None:
+                self._table.move_to_end(key)
+                table_hits += 1
+            else:
+                searcher, limits = searchers[key]
+                score, move = searcher.search(key[3], *limits)
+                if move is None:
+                    move = searcher._get_easy_move(key[3])
+                entry = (move, score)
+                if searcher.search_complete:
+                    self._store(key, entry)
+
+            # Map the canonical move back onto each game's orientation
+            move, score = entry
+            for index, bot, board, permutation in members:
+                moves[index] = permutation[move]
+                bot.last_score = score
+                bot.record_decision(board, moves[index], 'search' if bot is searcher else 'table', key[3])
+
+        metrics.increment('bot_scheduler.batches')
+        metrics.increment('bot_scheduler.requests', len(requests))
+        metrics.increment('bot_scheduler.table_hits', table_hits)
+        metrics.increment('bot_scheduler.carried_over', carried)
+        metrics.observe('bot_scheduler.batch_size', len(requests))
+        metrics.observe('bot_scheduler.unique_positions', len(groups))
+        metrics.set_gauge('bot_scheduler.table_size', len(self._table))
+
+        return moves
+
+    def _store(self, key: PositionKey, entry: Tuple[int, Optional[int]]) -> None:
+        """Store a solved position, evicting the least recently used"""
+        self._table[key] = entry
+        if len(self._table) > self.table_size:
+            self._table.popitem(last=False)
+
+    def get_pending_count(self) -> int:
+        """Get number of bot turns waiting for a batch"""
+        return len(self._pending)
+
+
+# Global bot scheduler instance
+bot_scheduler = BotMoveScheduler(
+    window=settings.BOT_BATCH_WINDOW_SECONDS,
+    max_batch=settings.BOT_BATCH_MAX_SIZE,
+    table_size=settings.BOT_POSITION_TABLE_SIZE,
+    time_budget=settings.BOT_BATCH_TIME_BUDGET_SECONDS
+)
@@ -1,8 +1,15 @@
 """
 Tic-Tac-Toe game logic
+Generalized m,n,k-game engine with the classic 3x3 board as one configuration
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, NamedTuple, Sequence, Any
 from enum import Enum
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # Batch API is optional; single-board logic does not need it
+    np = None
 
 
 class GameResult(Enum):
@@ -12,9 +19,408 @@ class GameResult(Enum):
     ONGOING = "ongoing"
 
 
+# Board variants: name -> (rows, cols, win_length)
+BOARD_VARIANTS: Dict[str, Tuple[int, int, int]] = {
+    'classic': (3, 3, 3),
+    'gomoku': (15, 15, 5),
+    'ultimate': (9, 9, 3)  # nine 3x3 sub-boards, see ultimate.py
+}
+
+ULTIMATE_VARIANT = 'ultimate'
+
+# Line directions: row, column, diagonal, anti-diagonal
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+EMPTY = '-'
+
+# Batch API cell encoding and result codes
+CELL_CODES = {EMPTY: 0, 'X': 1, 'O': 2}
+CODE_SYMBOLS = {code: symbol for symbol, code in CELL_CODES.items()}
+RESULT_CODES = {GameResult.ONGOING: 0, GameResult.WIN: 1, GameResult.DRAW: 2}
+
+BATCH_CHUNK_SIZE = 65536
+
+
+class BatchEvaluation(NamedTuple):
+    """Batch evaluation of N boards (see MNKLogic.evaluate_batch)"""
+    winners: Any        # (N,) int8: 0 none, 1 X, 2 O
+    results: Any        # (N,) int8: RESULT_CODES values
+    legal_moves: Any    # (N, cells) bool: empty cells of unfinished games
+    winning_lines: Any  # (N, k) int16: winning positions, -1 when no winner
+
+
+def _require_numpy() -> None:
+    """Raise if NumPy is not installed"""
+    if np is None:
+        raise RuntimeError("The batch API requires numpy (pip install numpy)")
+
+
+class MNKLogic:
+    """
+    m,n,k-game logic: k in a row wins on a rows x cols board
+
+    The board is a string with one character per cell ('-', 'X' or 'O'),
+    row-major. Win detection after a move only scans the four lines through
+    the last placed symbol, so it costs O(k) instead of O(board).
+    """
+
+    def __init__(self, rows: int = 3, cols: int = 3, win_length: int = 3):
+        """
+        Initialize board configuration
+
+        Args:
+            rows: Number of rows
+            cols: Number of columns
+            win_length: Symbols in a row needed to win
+        """
+        if rows < 1 or cols < 1 or win_length < 1:
+            raise ValueError("Board dimensions must be positive")
+        if win_length > max(rows, cols):
+            raise ValueError("Win length does not fit on the board")
+
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.size = rows * cols
+        self.lines = self._build_lines()
+
+        # Number of winning lines through each cell (move ordering heuristic)
+        self.cell_weights = [0] * self.size
+        for line in self.lines:
+            for position in line:
+                self.cell_weights[position] += 1
+
+        self.symmetries = self._build_symmetries()
+
+    def _build_lines(self) -> List[List[int]]:
+        """Build every winning line of length win_length"""
+        lines = []
+        for dr, dc in DIRECTIONS:
+            for row in range(self.rows):
+                for col in range(self.cols):
+                    end_row = row + dr * (self.win_length - 1)
+                    end_col = col + dc * (self.win_length - 1)
+                    if 0 <= end_row < self.rows and 0 <= end_col < self.cols:
+                        lines.append([
+                            (row + dr * i) * self.cols + (col + dc * i)
+                            for i in range(self.win_length)
+                        ])
+        return lines
+
+    def _build_symmetries(self) -> List[List[int]]:
+        """
+        Build the cell permutations that map the board onto itself
+        (rotations and reflections; 8 for square boards, 4 otherwise)
+
+        Permutation p reads transformed cell i from original cell p[i].
+        """
+        rows, cols = self.rows, self.cols
+        transforms = [
+            lambda r, c: (r, c),
+            lambda r, c: (rows - 1 - r, cols - 1 - c),
+            lambda r, c: (r, cols - 1 - c),
+            lambda r, c: (rows - 1 - r, c)
+        ]
+        if rows == cols:
+            transforms += [
+                lambda r, c: (c, r),
+                lambda r, c: (cols - 1 - c, rows - 1 - r),
+                lambda r, c: (c, rows - 1 - r),
+                lambda r, c: (cols - 1 - c, r)
+            ]
+
+        symmetries = []
+        for transform in transforms:
+            permutation = [0] * self.size
+            for position in range(self.size):
+                r, c = transform(*divmod(position, cols))
+                permutation[r * cols + c] = position
+            symmetries.append(permutation)
+        return symmetries
+
+    def canonicalize(self, board: str) -> Tuple[str, List[int]]:
+        """
+        Get the canonical form of a board under rotations and reflections
+
+        Args:
+            board: Current board state
+
+        Returns:
+            Tuple of (canonical board, permutation); a cell i of the
+            canonical board is cell permutation[i] of the original board
+        """
+        best_board, best_permutation = board, self.symmetries[0]
+        for permutation in self.symmetries[1:]:
+            candidate = ''.join([board[i] for i in permutation])
+            if candidate < best_board:
+                best_board, best_permutation = candidate, permutation
+        return best_board, best_permutation
+
+    def encode_batch(self, boards: Sequence[str]) -> Any:
+        """
+        Encode board strings as an (N, cells) int8 array (see CELL_CODES)
+
+        Args:
+            boards: Board strings of this configuration
+
+        Returns:
+            NumPy array of cell codes
+        """
+        _require_numpy()
+        lookup = np.zeros(256, dtype=np.int8)
+        for symbol, code in CELL_CODES.items():
+            lookup[ord(symbol)] = code
+
+        raw = np.frombuffer(''.join(boards).encode('ascii'), dtype=np.uint8)
+        return lookup[raw].reshape(len(boards), self.size)
+
+    def evaluate_batch(self, cells: Any, chunk_size: int = BATCH_CHUNK_SIZE) -> BatchEvaluation:
+        """
+        Evaluate many boards at once against the line-index table
+
+        Every winning line is gathered for all boards with one fancy-index
+        operation and compared as a whole, so the cost per board is a few
+        vectorized passes instead of a Python loop over lines.
+
+        Args:
+            cells: (N, cells) integer array of cell codes (see encode_batch)
+            chunk_size: Boards per pass (bounds the (chunk, lines, k) temporary)
+
+        Returns:
+            BatchEvaluation with winners, results, legal moves and winning lines
+        """
+        _require_numpy()
+        cells = np.asarray(cells, dtype=np.int8).reshape(-1, self.size)
+        count = len(cells)
+        line_table = np.asarray(self.lines, dtype=np.int16).reshape(-1, self.win_length)
+
+        winners = np.zeros(count, dtype=np.int8)
+        winning_lines = np.full((count, self.win_length), -1, dtype=np.int16)
+
+        for start in range(0, count, chunk_size):
+            chunk = cells[start:start + chunk_size]
+            gathered = chunk[:, line_table]                       # (n, lines, k)
+            first = gathered[:, :, 0]
+            complete = (first != 0) & (gathered == first[:, :, None]).all(axis=2)
+
+            has_line = complete.any(axis=1)
+            line_index = complete.argmax(axis=1)
+            rows = np.nonzero(has_line)[0]
+
+            winners[start + rows] = first[rows, line_index[rows]]
+            winning_lines[start + rows] = line_table[line_index[rows]]
+
+        full = (cells != 0).all(axis=1)
+        results = np.where(
+            winners != 0, RESULT_CODES[GameResult.WIN],
+            np.where(full, RESULT_CODES[GameResult.DRAW], RESULT_CODES[GameResult.ONGOING])
+        ).astype(np.int8)
+        legal_moves = (cells == 0) & (winners == 0)[:, None]
+
+        return BatchEvaluation(winners, results, legal_moves, winning_lines)
+
+    def create_empty_board(self) -> str:
+        """Create an empty board"""
+        return EMPTY * self.size
+
+    def is_valid_move(self, board: str, position: int) -> bool:
+        """
+        Check if a move is valid
+
+        Args:
+            board: Current board state
+            position: Cell index to check
+
+        Returns:
+            True if move is valid, False otherwise
+        """
+        if position < 0 or position >= self.size:
+            return False
+
+        return board[position] == EMPTY
+
+    def make_move(self, board: str, position: int, symbol: str) -> str:
+        """
+        Make a move on the board
+
+        Args:
+            board: Current board state
+            position: Cell index to place symbol
+            symbol: Symbol to place ('X' or 'O')
+
+        Returns:
+            New board state
+        """
+        if not self.is_valid_move(board, position):
+            raise ValueError(f"Invalid move at position {position}")
+
+        return board[:position] + symbol + board[position + 1:]
+
+    def get_line_at(self, board: str, position: int) -> Optional[List[int]]:
+        """
+        Get the winning line through a cell, scanning only its four lines
+
+        Args:
+            board: Current board state
+            position: Last played cell
+
+        Returns:
+            Sorted winning positions or None
+        """
+        symbol = board[position]
+        if symbol == EMPTY:
+            return None
+
+        cols = self.cols
+        row, col = divmod(position, cols)
+
+        for dr, dc in DIRECTIONS:
+            line = [position]
+
+            r, c = row + dr, col + dc
+            while 0 <= r < self.rows and 0 <= c < cols and board[r * cols + c] == symbol:
+                line.append(r * cols + c)
+                r, c = r + dr, c + dc
+
+            r, c = row - dr, col - dc
+            while 0 <= r < self.rows and 0 <= c < cols and board[r * cols + c] == symbol:
+                line.append(r * cols + c)
+                r, c = r - dr, c - dc
+
+            if len(line) >= self.win_length:
+                return sorted(line)
+
+        return None
+
+    def check_winner(self, board: str, last_position: Optional[int] = None) -> Optional[str]:
+        """
+        Check if there's a winner
+
+        Args:
+            board: Current board state
+            last_position: Last played cell (enables the O(k) check)
+
+        Returns:
+            Winning symbol ('X' or 'O') or None
+        """
+        line = self.get_winning_line(board, last_position)
+        return board[line[0]] if line else None
+
+    def get_winning_line(self, board: str, last_position: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Get the winning line positions
+
+        Args:
+            board: Current board state
+            last_position: Last played cell (enables the O(k) check)
+
+        Returns:
+            List of winning positions or None
+        """
+        if last_position is not None:
+            return self.get_line_at(board, last_position)
+
+        for line in self.lines:
+            first = board[line[0]]
+            if first != EMPTY and all(board[i] == first for i in line):
+                return line
+
+        return None
+
+    def is_board_full(self, board: str) -> bool:
+        """Check if the board is full"""
+        return EMPTY not in board
+
+    def get_game_result(self, board: str, last_position: Optional[int] = None) -> GameResult:
+        """
+        Get the current game result
+
+        Args:
+            board: Current board state
+            last_position: Last played cell (enables the O(k) check)
+
+        Returns:
+            GameResult enum value
+        """
+        if self.get_winning_line(board, last_position):
+            return GameResult.WIN
+
+        if self.is_board_full(board):
+            return GameResult.DRAW
+
+        return GameResult.ONGOING
+
+    def get_available_moves(self, board: str) -> List[int]:
+        """Get list of available positions"""
+        return [i for i, cell in enumerate(board) if cell == EMPTY]
+
+    def board_to_matrix(self, board: str) -> List[List[str]]:
+        """Convert board string to a rows x cols matrix"""
+        return [list(board[row * self.cols:(row + 1) * self.cols]) for row in range(self.rows)]
+
+    def matrix_to_board(self, matrix: List[List[str]]) -> str:
+        """Convert a rows x cols matrix to board string"""
+        return ''.join([''.join(row) for row in matrix])
+
+
+@lru_cache(maxsize=None)
+def get_logic(rows: int = 3, cols: int = 3, win_length: int = 3) -> MNKLogic:
+    """
+    Get a shared logic instance for a board configuration
+
+    Args:
+        rows: Number of rows
+        cols: Number of columns
+        win_length: Symbols in a row needed to win
+
+    Returns:
+        MNKLogic instance
+    """
+    return MNKLogic(rows, cols, win_length)
+
+
+def get_variant_logic(variant: str) -> MNKLogic:
+    """
+    Get logic for a named board variant
+
+    Args:
+        variant: Variant name (see BOARD_VARIANTS)
+
+    Returns:
+        MNKLogic instance (UltimateLogic for 'ultimate')
+    """
+    if variant not in BOARD_VARIANTS:
+        raise ValueError(f"Unknown board variant: {variant}")
+    if variant == ULTIMATE_VARIANT:
+        from .ultimate import ULTIMATE
+        return ULTIMATE
+    return get_logic(*BOARD_VARIANTS[variant])
+
+
+def get_game_logic(variant: Optional[str], rows: Optional[int], cols: Optional[int], win_length: Optional[int]):
+    """
+    Get logic for a stored game row
+
+    Args:
+        variant: Stored variant name (None for rows created before variants were stored)
+        rows: Stored board rows
+        cols: Stored board columns
+        win_length: Stored win length
+
+    Returns:
+        Logic instance for the game
+    """
+    if variant == ULTIMATE_VARIANT:
+        return get_variant_logic(variant)
+    return get_logic(rows or 3, cols or 3, win_length or 3)
+
+
+CLASSIC = get_logic(3, 3, 3)
+
+
 class TicTacToeLogic:
     """
-    Tic-Tac-Toe game logic implementation
+    Tic-Tac-Toe game logic implementation (3x3 configuration of MNKLogic)
     Board positions: 0-8
     Board representation:
     0 | 1 | 2
@@ -24,25 +430,13 @@ class TicTacToeLogic:
     6 | 7 | 8
     """
 
-    # Winning combinations
-    WINNING_COMBINATIONS = [
-        # Rows
-        [0, 1, 2],
-        [3, 4, 5],
-        [6, 7, 8],
-        # Columns
-        [0, 3, 6],
-        [1, 4, 7],
-        [2, 5, 8],
-        # Diagonals
-        [0, 4, 8],
-        [2, 4, 6]
-    ]
+    # Winning combinations (rows, columns, diagonals)
+    WINNING_COMBINATIONS = CLASSIC.lines
 
     @staticmethod
     def create_empty_board() -> str:
         """Create an empty board"""
-        return "---------"
+        return CLASSIC.create_empty_board()
 
     @staticmethod
     def is_valid_move(board: str, position: int) -> bool:
@@ -56,10 +450,7 @@ class TicTacToeLogic:
         Returns:
             True if move is valid, False otherwise
         """
-        if position < 0 or position > 8:
-            return False
-
-        return board[position] == '-'
+        return CLASSIC.is_valid_move(board, position)
 
     @staticmethod
     def make_move(board: str, position: int, symbol: str) -> str:
@@ -74,12 +465,7 @@ class TicTacToeLogic:
         Returns:
             New board state
         """
-        if not TicTacToeLogic.is_valid_move(board, position):
-            raise ValueError(f"Invalid move at position {position}")
-
-        board_list = list(board)
-        board_list[position] = symbol
-        return ''.join(board_list)
+        return CLASSIC.make_move(board, position, symbol)
 
     @staticmethod
     def check_winner(board: str) -> Optional[str]:
@@ -92,14 +478,7 @@ class TicTacToeLogic:
         Returns:
             Winning symbol ('X' or 'O') or None
         """
-        for combination in TicTacToeLogic.WINNING_COMBINATIONS:
-            symbols = [board[i] for i in combination]
-
-            # Check if all three positions have the same symbol and it's not empty
-            if symbols[0] != '-' and symbols[0] == symbols[1] == symbols[2]:
-                return symbols[0]
-
-        return None
+        return CLASSIC.check_winner(board)
 
     @staticmethod
     def is_board_full(board: str) -> bool:
@@ -112,7 +491,7 @@ class TicTacToeLogic:
         Returns:
             True if board is full, False otherwise
         """
-        return '-' not in board
+        return CLASSIC.is_board_full(board)
 
     @staticmethod
     def get_game_result(board: str) -> GameResult:
@@ -125,15 +504,7 @@ class TicTacToeLogic:
         Returns:
             GameResult enum value
         """
-        winner = TicTacToeLogic.check_winner(board)
-
-        if winner:
-            return GameResult.WIN
-
-        if TicTacToeLogic.is_board_full(board):
-            return GameResult.DRAW
-
-        return GameResult.ONGOING
+        return CLASSIC.get_game_result(board)
 
     @staticmethod
     def get_available_moves(board: str) -> List[int]:
@@ -146,7 +517,7 @@ class TicTacToeLogic:
         Returns:
             List of available positions
         """
-        return [i for i, cell in enumerate(board) if cell == '-']
+        return CLASSIC.get_available_moves(board)
 
     @staticmethod
     def get_winning_line(board: str) -> Optional[List[int]]:
@@ -159,13 +530,20 @@ class TicTacToeLogic:
         Returns:
             List of winning positions or None
         """
-        for combination in TicTacToeLogic.WINNING_COMBINATIONS:
-            symbols = [board[i] for i in combination]
+        return CLASSIC.get_winning_line(board)
 
-            if symbols[0] != '-' and symbols[0] == symbols[1] == symbols[2]:
-                return combination
+    @staticmethod
+    def evaluate_batch(cells: Any) -> BatchEvaluation:
+        """
+        Evaluate many boards at once (requires numpy)
 
-        return None
+        Args:
+            cells: (N, 9) int8 array of cell codes
+
+        Returns:
+            BatchEvaluation with winners, results, legal moves and winning lines
+        """
+        return CLASSIC.evaluate_batch(cells)
 
     @staticmethod
     def get_opponent_symbol(symbol: str) -> str:
@@ -191,11 +569,7 @@ class TicTacToeLogic:
         Returns:
             3x3 matrix representation
         """
-        return [
-            [board[0], board[1], board[2]],
-            [board[3], board[4], board[5]],
-            [board[6], board[7], board[8]]
-        ]
+        return CLASSIC.board_to_matrix(board)
 
     @staticmethod
     def matrix_to_board(matrix: List[List[str]]) -> str:
@@ -208,4 +582,4 @@ class TicTacToeLogic:
         Returns:
             Board string
         """
-        return ''.join([''.join(row) for row in matrix])
+        return CLASSIC.matrix_to_board(matrix)
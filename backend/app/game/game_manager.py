@@ -2,15 +2,22 @@
 Game Manager - Event-bus pattern for managing multiple games
 """
 from typing import Dict, Optional, List
+from collections import deque
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 import asyncio
 import logging
 
-from app.models import Game, User, Move, UserStats, Invitation
-from .game_logic import TicTacToeLogic, GameResult
+from app.config import settings
+from app.models import Game, User, Move, UserStats, Invitation, BotGameStats, HeadToHead
+from app.utils.user_search import user_index
+from .game_logic import GameResult, get_variant_logic, get_game_logic
 from .bot_ai import BotAI
+from .bot_scheduler import bot_scheduler
+from .move_codec import encode_positions, encode_times, decode_positions, decode_times
+from .move_history import load_game_moves, move_offset_ms
+from .rating import get_rating_engine, game_score, rating_period, idle_periods, RatingState
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +32,7 @@ class GameManager:
         """Initialize Game Manager"""
         self.active_games: Dict[int, Dict] = {}  # game_id -> game_data
         self.user_to_game: Dict[int, int] = {}  # user_id -> game_id
+        self.rating_engine = get_rating_engine()
         self._lock = asyncio.Lock()
 
     async def create_game(
@@ -33,7 +41,8 @@ class GameManager:
         player2_id: Optional[int],
         is_bot_game: bool,
         bot_difficulty: Optional[str],
-        db: AsyncSession
+        db: AsyncSession,
+        variant: str = 'classic'
     ) -> Game:
         """
         Create a new game
@@ -44,10 +53,14 @@ class GameManager:
             is_bot_game: True if playing against bot
             bot_difficulty: Bot difficulty if applicable
             db: Database session
+            variant: Board variant name ('classic', 'gomoku', 'ultimate')
 
         Returns:
             Created game object
         """
+        logic = get_variant_logic(variant)
+        bot_ai = BotAI(bot_difficulty, 'O', logic, trace=settings.BOT_TRACE_DECISIONS) if is_bot_game else None
+
         async with self._lock:
             # Create game in database
             game = Game(
@@ -55,8 +68,13 @@ class GameManager:
                 player2_id=player2_id,
                 is_bot_game=is_bot_game,
                 bot_difficulty=bot_difficulty,
+                bot_seed=bot_ai.seed if bot_ai else None,
                 status='active',
-                board_state=TicTacToeLogic.create_empty_board(),
+                board_state=logic.create_empty_board(),
+                variant=variant,
+                board_rows=logic.rows,
+                board_cols=logic.cols,
+                win_length=logic.win_length,
                 current_turn=player1_id,
                 started_at=datetime.utcnow()
             )
@@ -73,9 +91,15 @@ class GameManager:
                 'is_bot_game': is_bot_game,
                 'bot_difficulty': bot_difficulty,
                 'board': game.board_state,
+                'logic': logic,
+                'variant': variant,
                 'current_turn': player1_id,
                 'move_count': 0,
-                'bot_ai': BotAI(bot_difficulty, 'O') if is_bot_game else None
+                'move_log': deque(maxlen=settings.MOVE_LOG_SIZE),
+                'packed_moves': settings.MOVE_STORAGE == 'packed',
+                'positions': [],
+                'move_times': [],
+                'bot_ai': bot_ai
             }
 
             # Track which users are in which games
@@ -120,30 +144,53 @@ class GameManager:
 
             # Validate move
             board = game_data['board']
-            if not TicTacToeLogic.is_valid_move(board, position):
+            logic = game_data['logic']
+            if not logic.is_valid_move(board, position):
                 raise ValueError("Invalid move")
 
             # Determine player symbol
             symbol = 'X' if player_id == game_data['player1_id'] else 'O'
 
             # Make the move
-            new_board = TicTacToeLogic.make_move(board, position, symbol)
+            new_board = logic.make_move(board, position, symbol)
             game_data['board'] = new_board
             game_data['move_count'] += 1
 
-            # Save move to database
-            move = Move(
-                game_id=game_id,
-                player_id=player_id,
-                position=position,
-                symbol=symbol,
-                board_state_after=new_board,
-                move_number=game_data['move_count']
-            )
-            db.add(move)
-
-            # Check game result
-            result = TicTacToeLogic.get_game_result(new_board)
+            # Save move to database: packed games rewrite their move blobs
+            # with the game row update below, others get a Move row
+            game_values = {}
+            if game_data['packed_moves']:
+                game_data['positions'].append(position)
+                game_data['move_times'].append(
+                    move_offset_ms(game_data['game'].started_at, datetime.utcnow())
+                )
+                game_values['move_positions'] = encode_positions(game_data['positions'], logic.size)
+                game_values['move_times'] = encode_times(game_data['move_times'])
+            else:
+                move = Move(
+                    game_id=game_id,
+                    player_id=player_id,
+                    position=position,
+                    symbol=symbol,
+                    board_state_after=new_board,
+                    move_number=game_data['move_count']
+                )
+                db.add(move)
+            game_data['move_log'].append({
+                'move_number': game_data['move_count'],
+                'position': position,
+                'player_id': player_id,
+                'symbol': symbol
+            })
+
+            # Check game result (only the lines through the new symbol)
+            winning_line = logic.get_winning_line(new_board, position)
+            if winning_line:
+                result = GameResult.WIN
+            elif logic.is_board_full(new_board):
+                result = GameResult.DRAW
+            else:
+                result = GameResult.ONGOING
             winner_id = None
             game_over = False
 
@@ -168,7 +215,8 @@ class GameManager:
                 .where(Game.id == game_id)
                 .values(
                     board_state=new_board,
-                    current_turn=game_data['current_turn']
+                    current_turn=game_data['current_turn'],
+                    **game_values
                 )
             )
 
@@ -180,10 +228,12 @@ class GameManager:
                 'success': True,
                 'board': new_board,
                 'current_turn': game_data['current_turn'],
+                'move_number': game_data['move_count'],
+                'symbol': symbol,
                 'game_over': game_over,
                 'result': result.value if game_over else None,
                 'winner_id': winner_id,
-                'winning_line': TicTacToeLogic.get_winning_line(new_board) if game_over and result == GameResult.WIN else None
+                'winning_line': winning_line
             }
 
     async def make_bot_move(self, game_id: int, db: AsyncSession) -> Dict:
@@ -212,9 +262,13 @@ class GameManager:
             raise ValueError("Bot AI not initialized")
 
         # Get bot's best move
+        # Batched with other games' bot turns and resolved off the event loop
         board = game_data['board']
-        position = game_data['bot_ai'].get_best_move(board)
+        bot = game_data['bot_ai']
+        position = await bot_scheduler.request_move(bot, board)
         logger.info(f"Bot selected position: {position}")
+        if bot.trace:
+            logger.info(f"Bot decision in game {game_id} (seed {bot.seed}): {bot.trace[-1]}")
 
         # Bot is always player 2 (we use ID 0 for bot)
         bot_player_id = game_data['player2_id']
@@ -293,6 +347,8 @@ class GameManager:
 
         game_data = self.active_games[game_id]
 
+        finished_at = datetime.utcnow()
+
         # Update game in database
         await db.execute(
             update(Game)
@@ -301,7 +357,7 @@ class GameManager:
                 status='finished',
                 winner_id=winner_id,
                 result=result,
-                finished_at=datetime.utcnow(),
+                finished_at=finished_at,
                 abandon_by=abandon_by
             )
         )
@@ -311,7 +367,10 @@ class GameManager:
         player2_id = game_data['player2_id']
 
         if player2_id:  # Not a bot game or bot has ID
-            await self._update_player_stats(player1_id, player2_id, winner_id, result, db)
+            await self._update_player_stats(player1_id, player2_id, winner_id, result, finished_at, db)
+            await self._update_head_to_head(game_id, player1_id, player2_id, winner_id, result, db)
+        elif game_data['is_bot_game']:
+            await self._update_bot_game_stats(player1_id, game_data['bot_difficulty'], winner_id, result, db)
 
         await db.commit()
 
@@ -330,6 +389,7 @@ class GameManager:
         player2_id: int,
         winner_id: Optional[int],
         result: str,
+        finished_at: datetime,
         db: AsyncSession
     ) -> None:
         """
@@ -340,9 +400,11 @@ class GameManager:
             player2_id: Player 2 ID
             winner_id: Winner ID (None for draw)
             result: Game result
+            finished_at: Game finish time (picks the rating period)
             db: Database session
         """
         # Get or create stats for both players
+        player_stats = {}
         for player_id in [player1_id, player2_id]:
             result_obj = await db.execute(
                 select(UserStats).where(UserStats.user_id == player_id)
@@ -354,8 +416,14 @@ class GameManager:
                 db.add(stats)
                 await db.flush()
 
+            player_stats[player_id] = stats
+
+        for player_id, stats in player_stats.items():
             # Update stats
             stats.total_games += 1
+            stats.recent_form = (
+                (stats.recent_form or '') + self._form_letter(player_id, winner_id, result)
+            )[-settings.STATS_RECENT_FORM_SIZE:]
 
             if result == 'draw':
                 stats.draws += 1
@@ -373,11 +441,137 @@ class GameManager:
                     stats.wins += 1
                     stats.win_streak += 1
                     stats.best_win_streak = max(stats.best_win_streak, stats.win_streak)
-                    stats.ranking_points += 25
                 else:
                     stats.losses += 1
                     stats.win_streak = 0
-                    stats.ranking_points = max(0, stats.ranking_points - 15)
+
+        # Update ratings from the pre-game ratings of both players,
+        # the same way recompute_ratings replays them
+        score = game_score(player1_id, winner_id, result)
+        if score is not None:
+            stats1 = player_stats[player1_id]
+            stats2 = player_stats[player2_id]
+            period = rating_period(finished_at)
+            new_state1, new_state2 = self.rating_engine.rate_game(
+                self._rating_state(stats1), self._rating_state(stats2), score,
+                idle_periods(stats1.last_rated_period, period),
+                idle_periods(stats2.last_rated_period, period)
+            )
+            for stats, state in ((stats1, new_state1), (stats2, new_state2)):
+                stats.ranking_points = int(round(state[0]))
+                stats.rating_deviation = state[1]
+                stats.rating_volatility = state[2]
+                stats.last_rated_period = period
+                user_index.set_rating(stats.user_id, stats.ranking_points)
+
+    @staticmethod
+    def _form_letter(player_id: int, winner_id: Optional[int], result: str) -> str:
+        """Result of a game for one player: 'W', 'L' or 'D' (abandoning is a loss)"""
+        if result == 'draw':
+            return 'D'
+        return 'W' if player_id == winner_id else 'L'
+
+    async def _update_bot_game_stats(
+        self,
+        player_id: int,
+        difficulty: Optional[str],
+        winner_id: Optional[int],
+        result: str,
+        db: AsyncSession
+    ) -> None:
+        """
+        Update a player's bot-game statistics
+
+        Args:
+            player_id: Human player ID
+            difficulty: Bot difficulty
+            winner_id: Winner ID (None for draw, 0 for the bot)
+            result: Game result
+            db: Database session
+        """
+        stats = (await db.execute(
+            select(UserStats).where(UserStats.user_id == player_id)
+        )).scalar_one_or_none()
+        if not stats:
+            stats = UserStats(user_id=player_id, games_vs_bot=0)
+            db.add(stats)
+        stats.games_vs_bot = (stats.games_vs_bot or 0) + 1
+
+        difficulty = difficulty or 'medium'
+        bot_stats = await db.get(BotGameStats, (player_id, difficulty))
+        if not bot_stats:
+            bot_stats = BotGameStats(
+                user_id=player_id, difficulty=difficulty,
+                games=0, wins=0, losses=0, draws=0, abandoned=0
+            )
+            db.add(bot_stats)
+
+        bot_stats.games += 1
+        bot_stats.last_played_at = datetime.utcnow()
+        if result == 'draw':
+            bot_stats.draws += 1
+        elif player_id == winner_id:
+            bot_stats.wins += 1
+        elif result == 'abandoned':
+            bot_stats.abandoned += 1
+        else:
+            bot_stats.losses += 1
+
+    async def _update_head_to_head(
+        self,
+        game_id: int,
+        player1_id: int,
+        player2_id: int,
+        winner_id: Optional[int],
+        result: str,
+        db: AsyncSession
+    ) -> None:
+        """
+        Update the head-to-head record of two players
+
+        Args:
+            game_id: Game ID
+            player1_id: Player 1 ID
+            player2_id: Player 2 ID
+            winner_id: Winner ID (None for draw)
+            result: Game result
+            db: Database session
+        """
+        low_id, high_id = sorted((player1_id, player2_id))
+        record = await db.get(HeadToHead, (low_id, high_id))
+        if not record:
+            record = HeadToHead(
+                user_low_id=low_id, user_high_id=high_id,
+                games=0, low_wins=0, high_wins=0, draws=0
+            )
+            db.add(record)
+
+        record.games += 1
+        record.last_game_id = game_id
+        record.last_played_at = datetime.utcnow()
+        if result == 'draw':
+            record.draws += 1
+        elif winner_id == low_id:
+            record.low_wins += 1
+        elif winner_id == high_id:
+            record.high_wins += 1
+
+    def _rating_state(self, stats: UserStats) -> RatingState:
+        """
+        Get rating state tuple from user stats
+
+        Args:
+            stats: User statistics
+
+        Returns:
+            (rating, rating deviation, volatility)
+        """
+        initial = self.rating_engine.initial_state()
+        return (
+            stats.ranking_points if stats.ranking_points is not None else initial[0],
+            stats.rating_deviation if stats.rating_deviation is not None else initial[1],
+            stats.rating_volatility if stats.rating_volatility is not None else initial[2]
+        )
 
     async def get_game_state(self, game_id: int) -> Optional[Dict]:
         """
@@ -400,9 +594,100 @@ class GameManager:
             'player1_id': game_data['player1_id'],
             'player2_id': game_data['player2_id'],
             'is_bot_game': game_data['is_bot_game'],
+            'variant': game_data['variant'],
+            'board_rows': game_data['logic'].rows,
+            'board_cols': game_data['logic'].cols,
+            'win_length': game_data['logic'].win_length,
             'move_count': game_data['move_count']
         }
 
+    async def restore_game(self, game: Game) -> None:
+        """
+        Load an active game from the database back into memory
+
+        Args:
+            game: Game object with status 'active'
+        """
+        logic = get_game_logic(game.variant, game.board_rows, game.board_cols, game.win_length)
+        player2_id = game.player2_id if game.player2_id else 0  # Use 0 for bot
+        move_count = len([c for c in game.board_state[:logic.size] if c != '-'])
+
+        # Games keep the storage they started with; only untouched games
+        # switch to packed storage
+        packed_moves = game.move_positions is not None or (
+            move_count == 0 and settings.MOVE_STORAGE == 'packed'
+        )
+
+        async with self._lock:
+            self.active_games[game.id] = {
+                'game': game,
+                'player1_id': game.player1_id,
+                'player2_id': player2_id,
+                'is_bot_game': game.is_bot_game,
+                'bot_difficulty': game.bot_difficulty,
+                'board': game.board_state,
+                'logic': logic,
+                'variant': game.variant or 'classic',
+                'current_turn': game.current_turn,
+                'move_count': move_count,
+                'move_log': deque(maxlen=settings.MOVE_LOG_SIZE),
+                'packed_moves': packed_moves,
+                'positions': decode_positions(game.move_positions),
+                'move_times': decode_times(game.move_times),
+                'bot_ai': BotAI(
+                    game.bot_difficulty, 'O', logic,
+                    seed=game.bot_seed,
+                    trace=settings.BOT_TRACE_DECISIONS
+                ) if game.is_bot_game else None
+            }
+
+            # Track which users are in which games
+            self.user_to_game[game.player1_id] = game.id
+            if game.player2_id:
+                self.user_to_game[game.player2_id] = game.id
+
+    async def get_moves_since(
+        self,
+        game_id: int,
+        last_seq: int,
+        db: AsyncSession
+    ) -> List[Dict]:
+        """
+        Get moves played after a sequence number (for reconnect/resume)
+
+        Served from the in-memory move log when it still covers the gap,
+        otherwise read from the game's stored move history
+
+        Args:
+            game_id: Game ID
+            last_seq: Last move number the client has seen
+            db: Database session
+
+        Returns:
+            List of moves ordered by move number
+        """
+        game_data = self.active_games.get(game_id)
+        if game_data is not None:
+            move_log = game_data.get('move_log')
+            if game_data['move_count'] <= last_seq:
+                return []
+            if move_log and move_log[0]['move_number'] <= last_seq + 1:
+                return [move for move in move_log if move['move_number'] > last_seq]
+
+        game = await db.get(Game, game_id)
+        if game is None:
+            return []
+
+        return [
+            {
+                'move_number': move['move_number'],
+                'position': move['position'],
+                'player_id': move['player_id'],
+                'symbol': move['symbol']
+            }
+            for move in await load_game_moves(db, game, after=last_seq)
+        ]
+
     async def get_user_active_game(self, user_id: int) -> Optional[int]:
         """
         Get active game ID for a user
@@ -0,0 +1,291 @@
+"""
+Matchmaking - rating-bucketed quick-play queue
+"""
+from typing import Dict, List, Optional, Tuple, Callable, Awaitable
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MatchHandler = Callable[[Dict, Dict], Awaitable[None]]
+
+
+class MatchmakingQueue:
+    """
+    Quick-play queue that pairs waiting players by ranking points
+
+    Waiting players are kept in rating buckets (bucket_width points wide,
+    then by exact rating), so enqueueing and leaving are O(1) and the
+    closest-rated opponent is found by looking only at the buckets inside
+    the rating window. The acceptable rating difference starts at
+    base_window and grows with the time a player has been waiting; a pair
+    is accepted when it is within either player's window.
+
+    Pairing runs in periodic batches, oldest searcher first, and visits
+    only players whose window is still growing or who just joined. A
+    player at max_window who found no opponent is not searched again; a
+    newcomer within range finds them instead.
+    """
+
+    def __init__(
+        self,
+        base_window: int = 50,
+        window_growth: float = 10.0,
+        max_window: int = 400,
+        interval: float = 1.0,
+        bucket_width: int = 25
+    ):
+        """
+        Initialize matchmaking queue
+
+        Args:
+            base_window: Rating difference accepted immediately
+            window_growth: Extra rating difference accepted per second waited
+            max_window: Upper bound for the rating window
+            interval: Seconds between pairing batches
+            bucket_width: Rating points per bucket
+        """
+        self.base_window = base_window
+        self.window_growth = window_growth
+        self.max_window = max_window
+        self.interval = interval
+        self.bucket_width = max(1, bucket_width)
+
+        # rating // bucket_width -> rating -> user_id -> entry
+        self._buckets: Dict[int, Dict[int, Dict[int, Dict]]] = {}
+        self._entries: Dict[int, Dict] = {}  # user_id -> entry
+        self._searching: Dict[int, Dict] = {}  # entries still searched each batch, oldest first
+        self._on_match: Optional[MatchHandler] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, user_id: int, rating: int, enqueued_at: Optional[float] = None) -> bool:
+        """
+        Add a player to the queue
+
+        Args:
+            user_id: User ID
+            rating: Player ranking points
+            enqueued_at: Original enqueue time (used when re-queueing)
+
+        Returns:
+            True if added, False if the player was already queued
+        """
+        if user_id in self._entries:
+            return False
+
+        entry = {
+            'user_id': user_id,
+            'rating': rating,
+            'enqueued_at': enqueued_at if enqueued_at is not None else time.monotonic()
+        }
+        self._entries[user_id] = entry
+        self._searching[user_id] = entry
+        bucket = self._buckets.setdefault(rating // self.bucket_width, {})
+        bucket.setdefault(rating, {})[user_id] = entry
+        self._update_depth()
+        return True
+
+    def dequeue(self, user_id: int) -> bool:
+        """
+        Remove a player from the queue
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            True if the player was queued
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+
+        self._remove(entry)
+        self._update_depth()
+        return True
+
+    def is_queued(self, user_id: int) -> bool:
+        """Check if a player is waiting for a match"""
+        return user_id in self._entries
+
+    def get_queue_depth(self) -> int:
+        """Get number of waiting players"""
+        return len(self._entries)
+
+    def get_window(self, entry: Dict, now: float) -> float:
+        """
+        Get the acceptable rating difference for a waiting player
+
+        Args:
+            entry: Queue entry
+            now: Current monotonic time
+
+        Returns:
+            Maximum rating difference accepted
+        """
+        waited = now - entry['enqueued_at']
+        return min(self.max_window, self.base_window + self.window_growth * waited)
+
+    def find_pairs(self, now: Optional[float] = None) -> List[Tuple[Dict, Dict]]:
+        """
+        Pair waiting players and remove them from the queue
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            List of (entry1, entry2) pairs, longest waiter first
+        """
+        if now is None:
+            now = time.monotonic()
+
+        pairs = []
+        for user_id in list(self._searching):
+            entry = self._searching.get(user_id)
+            if entry is None:
+                continue  # Already matched in this batch
+
+            window = self.get_window(entry, now)
+            opponent = self._nearest_opponent(entry, self.max_window)
+            if opponent is None or abs(opponent['rating'] - entry['rating']) > max(
+                window, self.get_window(opponent, now)
+            ):
+                if window >= self.max_window:
+                    del self._searching[user_id]  # Newcomers in range will find this player
+                continue
+
+            for matched in (entry, opponent):
+                self._remove(matched)
+                metrics.observe('matchmaking.time_to_match_seconds', now - matched['enqueued_at'])
+
+            pairs.append((entry, opponent))
+
+        if pairs:
+            metrics.increment('matchmaking.matches', len(pairs))
+        self._update_depth()
+        return pairs
+
+    def set_match_handler(self, handler: MatchHandler) -> None:
+        """
+        Set the coroutine called for every matched pair
+
+        Args:
+            handler: async handler(entry1, entry2)
+        """
+        self._on_match = handler
+
+    async def run_batch(self) -> int:
+        """
+        Run one pairing batch and dispatch matches
+
+        Returns:
+            Number of pairs dispatched
+        """
+        pairs = self.find_pairs()
+
+        for entry1, entry2 in pairs:
+            if not self._on_match:
+                logger.warning("Match found but no match handler registered")
+                break
+            try:
+                await self._on_match(entry1, entry2)
+            except Exception as e:
+                logger.error(f"Error starting matched game {entry1['user_id']} vs {entry2['user_id']}: {str(e)}")
+
+        return len(pairs)
+
+    def start(self) -> None:
+        """Start the periodic pairing task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Matchmaking started")
+
+    async def stop(self) -> None:
+        """Stop the periodic pairing task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Pairing loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_batch()
+            except Exception as e:
+                logger.error(f"Matchmaking batch failed: {str(e)}")
+
+    def _nearest_opponent(self, entry: Dict, window: float) -> Optional[Dict]:
+        """
+        Find the closest-rated other player within a rating window
+
+        Buckets are visited outwards from the player's own; the search stops
+        once no bucket further out can hold anyone closer.
+
+        Args:
+            entry: Queue entry
+            window: Maximum rating difference
+
+        Returns:
+            Opponent entry or None if nobody is in range
+        """
+        rating = entry['rating']
+        home = rating // self.bucket_width
+        best = None
+        best_diff = None
+
+        for offset in range(int(window) // self.bucket_width + 2):
+            for index in {home - offset, home + offset}:
+                for bucket_rating, players in self._buckets.get(index, {}).items():
+                    diff = abs(bucket_rating - rating)
+                    if diff > window or (best_diff is not None and diff >= best_diff):
+                        continue
+                    for user_id, other in players.items():
+                        if user_id != entry['user_id']:
+                            best, best_diff = other, diff
+                            break
+
+            # Buckets further out are at least offset * bucket_width + 1 away
+            if best_diff is not None and best_diff <= offset * self.bucket_width:
+                break
+
+        return best
+
+    def _remove(self, entry: Dict) -> None:
+        """Remove an entry from the queue and its rating bucket"""
+        user_id = entry['user_id']
+        self._entries.pop(user_id, None)
+        self._searching.pop(user_id, None)
+
+        index = entry['rating'] // self.bucket_width
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            return
+        players = bucket.get(entry['rating'])
+        if players is not None:
+            players.pop(user_id, None)
+            if not players:
+                del bucket[entry['rating']]
+        if not bucket:
+            del self._buckets[index]
+
+    def _update_depth(self) -> None:
+        """Publish queue depth gauge"""
+        metrics.set_gauge('matchmaking.queue_depth', len(self._entries))
+
+
+# Global matchmaking queue instance
+matchmaker = MatchmakingQueue(
+    base_window=settings.MATCHMAKING_BASE_WINDOW,
+    window_growth=settings.MATCHMAKING_WINDOW_GROWTH,
+    max_window=settings.MATCHMAKING_MAX_WINDOW,
+    interval=settings.MATCHMAKING_INTERVAL_SECONDS,
+    bucket_width=settings.MATCHMAKING_BUCKET_WIDTH
+)
@@ -0,0 +1,404 @@
+"""
+Monte Carlo Tree Search (UCT) bot engine for large boards
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import math
+import random
+import time
+
+from .game_logic import MNKLogic, DIRECTIONS, get_logic
+
+# Compact cell encoding used by the search
+EMPTY_CELL = 0
+SYMBOL_TO_PLAYER = {'X': 1, 'O': 2}
+PLAYER_TO_SYMBOL = {1: 'X', 2: 'O'}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+class _Node:
+    """Search tree node; stats are from the view of the player who moved into it"""
+
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins', 'result')
+
+    def __init__(self, move: Optional[int], parent: Optional['_Node'], player: int, untried: List[int]):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children: Dict[int, '_Node'] = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.result: Optional[int] = None  # winner (1/2), 0 for draw, None if not terminal
+
+
+class MCTSEngine:
+    """
+    UCT search over a compact bytearray board
+
+    Anytime search: runs random playouts until the playout budget or the
+    wall-clock limit is reached, whichever comes first. An immediate win or
+    forced block is played without searching, and the tree only expands
+    that move wherever one exists. With reuse_tree the subtree of the
+    position reached after the bot's move and the opponent's reply is kept
+    and reused on the next call for the same game.
+
+    A search given exact per-worker playout budgets ignores the clock and
+    starts from a fresh tree, so with the same seed it repeats a recorded
+    search exactly.
+    """
+
+    def __init__(
+        self,
+        logic: MNKLogic,
+        playouts: int = 1000,
+        time_limit: float = 1.0,
+        exploration: float = 1.41,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        reuse_tree: bool = True
+    ):
+        """
+        Initialize MCTS engine
+
+        Args:
+            logic: Board configuration
+            playouts: Maximum playouts per move
+            time_limit: Maximum seconds per move
+            exploration: UCT exploration constant
+            workers: Processes for root-parallel search (1 = in-process with tree reuse)
+            seed: Random seed
+            reuse_tree: Keep the search tree between moves (in-process search only)
+        """
+        self.logic = logic
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.workers = workers
+        self.reuse_tree = reuse_tree
+        self.rng = random.Random(seed)
+        self.rays = self._build_rays()
+
+        self._root: Optional[_Node] = None
+        self._root_cells: Optional[bytearray] = None
+        self.last_playouts = 0
+        self.last_worker_playouts: List[int] = []  # playouts run by each worker in the last search
+
+    def _build_rays(self) -> List[List[Tuple[List[int], List[int]]]]:
+        """Precompute, per cell and direction, the cells within k-1 steps each way"""
+        rows, cols, reach = self.logic.rows, self.logic.cols, self.logic.win_length - 1
+        rays = []
+        for position in range(self.logic.size):
+            row, col = divmod(position, cols)
+            cell_rays = []
+            for dr, dc in DIRECTIONS:
+                forward, backward = [], []
+                for step in range(1, reach + 1):
+                    r, c = row + dr * step, col + dc * step
+                    if 0 <= r < rows and 0 <= c < cols:
+                        forward.append(r * cols + c)
+                    r, c = row - dr * step, col - dc * step
+                    if 0 <= r < rows and 0 <= c < cols:
+                        backward.append(r * cols + c)
+                cell_rays.append((forward, backward))
+            rays.append(cell_rays)
+        return rays
+
+    def _wins_at(self, cells: bytearray, position: int, player: int) -> bool:
+        """Check if the symbol just placed at position completes k in a row"""
+        needed = self.logic.win_length - 1
+        for forward, backward in self.rays[position]:
+            count = 0
+            for cell in forward:
+                if cells[cell] != player:
+                    break
+                count += 1
+            for cell in backward:
+                if cells[cell] != player:
+                    break
+                count += 1
+            if count >= needed:
+                return True
+        return False
+
+    def _forced_move(self, cells: bytearray, player: int, empties: List[int]) -> Optional[int]:
+        """
+        Find a move the player cannot pass up: an immediate win, else a block
+
+        Args:
+            cells: Current board (restored before returning)
+            player: Player to move
+            empties: Empty cells to try, in order
+
+        Returns:
+            Winning cell, else a cell where the opponent would win, else None
+        """
+        for side in (player, 3 - player):
+            for position in empties:
+                cells[position] = side
+                wins = self._wins_at(cells, position, side)
+                cells[position] = EMPTY_CELL
+                if wins:
+                    return position
+        return None
+
+    def _line_cells(self, cells: bytearray, position: int) -> List[int]:
+        """Get the empty cells within k-1 steps of position in every direction"""
+        return [
+            cell
+            for forward, backward in self.rays[position]
+            for ray in (forward, backward)
+            for cell in ray
+            if cells[cell] == EMPTY_CELL
+        ]
+
+    def _empty_cells(self, cells: bytearray) -> List[int]:
+        """Get empty cell indices"""
+        return [i for i, cell in enumerate(cells) if cell == EMPTY_CELL]
+
+    def to_cells(self, board: str) -> bytearray:
+        """Convert a board string to the compact cell array"""
+        return bytearray(SYMBOL_TO_PLAYER.get(cell, EMPTY_CELL) for cell in board)
+
+    def _playout(self, cells: bytearray, player: int) -> int:
+        """
+        Play random moves to the end of the game
+
+        Args:
+            cells: Working board (modified in place)
+            player: Player to move
+
+        Returns:
+            Winner (1/2) or 0 for a draw
+        """
+        empties = self._empty_cells(cells)
+        self.rng.shuffle(empties)
+        for position in empties:
+            cells[position] = player
+            if self._wins_at(cells, position, player):
+                return player
+            player = 3 - player
+        return 0
+
+    def _select(self, node: _Node) -> _Node:
+        """Pick the child with the highest UCT score"""
+        log_visits = math.log(node.visits)
+        best_score = -1.0
+        best_child = None
+        for child in node.children.values():
+            score = child.wins / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _iterate(self, root: _Node, root_cells: bytearray) -> None:
+        """Run one selection / expansion / playout / backpropagation cycle"""
+        node = root
+        cells = bytearray(root_cells)
+
+        # Selection
+        while not node.untried and node.children and node.result is None:
+            node = self._select(node)
+            cells[node.move] = node.player
+
+        # Expansion
+        if node.result is None and node.untried:
+            index = self.rng.randrange(len(node.untried))
+            node.untried[index], node.untried[-1] = node.untried[-1], node.untried[index]
+            move = node.untried.pop()
+            player = 3 - node.player
+            cells[move] = player
+            child = _Node(move, node, player, self._empty_cells(cells))
+            if self._wins_at(cells, move, player):
+                child.result = player
+            elif not child.untried:
+                child.result = 0
+            else:
+                # Only a win or a forced block is worth exploring when one exists.
+                # The root has neither, and every threat is answered as soon as it
+                # appears, so new ones can only lie on the lines of the last two moves
+                nearby = self._line_cells(cells, move)
+                if node.move is not None:
+                    nearby += self._line_cells(cells, node.move)
+                forced = self._forced_move(cells, 3 - player, nearby)
+                if forced is not None:
+                    child.untried = [forced]
+            node.children[move] = child
+            node = child
+
+        # Simulation
+        if node.result is not None:
+            winner = node.result
+        else:
+            winner = self._playout(cells, 3 - node.player)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1.0
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+
+    def _run(self, root: _Node, root_cells: bytearray, budget: int, time_limit: Optional[float]) -> int:
+        """Search until the playout budget or the time limit (None = no limit) is spent"""
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        playouts = 0
+        while playouts < budget:
+            # Checking the clock every few playouts keeps overhead low; the
+            # first check comes before any playout, so a spent limit runs none
+            if deadline is not None and playouts % 16 == 0 and time.monotonic() >= deadline:
+                break
+            self._iterate(root, root_cells)
+            playouts += 1
+        return playouts
+
+    def _reuse_root(self, cells: bytearray, player: int) -> Optional[_Node]:
+        """
+        Find the subtree for the current position in the previous tree
+
+        Args:
+            cells: Current board
+            player: Player to move
+
+        Returns:
+            Reusable node or None
+        """
+        if self._root is None or self._root_cells is None or len(self._root_cells) != len(cells):
+            return None
+
+        node = self._root
+        changed = [i for i in range(len(cells)) if cells[i] != self._root_cells[i]]
+        if any(self._root_cells[i] != EMPTY_CELL for i in changed):
+            return None  # Not a continuation of the previous position
+
+        # Walk down the tree through the new moves, alternating players
+        remaining = set(changed)
+        while remaining:
+            next_player = 3 - node.player
+            step = None
+            for position in remaining:
+                if cells[position] == next_player and position in node.children:
+                    step = position
+                    break
+            if step is None:
+                return None
+            node = node.children[step]
+            remaining.discard(step)
+
+        if 3 - node.player != player:
+            return None
+
+        node.parent = None
+        return node
+
+    def search(self, board: str, symbol: str, budgets: Optional[List[int]] = None) -> int:
+        """
+        Find the best move for a position
+
+        Args:
+            board: Current board state
+            symbol: Symbol to move
+            budgets: Exact playouts per worker, run without the clock and
+                without tree reuse (repeats a recorded search)
+
+        Returns:
+            Position to play
+        """
+        cells = self.to_cells(board)
+        player = SYMBOL_TO_PLAYER[symbol]
+
+        # Random playouts often miss a one-move win or block; never search those
+        forced = self._forced_move(cells, player, self._empty_cells(cells))
+        if forced is not None:
+            self.last_playouts = 0
+            self.last_worker_playouts = [0] * len(budgets or [0] * self.workers)
+            self._root = None
+            return forced
+
+        if self.workers > 1:
+            return self._search_parallel(cells, player, budgets)
+
+        root = None
+        if self.reuse_tree and budgets is None:
+            root = self._reuse_root(cells, player)
+        if root is None:
+            root = _Node(None, None, 3 - player, self._empty_cells(cells))
+
+        if budgets is None:
+            self.last_playouts = self._run(root, cells, self.playouts, self.time_limit)
+        else:
+            self.last_playouts = self._run(root, cells, budgets[0], None)
+        self.last_worker_playouts = [self.last_playouts]
+
+        if root.children:
+            best_move = max(root.children.values(), key=lambda child: child.visits).move
+        else:
+            best_move = self.rng.choice(root.untried)  # no time for a single playout
+
+        # Keep the tree for the next move of this game
+        self._root = root
+        self._root_cells = cells
+        return best_move
+
+    def _search_parallel(self, cells: bytearray, player: int, budgets: Optional[List[int]] = None) -> int:
+        """Root-parallel search: independent trees per process, visits summed"""
+        pool = get_process_pool(self.workers)
+        if budgets is None:
+            budgets = [max(1, self.playouts // self.workers)] * self.workers
+            time_limit = self.time_limit
+        else:
+            time_limit = None
+        jobs = [
+            pool.submit(
+                _search_worker,
+                self.logic.rows, self.logic.cols, self.logic.win_length,
+                bytes(cells), player, budget, time_limit, self.exploration,
+                self.rng.getrandbits(32)
+            )
+            for budget in budgets
+        ]
+
+        visits: Dict[int, int] = {}
+        self.last_playouts = 0
+        self.last_worker_playouts = []
+        for job in jobs:
+            child_visits, playouts = job.result()
+            self.last_playouts += playouts
+            self.last_worker_playouts.append(playouts)
+            for move, count in child_visits.items():
+                visits[move] = visits.get(move, 0) + count
+
+        if not visits:
+            return self.rng.choice(self._empty_cells(cells))  # no time for a single playout
+        return max(visits, key=visits.get)
+
+
+def _search_worker(
+    rows: int,
+    cols: int,
+    win_length: int,
+    cells: bytes,
+    player: int,
+    playouts: int,
+    time_limit: Optional[float],
+    exploration: float,
+    seed: int
+) -> Tuple[Dict[int, int], int]:
+    """Run one independent search in a worker process"""
+    engine = MCTSEngine(get_logic(rows, cols, win_length), playouts, time_limit or 0.0, exploration, 1, seed)
+    board = bytearray(cells)
+    root = _Node(None, None, 3 - player, engine._empty_cells(board))
+    done = engine._run(root, board, playouts, time_limit)
+    return {move: child.visits for move, child in root.children.items()}, done
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared process pool for root-parallel search"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+    return _process_pool
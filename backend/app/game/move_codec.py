@@ -0,0 +1,160 @@
+"""
+Packed move-sequence encoding
+
+A game's moves are stored as one blob instead of one row per move:
+
+Positions blob:
+    u8      header: high nibble = format version, low nibble = cell width
+            (1 = 4-bit nibbles, boards up to 16 cells; 2 = 1 byte, up to
+            256 cells; 3 = 2 bytes little-endian)
+    varint  move count
+    ...     positions in move order (nibbles: high nibble first)
+
+Times blob:
+    varint  count
+    ...     zigzag varint deltas in milliseconds; the first delta is from
+            the game start, each next one from the previous move
+
+Symbols are implied (X moves first and players alternate), and boards are
+rebuilt on demand by replaying the positions.
+"""
+from typing import List
+
+CODEC_VERSION = 1
+
+WIDTH_NIBBLE = 1
+WIDTH_BYTE = 2
+WIDTH_WORD = 3
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """Append an unsigned LEB128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int):
+    """Read an unsigned LEB128 varint; returns (value, next offset)"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def cell_width(board_size: int) -> int:
+    """Smallest cell width code for a board size"""
+    if board_size <= 16:
+        return WIDTH_NIBBLE
+    if board_size <= 256:
+        return WIDTH_BYTE
+    return WIDTH_WORD
+
+
+def encode_positions(positions: List[int], board_size: int) -> bytes:
+    """
+    Pack a move sequence
+
+    Args:
+        positions: Cell indices in move order
+        board_size: Number of cells on the board
+
+    Returns:
+        Packed positions blob
+    """
+    width = cell_width(board_size)
+    out = bytearray([(CODEC_VERSION << 4) | width])
+    _write_varint(out, len(positions))
+
+    if width == WIDTH_NIBBLE:
+        for i in range(0, len(positions), 2):
+            low = positions[i + 1] if i + 1 < len(positions) else 0
+            out.append((positions[i] << 4) | low)
+    elif width == WIDTH_BYTE:
+        out.extend(positions)
+    else:
+        for position in positions:
+            out.extend(position.to_bytes(2, 'little'))
+
+    return bytes(out)
+
+
+def decode_positions(blob: bytes) -> List[int]:
+    """
+    Unpack a move sequence
+
+    Args:
+        blob: Packed positions blob
+
+    Returns:
+        Cell indices in move order
+    """
+    if not blob:
+        return []
+
+    version, width = blob[0] >> 4, blob[0] & 0x0F
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported move codec version {version}")
+
+    count, offset = _read_varint(blob, 1)
+
+    if width == WIDTH_NIBBLE:
+        positions = []
+        for byte in blob[offset:offset + (count + 1) // 2]:
+            positions.append(byte >> 4)
+            positions.append(byte & 0x0F)
+        return positions[:count]
+    if width == WIDTH_BYTE:
+        return list(blob[offset:offset + count])
+    return [
+        int.from_bytes(blob[offset + 2 * i:offset + 2 * i + 2], 'little')
+        for i in range(count)
+    ]
+
+
+def encode_times(offsets_ms: List[int]) -> bytes:
+    """
+    Pack move times
+
+    Args:
+        offsets_ms: Milliseconds since game start for each move
+
+    Returns:
+        Packed times blob
+    """
+    out = bytearray()
+    _write_varint(out, len(offsets_ms))
+    previous = 0
+    for offset in offsets_ms:
+        delta = offset - previous
+        _write_varint(out, (delta << 1) ^ (delta >> 63))  # zigzag
+        previous = offset
+    return bytes(out)
+
+
+def decode_times(blob: bytes) -> List[int]:
+    """
+    Unpack move times
+
+    Args:
+        blob: Packed times blob
+
+    Returns:
+        Milliseconds since game start for each move
+    """
+    if not blob:
+        return []
+
+    count, offset = _read_varint(blob, 0)
+    offsets = []
+    current = 0
+    for _ in range(count):
+        value, offset = _read_varint(blob, offset)
+        current += (value >> 1) ^ -(value & 1)
+        offsets.append(current)
+    return offsets
@@ -0,0 +1,94 @@
+"""
+Move history reader - one view over both move storage modes
+
+Games store their moves either as packed blobs on the game row
+(MOVE_STORAGE = 'packed', see move_codec) or as one Move row per move
+(MOVE_STORAGE = 'rows', and every game created before packing existed).
+Readers go through this module so they work with either.
+"""
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.models import Game, Move
+from .game_logic import get_game_logic
+from .move_codec import decode_positions, decode_times
+
+
+def replay_packed_moves(game: Game) -> List[Dict]:
+    """
+    Rebuild the move list of a game stored in packed form
+
+    Args:
+        game: Game row with move_positions / move_times
+
+    Returns:
+        List of moves (same keys as load_game_moves)
+    """
+    logic = get_game_logic(game.variant, game.board_rows, game.board_cols, game.win_length)
+    positions = decode_positions(game.move_positions)
+    offsets = decode_times(game.move_times)
+
+    moves = []
+    board = logic.create_empty_board()
+    for index, position in enumerate(positions):
+        symbol = 'X' if index % 2 == 0 else 'O'
+        board = logic.make_move(board, position, symbol)
+        timestamp = None
+        if game.started_at and index < len(offsets):
+            timestamp = game.started_at + timedelta(milliseconds=offsets[index])
+
+        moves.append({
+            'move_number': index + 1,
+            'position': position,
+            'player_id': game.player1_id if symbol == 'X' else (game.player2_id or 0),
+            'symbol': symbol,
+            'board_state_after': board,
+            'timestamp': timestamp
+        })
+    return moves
+
+
+async def load_game_moves(db: AsyncSession, game: Game, after: int = 0) -> List[Dict]:
+    """
+    Get a game's moves from whichever storage the game uses
+
+    Args:
+        db: Database session
+        game: Game row
+        after: Only moves with a move number greater than this
+
+    Returns:
+        List of moves ordered by move number, each with move_number,
+        position, player_id, symbol, board_state_after and timestamp
+    """
+    if game.move_positions is not None:
+        return [move for move in replay_packed_moves(game) if move['move_number'] > after]
+
+    result = await db.execute(
+        select(
+            Move.move_number, Move.position, Move.player_id,
+            Move.symbol, Move.board_state_after, Move.timestamp
+        )
+        .where(Move.game_id == game.id, Move.move_number > after)
+        .order_by(Move.move_number)
+    )
+    return [
+        {
+            'move_number': move_number,
+            'position': position,
+            'player_id': player_id,
+            'symbol': symbol,
+            'board_state_after': board_state_after,
+            'timestamp': timestamp
+        }
+        for move_number, position, player_id, symbol, board_state_after, timestamp in result
+    ]
+
+
+def move_offset_ms(started_at: Optional[datetime], timestamp: datetime) -> int:
+    """Milliseconds from game start to a move (0 when the start is unknown)"""
+    if started_at is None:
+        return 0
+    return max(0, int((timestamp - started_at).total_seconds() * 1000))
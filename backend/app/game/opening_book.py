@@ -0,0 +1,319 @@
+"""
+Opening book - precomputed best moves in a memory-mapped binary file
+
+The book is built offline (build_opening_book.py) and opened read-only with
+mmap, so every worker process shares the operating system's page-cache copy
+and startup does no solving.
+
+File layout (little-endian header, then fixed-width records sorted by key):
+    4s   magic b'TTTB'
+    u16  format version
+    u8   rows
+    u8   cols
+    u8   win_length
+    u8   key width in bytes
+    u8   move mask width in bytes
+    u8   reserved (0)
+    u32  record count
+  per record:
+    key   canonical position, 2 bits per cell (0 empty, 1 X, 2 O), cell 0
+          in the most significant bits, big-endian so byte order = key order
+    mask  best moves on the canonical board, bit i = cell i, little-endian
+    i16   score for the side to move (WIN_SCORE - plies to a win, 0 draw)
+"""
+from typing import Dict, List, Optional, Tuple
+import mmap
+import os
+import struct
+import logging
+from pathlib import Path
+
+from app.config import settings
+from .game_logic import MNKLogic, CELL_CODES, GameResult
+
+logger = logging.getLogger(__name__)
+
+BOOK_MAGIC = b'TTTB'
+BOOK_VERSION = 1
+
+_HEADER = struct.Struct('<4sHBBBBBBI')
+_SCORE = struct.Struct('<h')
+
+# (rows, cols, win_length) -> opened book, or None when no file exists
+_books: Dict[Tuple[int, int, int], Optional['OpeningBook']] = {}
+
+# Relative book directories are resolved against the backend directory
+backend_dir = Path(__file__).parent.parent.parent
+
+
+def key_width(logic: MNKLogic) -> int:
+    """Bytes needed for a position key (2 bits per cell)"""
+    return (logic.size * 2 + 7) // 8
+
+
+def mask_width(logic: MNKLogic) -> int:
+    """Bytes needed for a move mask (1 bit per cell)"""
+    return (logic.size + 7) // 8
+
+
+def encode_key(board: str, width: int) -> bytes:
+    """
+    Pack a board into a fixed-width key
+
+    Args:
+        board: Board string (canonical form)
+        width: Key width in bytes
+
+    Returns:
+        Big-endian key bytes
+    """
+    value = 0
+    for cell in board:
+        value = (value << 2) | CELL_CODES[cell]
+    return value.to_bytes(width, 'big')
+
+
+def book_filename(logic: MNKLogic) -> str:
+    """Book file name for a board configuration"""
+    return f"{logic.rows}x{logic.cols}x{logic.win_length}.book"
+
+
+def book_dir() -> str:
+    """Absolute directory of the book files (BOT_OPENING_BOOK_DIR)"""
+    return str(backend_dir / settings.BOT_OPENING_BOOK_DIR)
+
+
+class OpeningBook:
+    """Read-only view of a book file with binary-search lookups"""
+
+    def __init__(self, path: str, logic: MNKLogic):
+        """
+        Open and validate a book file
+
+        Args:
+            path: Book file path
+            logic: Board configuration the book must match
+
+        Raises:
+            ValueError: If the file is not a book for this configuration
+        """
+        self.path = path
+        self.logic = logic
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"Book file too small: {path}")
+
+        magic, version, rows, cols, win_length, key_bytes, mask_bytes, _, count = _HEADER.unpack_from(self._map)
+        if magic != BOOK_MAGIC:
+            raise ValueError(f"Not a book file: {path}")
+        if version != BOOK_VERSION:
+            raise ValueError(f"Unsupported book version {version} (expected {BOOK_VERSION})")
+        if (rows, cols, win_length) != (logic.rows, logic.cols, logic.win_length):
+            raise ValueError(f"Book is for {rows}x{cols}x{win_length}, not {book_filename(logic)}")
+        if key_bytes != key_width(logic) or mask_bytes != mask_width(logic):
+            raise ValueError(f"Book record layout does not match the board: {path}")
+
+        self.key_bytes = key_bytes
+        self.mask_bytes = mask_bytes
+        self.record_size = key_bytes + mask_bytes + _SCORE.size
+        self.count = count
+
+        if len(self._map) != _HEADER.size + count * self.record_size:
+            raise ValueError(f"Book file is truncated: {path}")
+
+    def _find(self, key: bytes) -> Optional[int]:
+        """Binary search for a key; returns the record offset"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * self.record_size
+            probe = self._map[offset:offset + self.key_bytes]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return offset
+        return None
+
+    def lookup(self, board: str) -> Optional[Tuple[List[int], int]]:
+        """
+        Look up a position
+
+        Args:
+            board: Current board state (any orientation)
+
+        Returns:
+            Tuple of (best moves on this board, score for the side to move)
+            or None if the position is not in the book
+        """
+        canonical, permutation = self.logic.canonicalize(board)
+        offset = self._find(encode_key(canonical, self.key_bytes))
+        if offset is None:
+            return None
+
+        offset += self.key_bytes
+        mask = int.from_bytes(self._map[offset:offset + self.mask_bytes], 'little')
+        score = _SCORE.unpack_from(self._map, offset + self.mask_bytes)[0]
+
+        moves = sorted(permutation[cell] for cell in range(self.logic.size) if mask >> cell & 1)
+        return moves, score
+
+    def close(self) -> None:
+        """Release the memory map"""
+        self._map.close()
+
+
+def get_opening_book(logic: MNKLogic) -> Optional[OpeningBook]:
+    """
+    Get the opening book for a board configuration (opened once per process)
+
+    Args:
+        logic: Board configuration
+
+    Returns:
+        OpeningBook or None if disabled, missing or invalid
+    """
+    config = (logic.rows, logic.cols, logic.win_length)
+    if config in _books:
+        return _books[config]
+
+    book = None
+    path = os.path.join(book_dir(), book_filename(logic))
+    if settings.BOT_OPENING_BOOK_ENABLED and os.path.exists(path):
+        try:
+            book = OpeningBook(path, logic)
+            logger.info(f"Opening book loaded: {path} ({book.count} positions)")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load opening book {path}: {e}")
+
+    _books[config] = book
+    return book
+
+
+def write_book(path: str, logic: MNKLogic, entries: Dict[str, Tuple[List[int], int]]) -> int:
+    """
+    Write a book file
+
+    Args:
+        path: Output path
+        logic: Board configuration
+        entries: Canonical board -> (best moves, score)
+
+    Returns:
+        Number of records written
+    """
+    key_bytes, mask_bytes = key_width(logic), mask_width(logic)
+    records = []
+    for board, (moves, score) in entries.items():
+        mask = 0
+        for move in moves:
+            mask |= 1 << move
+        records.append((
+            encode_key(board, key_bytes),
+            mask.to_bytes(mask_bytes, 'little'),
+            _SCORE.pack(max(-32768, min(32767, score)))
+        ))
+    records.sort(key=lambda record: record[0])
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(
+            BOOK_MAGIC, BOOK_VERSION, logic.rows, logic.cols, logic.win_length,
+            key_bytes, mask_bytes, 0, len(records)
+        ))
+        for record in records:
+            f.write(b''.join(record))
+
+    # Replace atomically so running servers never map a half-written file
+    os.replace(temp_path, path)
+    return len(records)
+
+
+def _step_back(score: int) -> int:
+    """Move a score one ply further from its result (win/loss in n -> n + 1)"""
+    if score > 0:
+        return score - 1
+    if score < 0:
+        return score + 1
+    return 0
+
+
+def build_book(
+    logic: MNKLogic,
+    max_plies: Optional[int] = None,
+    time_limit: float = 0.1
+) -> Dict[str, Tuple[List[int], int]]:
+    """
+    Compute book entries for every reachable position up to max_plies
+
+    When the book covers the whole game (max_plies None or >= cells) every
+    position is solved exactly with a memoized negamax over canonical
+    positions. Otherwise each child is scored with a time-limited search.
+
+    Args:
+        logic: Board configuration
+        max_plies: Most symbols on the board for included positions (None = whole game)
+        time_limit: Seconds per child search (partial books only)
+
+    Returns:
+        Canonical board -> (best moves, score for the side to move)
+    """
+    from .bot_ai import BotAI, WIN_SCORE
+
+    entries: Dict[str, Tuple[List[int], int]] = {}
+
+    def to_move(board: str) -> str:
+        return 'X' if board.count('X') == board.count('O') else 'O'
+
+    def score_moves(board: str, child_score) -> Tuple[List[int], int]:
+        """Score every legal move; child_score scores a non-terminal child"""
+        symbol = to_move(board)
+        best_score, best_moves = None, []
+        for move in logic.get_available_moves(board):
+            child = logic.make_move(board, move, symbol)
+            result = logic.get_game_result(child, move)
+            if result == GameResult.WIN:
+                score = WIN_SCORE - 1
+            elif result == GameResult.DRAW:
+                score = 0
+            else:
+                score = -_step_back(child_score(child))
+
+            if best_score is None or score > best_score:
+                best_score, best_moves = score, [move]
+            elif score == best_score:
+                best_moves.append(move)
+        return best_moves, best_score
+
+    if max_plies is None or max_plies >= logic.size:
+        def solve(board: str) -> int:
+            """Exact score of a canonical position for the side to move"""
+            if board not in entries:
+                entries[board] = score_moves(board, lambda child: solve(logic.canonicalize(child)[0]))
+            return entries[board][1]
+
+        solve(logic.create_empty_board())
+        return entries
+
+    def search_child(child: str) -> int:
+        """Time-limited search score of a child for its side to move"""
+        bot = BotAI('hard', to_move(child), logic, strategy='minimax', seed=0)
+        score, _ = bot.search(child, None, time_limit)
+        return score
+
+    frontier = {logic.create_empty_board()}
+    for _ in range(max_plies + 1):
+        next_frontier = set()
+        for board in frontier:
+            entries[board] = score_moves(board, search_child)
+            for move in logic.get_available_moves(board):
+                child = logic.make_move(board, move, to_move(board))
+                if logic.get_game_result(child, move) == GameResult.ONGOING:
+                    next_frontier.add(logic.canonicalize(child)[0])
+        frontier = next_frontier
+
+    return entries
@@ -0,0 +1,463 @@
+"""
+Rating engines - Elo and Glicko-2 player ratings
+"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from datetime import datetime
+import math
+import logging
+
+from app.config import settings
+from app.models import Game, UserStats, JobState
+from app.utils.user_search import RATINGS_RECOMPUTED_JOB
+
+logger = logging.getLogger(__name__)
+
+# (rating, rating deviation, volatility)
+RatingState = Tuple[float, float, float]
+
+GLICKO2_SCALE = 173.7178
+
+
+class EloRating:
+    """
+    Classic Elo rating with a configurable K-factor
+    Rating deviation and volatility are carried through unchanged
+    """
+
+    name = 'elo'
+
+    def __init__(self, k_factor: float = 32, initial_rating: float = 1000, floor: float = 0):
+        """
+        Initialize Elo engine
+
+        Args:
+            k_factor: Maximum rating change per game
+            initial_rating: Rating for new players
+            floor: Lowest rating a player can drop to
+        """
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.floor = floor
+
+    def initial_state(self) -> RatingState:
+        """Get rating state for a new player"""
+        return (self.initial_rating, settings.GLICKO2_INITIAL_RD, settings.GLICKO2_INITIAL_VOLATILITY)
+
+    @staticmethod
+    def expected_score(rating: float, opponent_rating: float) -> float:
+        """
+        Get expected score against an opponent
+
+        Args:
+            rating: Player rating
+            opponent_rating: Opponent rating
+
+        Returns:
+            Expected score between 0 and 1
+        """
+        return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+    def rate_game(
+        self,
+        state_a: RatingState,
+        state_b: RatingState,
+        score_a: float,
+        idle_a: int = 0,
+        idle_b: int = 0
+    ) -> Tuple[RatingState, RatingState]:
+        """
+        Rate a single game
+
+        Args:
+            state_a: Player A rating state
+            state_b: Player B rating state
+            score_a: Player A score (1 win, 0.5 draw, 0 loss)
+            idle_a: Ignored for Elo
+            idle_b: Ignored for Elo
+
+        Returns:
+            Tuple of new (state_a, state_b)
+        """
+        rating_a, rating_b = state_a[0], state_b[0]
+        delta = self.k_factor * (score_a - self.expected_score(rating_a, rating_b))
+
+        return (
+            (max(self.floor, rating_a + delta), state_a[1], state_a[2]),
+            (max(self.floor, rating_b - delta), state_b[1], state_b[2])
+        )
+
+    def rate_period(
+        self,
+        state: RatingState,
+        results: List[Tuple[RatingState, float]],
+        idle_periods: int = 0
+    ) -> RatingState:
+        """
+        Rate all games of one player in a rating period
+
+        Args:
+            state: Player rating state at period start
+            results: List of (opponent_state, score)
+            idle_periods: Ignored for Elo
+
+        Returns:
+            New rating state
+        """
+        rating = state[0]
+        delta = sum(
+            self.k_factor * (score - self.expected_score(rating, opponent[0]))
+            for opponent, score in results
+        )
+        return (max(self.floor, rating + delta), state[1], state[2])
+
+
+class Glicko2Rating:
+    """
+    Glicko-2 rating system (Glickman, 2012)
+    Tracks rating deviation (RD) and volatility per player
+    """
+
+    name = 'glicko2'
+
+    def __init__(
+        self,
+        tau: float = 0.5,
+        initial_rating: float = 1000,
+        initial_rd: float = 350,
+        initial_volatility: float = 0.06,
+        floor: float = 0,
+        epsilon: float = 1e-6
+    ):
+        """
+        Initialize Glicko-2 engine
+
+        Args:
+            tau: System constant constraining volatility change
+            initial_rating: Rating for new players
+            initial_rd: Rating deviation for new players
+            initial_volatility: Volatility for new players
+            floor: Lowest rating a player can drop to
+            epsilon: Convergence tolerance for the volatility iteration
+        """
+        self.tau = tau
+        self.initial_rating = initial_rating
+        self.initial_rd = initial_rd
+        self.initial_volatility = initial_volatility
+        self.floor = floor
+        self.epsilon = epsilon
+
+    def initial_state(self) -> RatingState:
+        """Get rating state for a new player"""
+        return (self.initial_rating, self.initial_rd, self.initial_volatility)
+
+    def rate_game(
+        self,
+        state_a: RatingState,
+        state_b: RatingState,
+        score_a: float,
+        idle_a: int = 0,
+        idle_b: int = 0
+    ) -> Tuple[RatingState, RatingState]:
+        """
+        Rate a single game, treating it as its own rating period
+
+        Both RDs first grow for the periods each player sat out, so the
+        opponent is weighed on its grown RD as well.
+
+        Args:
+            state_a: Player A rating state
+            state_b: Player B rating state
+            score_a: Player A score (1 win, 0.5 draw, 0 loss)
+            idle_a: Rating periods player A sat out before this game
+            idle_b: Rating periods player B sat out before this game
+
+        Returns:
+            Tuple of new (state_a, state_b)
+        """
+        state_a = self.rate_period(state_a, [], idle_a)
+        state_b = self.rate_period(state_b, [], idle_b)
+        return (
+            self.rate_period(state_a, [(state_b, score_a)]),
+            self.rate_period(state_b, [(state_a, 1.0 - score_a)])
+        )
+
+    def rate_period(
+        self,
+        state: RatingState,
+        results: List[Tuple[RatingState, float]],
+        idle_periods: int = 0
+    ) -> RatingState:
+        """
+        Rate all games of one player in a rating period
+
+        Args:
+            state: Player rating state at period start
+            results: List of (opponent_state, score)
+            idle_periods: Rating periods without games since the last update
+
+        Returns:
+            New rating state
+        """
+        rating, rd, volatility = state
+        mu = (rating - self.initial_rating) / GLICKO2_SCALE
+        phi = rd / GLICKO2_SCALE
+
+        # RD grows while a player does not play
+        if idle_periods > 0:
+            phi = math.sqrt(phi * phi + idle_periods * volatility * volatility)
+
+        if not results:
+            return (rating, min(self.initial_rd, phi * GLICKO2_SCALE), volatility)
+
+        v_inv = 0.0
+        delta_sum = 0.0
+        for opponent, score in results:
+            mu_j = (opponent[0] - self.initial_rating) / GLICKO2_SCALE
+            phi_j = opponent[1] / GLICKO2_SCALE
+            g = 1.0 / math.sqrt(1.0 + 3.0 * phi_j * phi_j / (math.pi * math.pi))
+            expected = 1.0 / (1.0 + math.exp(-g * (mu - mu_j)))
+            v_inv += g * g * expected * (1.0 - expected)
+            delta_sum += g * (score - expected)
+
+        v = 1.0 / v_inv
+        delta = v * delta_sum
+
+        new_volatility = self._new_volatility(phi, volatility, v, delta)
+        phi_star = math.sqrt(phi * phi + new_volatility * new_volatility)
+        new_phi = 1.0 / math.sqrt(1.0 / (phi_star * phi_star) + 1.0 / v)
+        new_mu = mu + new_phi * new_phi * delta_sum
+
+        return (
+            max(self.floor, new_mu * GLICKO2_SCALE + self.initial_rating),
+            min(self.initial_rd, new_phi * GLICKO2_SCALE),
+            new_volatility
+        )
+
+    def _new_volatility(self, phi: float, volatility: float, v: float, delta: float) -> float:
+        """
+        Solve for the new volatility (Illinois algorithm, step 5 of Glicko-2)
+
+        Args:
+            phi: Player RD on the Glicko-2 scale
+            volatility: Current volatility
+            v: Estimated variance from game outcomes
+            delta: Estimated improvement
+
+        Returns:
+            New volatility
+        """
+        a = math.log(volatility * volatility)
+        tau2 = self.tau * self.tau
+        phi2 = phi * phi
+        delta2 = delta * delta
+
+        def f(x: float) -> float:
+            ex = math.exp(x)
+            return (
+                ex * (delta2 - phi2 - v - ex) / (2.0 * (phi2 + v + ex) ** 2)
+                - (x - a) / tau2
+            )
+
+        big_a = a
+        if delta2 > phi2 + v:
+            big_b = math.log(delta2 - phi2 - v)
+        else:
+            k = 1
+            while f(a - k * self.tau) < 0:
+                k += 1
+            big_b = a - k * self.tau
+
+        f_a = f(big_a)
+        f_b = f(big_b)
+        while abs(big_b - big_a) > self.epsilon:
+            big_c = big_a + (big_a - big_b) * f_a / (f_b - f_a)
+            f_c = f(big_c)
+            if f_c * f_b <= 0:
+                big_a, f_a = big_b, f_b
+            else:
+                f_a /= 2.0
+            big_b, f_b = big_c, f_c
+
+        return math.exp(big_a / 2.0)
+
+
+def get_rating_engine(system: Optional[str] = None):
+    """
+    Build the configured rating engine
+
+    Args:
+        system: 'elo' or 'glicko2' (defaults to settings.RATING_SYSTEM)
+
+    Returns:
+        EloRating or Glicko2Rating instance
+    """
+    system = (system or settings.RATING_SYSTEM).lower()
+
+    if system == 'glicko2':
+        return Glicko2Rating(
+            tau=settings.GLICKO2_TAU,
+            initial_rating=settings.RATING_INITIAL,
+            initial_rd=settings.GLICKO2_INITIAL_RD,
+            initial_volatility=settings.GLICKO2_INITIAL_VOLATILITY
+        )
+
+    return EloRating(k_factor=settings.ELO_K_FACTOR, initial_rating=settings.RATING_INITIAL)
+
+
+def rating_period(when: Optional[datetime], period_days: Optional[float] = None) -> Optional[int]:
+    """
+    Get the Glicko-2 rating period a game finished in
+
+    Args:
+        when: Game finish time
+        period_days: Rating period length (defaults to settings.RATING_PERIOD_DAYS)
+
+    Returns:
+        Period number, or None if periods are off or the time is unknown
+    """
+    if period_days is None:
+        period_days = settings.RATING_PERIOD_DAYS
+    if period_days <= 0 or when is None:
+        return None
+    return int(when.timestamp() // (period_days * 86400))
+
+
+def idle_periods(last_period: Optional[int], period: Optional[int]) -> int:
+    """
+    Count the whole rating periods a player sat out
+
+    Args:
+        last_period: Period of the player's last rated game (None if never rated)
+        period: Period of the game being rated
+
+    Returns:
+        Number of idle periods in between
+    """
+    if last_period is None or period is None:
+        return 0
+    return max(0, period - last_period - 1)
+
+
+def game_score(player1_id: int, winner_id: Optional[int], result: str) -> Optional[float]:
+    """
+    Get player 1's score for a finished game
+
+    Args:
+        player1_id: Player 1 ID
+        winner_id: Winner ID (None for draw)
+        result: Game result ('win', 'draw', 'abandoned')
+
+    Returns:
+        1.0, 0.5 or 0.0, or None if the game is not rated
+    """
+    if result == 'draw':
+        return 0.5
+    if result in ('win', 'abandoned') and winner_id is not None:
+        return 1.0 if winner_id == player1_id else 0.0
+    return None
+
+
+async def recompute_ratings(
+    db: AsyncSession,
+    system: Optional[str] = None,
+    period_days: Optional[float] = None,
+    batch_size: int = 5000,
+    progress_every: int = 100000
+) -> Dict:
+    """
+    Rebuild every player rating by replaying finished games
+
+    Games are streamed in finished_at order with a server-side cursor, so
+    memory is bounded by the number of rated players, not the number of games.
+    Each game is rated the same way the server rates it live: on its own,
+    after growing each player's RD for the rating periods they sat out.
+
+    Args:
+        db: Database session
+        system: Rating system to use (defaults to settings.RATING_SYSTEM)
+        period_days: Glicko-2 rating period length (0 never grows RD while idle)
+        batch_size: Rows fetched per round-trip and written per UPDATE batch
+        progress_every: Log progress every N games
+
+    Returns:
+        Dictionary with games replayed and players rated
+    """
+    engine = get_rating_engine(system)
+
+    states: Dict[int, RatingState] = {}
+    last_period: Dict[int, Optional[int]] = {}
+    games_replayed = 0
+
+    stmt = (
+        select(Game.player1_id, Game.player2_id, Game.winner_id, Game.result, Game.finished_at)
+        .where(Game.status == 'finished')
+        .where(Game.is_bot_game == False)
+        .where(Game.player2_id.isnot(None))
+        .order_by(Game.finished_at, Game.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    stream = await db.stream(stmt)
+    async for rows in stream.partitions():
+        for player1_id, player2_id, winner_id, result, finished_at in rows:
+            score = game_score(player1_id, winner_id, result)
+            if score is None:
+                continue
+
+            period = rating_period(finished_at, period_days)
+            new_states = engine.rate_game(
+                states.get(player1_id) or engine.initial_state(),
+                states.get(player2_id) or engine.initial_state(),
+                score,
+                idle_periods(last_period.get(player1_id), period),
+                idle_periods(last_period.get(player2_id), period)
+            )
+            for player_id, (rating, rd, volatility) in zip((player1_id, player2_id), new_states):
+                # Ratings are stored as whole points between games
+                states[player_id] = (int(round(rating)), rd, volatility)
+                last_period[player_id] = period
+
+            games_replayed += 1
+            if games_replayed % progress_every == 0:
+                logger.info(f"Rating recompute: {games_replayed} games replayed")
+
+    # Reset everyone, then write rebuilt ratings in batches
+    initial = engine.initial_state()
+    await db.execute(
+        update(UserStats).values(
+            ranking_points=int(round(initial[0])),
+            rating_deviation=initial[1],
+            rating_volatility=initial[2],
+            last_rated_period=None
+        )
+    )
+
+    # Bulk UPDATE by primary key, one executemany per batch
+    batch = []
+    for player_id, (rating, rd, volatility) in states.items():
+        batch.append({
+            'user_id': player_id,
+            'ranking_points': rating,
+            'rating_deviation': rd,
+            'rating_volatility': volatility,
+            'last_rated_period': last_period[player_id]
+        })
+        if len(batch) >= batch_size:
+            await db.execute(update(UserStats), batch)
+            batch = []
+    if batch:
+        await db.execute(update(UserStats), batch)
+
+    # Tells running servers to reload their user search index
+    await db.merge(JobState(name=RATINGS_RECOMPUTED_JOB, updated_at=datetime.utcnow()))
+    await db.commit()
+
+    logger.info(f"Rating recompute finished: {games_replayed} games, {len(states)} players ({engine.name})")
+
+    return {
+        'system': engine.name,
+        'games_replayed': games_replayed,
+        'players_rated': len(states)
+    }
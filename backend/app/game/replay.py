@@ -0,0 +1,292 @@
+"""
+Game replays
+
+A replay is the full move timeline of a game, rebuilt from its stored move
+history, optionally with a bot evaluation of every position (best move and
+the outcome under perfect play for the side to move). Finished games never
+change, so their replays are built once, serialized, and kept in a bounded
+LRU with a stable ETag; clients may cache them forever.
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import json
+import logging
+
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.models import Game
+from app.utils.metrics import metrics
+from .game_logic import MNKLogic, get_game_logic
+from .bot_ai import BotAI, WIN_SCORE, WIN_SCORE_MARGIN
+from .ultimate import UltimateLogic, UltimateEngine, WIN_SCORE as ULTIMATE_WIN_SCORE
+from .move_history import load_game_moves
+
+logger = logging.getLogger(__name__)
+
+# Bump when the payload layout changes so cached copies are not reused
+REPLAY_FORMAT_VERSION = 1
+
+FINISHED_STATUSES = ('finished', 'abandoned')
+
+OPPOSITE_OUTCOME = {'win': 'loss', 'loss': 'win', 'draw': 'draw', None: None}
+
+
+class Replay:
+    """Serialized replay payload"""
+
+    def __init__(self, body: bytes, etag: Optional[str]):
+        """
+        Initialize replay
+
+        Args:
+            body: JSON body
+            etag: Quoted ETag (None for games still in progress)
+        """
+        self.body = body
+        self.etag = etag
+
+    @property
+    def immutable(self) -> bool:
+        """Whether the replay is of a finished game (safe to cache forever)"""
+        return self.etag is not None
+
+
+def replay_etag(game_id: int, evaluate: bool) -> str:
+    """
+    Stable ETag of a finished game's replay
+
+    Args:
+        game_id: Game ID
+        evaluate: Whether the replay includes evaluations
+
+    Returns:
+        Quoted ETag
+    """
+    raw = f"{game_id}:{int(evaluate)}:{REPLAY_FORMAT_VERSION}".encode()
+    return f'"{hashlib.sha1(raw).hexdigest()[:20]}"'
+
+
+def evaluate_position(logic: MNKLogic, board: str, symbol: str, time_limit: float) -> Dict:
+    """
+    Evaluate a position for the side to move
+
+    Args:
+        logic: Board configuration
+        board: Board before the move
+        symbol: Symbol to move
+        time_limit: Search seconds
+
+    Returns:
+        Dictionary with best_move, score and outcome ('win', 'loss' or
+        'draw' under perfect play; None if the search could not prove it)
+    """
+    empties = board[:logic.size].count('-')
+
+    if isinstance(logic, UltimateLogic):
+        engine = UltimateEngine()
+        score, best_move = engine.search(board, symbol, None, time_limit)
+        win_score, depth = ULTIMATE_WIN_SCORE, engine.search_depth
+    else:
+        bot = BotAI('hard', symbol, logic, strategy='minimax', seed=0)
+        score, best_move = bot.search(board, None, time_limit)
+        win_score, depth = WIN_SCORE, bot.search_depth
+
+    if abs(score) > win_score - WIN_SCORE_MARGIN:
+        outcome = 'win' if score > 0 else 'loss'
+    elif depth >= empties:
+        outcome = 'draw'  # searched to the end of the game
+    else:
+        outcome = None
+
+    return {'best_move': best_move, 'score': score, 'outcome': outcome}
+
+
+def grade_moves(logic: MNKLogic, timeline: List[Dict]) -> None:
+    """
+    Add played_outcome and best_played to each evaluated move
+
+    The outcome after a move is the opposite of the next position's outcome
+    (or the final result after the last move); a move is best when it keeps
+    the outcome its position had under perfect play.
+    """
+    for index, entry in enumerate(timeline):
+        evaluation = entry['evaluation']
+        if index + 1 < len(timeline):
+            played = OPPOSITE_OUTCOME[timeline[index + 1]['evaluation']['outcome']]
+        elif logic.get_winning_line(entry['board'], entry['position']):
+            played = 'win'
+        elif logic.is_board_full(entry['board']):
+            played = 'draw'
+        else:
+            played = None  # game ended by forfeit or abandonment
+
+        evaluation['played_outcome'] = played
+        evaluation['best_played'] = (
+            entry['position'] == evaluation['best_move']
+            or (played is not None and played == evaluation['outcome'])
+        )
+
+
+def build_replay(game: Game, moves: List[Dict], evaluate: bool = False) -> Dict:
+    """
+    Build the replay payload of a game
+
+    Args:
+        game: Game row
+        moves: Move history (see move_history.load_game_moves)
+        evaluate: Add a bot evaluation of the position before each move
+
+    Returns:
+        Replay dictionary
+    """
+    logic = get_game_logic(game.variant, game.board_rows, game.board_cols, game.win_length)
+    board = logic.create_empty_board()
+    timeline = []
+
+    for move in moves:
+        entry = {
+            'move_number': move['move_number'],
+            'position': move['position'],
+            'player_id': move['player_id'],
+            'symbol': move['symbol'],
+            'board': move['board_state_after'],
+            'timestamp': move['timestamp'].isoformat() if move['timestamp'] else None
+        }
+        if evaluate:
+            entry['evaluation'] = evaluate_position(
+                logic, board, move['symbol'], settings.REPLAY_EVAL_TIME_LIMIT_SECONDS
+            )
+        timeline.append(entry)
+        board = move['board_state_after']
+
+    if evaluate:
+        grade_moves(logic, timeline)
+
+    return {
+        'game_id': game.id,
+        'variant': game.variant or 'classic',
+        'board_rows': logic.rows,
+        'board_cols': logic.cols,
+        'win_length': logic.win_length,
+        'player1_id': game.player1_id,
+        'player2_id': game.player2_id,
+        'is_bot_game': game.is_bot_game,
+        'bot_difficulty': game.bot_difficulty,
+        'status': game.status,
+        'result': game.result,
+        'winner_id': game.winner_id,
+        'started_at': game.started_at.isoformat() if game.started_at else None,
+        'finished_at': game.finished_at.isoformat() if game.finished_at else None,
+        'initial_board': logic.create_empty_board(),
+        'moves': timeline
+    }
+
+
+class ReplayCache:
+    """Bounded LRU of serialized finished-game replays"""
+
+    def __init__(self, max_entries: int = 512, workers: int = 2):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum replays kept
+            workers: Threads building replays (evaluations are CPU-bound and
+                must not take the default executor the bot scheduler uses)
+        """
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='replay')
+        self._entries: 'OrderedDict[Tuple[int, bool], Replay]' = OrderedDict()
+        self._building: Dict[Tuple[int, bool], asyncio.Task] = {}
+
+    def get(self, game_id: int, evaluate: bool) -> Optional[Replay]:
+        """
+        Get a cached replay
+
+        Args:
+            game_id: Game ID
+            evaluate: Whether the replay includes evaluations
+
+        Returns:
+            Replay, or None if not cached
+        """
+        key = (game_id, evaluate)
+        replay = self._entries.get(key)
+        if replay is not None:
+            self._entries.move_to_end(key)
+        return replay
+
+    def put(self, game_id: int, evaluate: bool, replay: Replay) -> None:
+        """
+        Cache a replay, evicting the least recently used one if full
+
+        Args:
+            game_id: Game ID
+            evaluate: Whether the replay includes evaluations
+            replay: Replay to cache
+        """
+        self._entries[(game_id, evaluate)] = replay
+        self._entries.move_to_end((game_id, evaluate))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_replay(self, game_id: int, evaluate: bool = False) -> Optional[Replay]:
+        """
+        Get a game's replay, building it on first request
+
+        Concurrent first requests for the same replay share one build, which
+        runs in its own session so it outlives a cancelled first request.
+
+        Args:
+            game_id: Game ID
+            evaluate: Include per-move bot evaluations
+
+        Returns:
+            Replay, or None if the game does not exist
+
+        Raises:
+            ValueError: If evaluations are requested for a game in progress
+                (they could not be cached, so every request would search)
+        """
+        replay = self.get(game_id, evaluate)
+        if replay is not None:
+            metrics.increment('replay.cache_hits')
+            return replay
+
+        key = (game_id, evaluate)
+        task = self._building.get(key)
+        if task is None:
+            metrics.increment('replay.cache_misses')
+            task = asyncio.ensure_future(self._build(game_id, evaluate))
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _build(self, game_id: int, evaluate: bool) -> Optional[Replay]:
+        """Load, build and serialize a replay; cache it if the game is finished"""
+        async with ReadSessionLocal() as db:
+            game = await db.get(Game, game_id)
+            if game is None:
+                return None
+            if evaluate and game.status not in FINISHED_STATUSES:
+                raise ValueError("Evaluations are only available for finished games")
+            moves = await load_game_moves(db, game)
+
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(self._executor, build_replay, game, moves, evaluate)
+        body = json.dumps(payload, separators=(',', ':')).encode()
+
+        if game.status not in FINISHED_STATUSES:
+            return Replay(body, None)
+
+        replay = Replay(body, replay_etag(game_id, evaluate))
+        self.put(game_id, evaluate, replay)
+        logger.info(f"Replay of game {game_id} built ({len(moves)} moves, evaluate={evaluate})")
+        return replay
+
+
+# Global replay cache
+replay_cache = ReplayCache(settings.REPLAY_CACHE_SIZE, settings.REPLAY_BUILD_WORKERS)
@@ -0,0 +1,239 @@
+"""
+Self-play bot tournament - strength and throughput benchmark
+
+Bots play each other directly through the game logic (no database, no
+sockets). Games are spread over a process pool; every game has a seed
+derived from the tournament seed, so a run can be repeated exactly.
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+import csv
+import json
+import random
+import time
+
+from .game_logic import GameResult, get_variant_logic
+from .bot_ai import BotAI
+
+
+def parse_entrant(spec: str) -> Tuple[Optional[str], str]:
+    """
+    Parse an entrant spec: 'difficulty' or 'strategy:difficulty'
+
+    Args:
+        spec: Entrant spec (e.g. 'hard', 'mcts:medium')
+
+    Returns:
+        Tuple of (strategy or None for the default, difficulty)
+    """
+    if ':' in spec:
+        strategy, difficulty = spec.split(':', 1)
+        return strategy, difficulty
+    return None, spec
+
+
+def game_seed(seed: int, player_x: str, player_o: str, index: int) -> int:
+    """Derive a stable per-game seed (independent of process and hash seed)"""
+    return random.Random(f"{seed}:{player_x}:{player_o}:{index}").getrandbits(32)
+
+
+def play_game(player_x: str, player_o: str, variant: str, seed: int) -> Dict:
+    """
+    Play one bot-vs-bot game
+
+    Args:
+        player_x: Entrant spec playing X (moves first)
+        player_o: Entrant spec playing O
+        variant: Board variant
+        seed: Game seed
+
+    Returns:
+        Game record with winner ('X', 'O' or None), move count and per-side
+        think time and nodes searched
+    """
+    logic = get_variant_logic(variant)
+    bots = {}
+    for symbol, spec in (('X', player_x), ('O', player_o)):
+        strategy, difficulty = parse_entrant(spec)
+        bots[symbol] = BotAI(difficulty, symbol, logic, strategy, seed=seed * 2 + (symbol == 'O'))
+
+    stats = {symbol: {'moves': 0, 'think_time': 0.0, 'nodes': 0} for symbol in bots}
+    board = logic.create_empty_board()
+    symbol = 'X'
+    winner = None
+
+    while True:
+        bot = bots[symbol]
+
+        started = time.perf_counter()
+        position = bot.get_best_move(board)
+        elapsed = time.perf_counter() - started
+
+        side = stats[symbol]
+        side['moves'] += 1
+        side['think_time'] += elapsed
+        side['nodes'] += bot.nodes_searched
+
+        board = logic.make_move(board, position, symbol)
+        result = logic.get_game_result(board, position)
+        if result == GameResult.WIN:
+            winner = symbol
+            break
+        if result == GameResult.DRAW:
+            break
+        symbol = 'O' if symbol == 'X' else 'X'
+
+    return {
+        'x': player_x,
+        'o': player_o,
+        'seed': seed,
+        'winner': winner,
+        'moves': stats['X']['moves'] + stats['O']['moves'],
+        'stats': stats
+    }
+
+
+def _play_games(jobs: List[Tuple[str, str, str, int]]) -> List[Dict]:
+    """Play a chunk of games in a worker process"""
+    return [play_game(*job) for job in jobs]
+
+
+def run_tournament(
+    entrants: List[str],
+    games_per_pairing: int = 100,
+    variant: str = 'classic',
+    workers: int = 1,
+    seed: int = 0,
+    chunk_size: int = 50
+) -> Dict:
+    """
+    Run a round-robin tournament
+
+    Every ordered pair of entrants plays games_per_pairing games, so each
+    pair meets with both colours.
+
+    Args:
+        entrants: Entrant specs (see parse_entrant)
+        games_per_pairing: Games per ordered pair
+        variant: Board variant
+        workers: Worker processes (1 = in-process)
+        seed: Tournament seed
+        chunk_size: Games per worker task
+
+    Returns:
+        Summary with the result matrix, per-entrant speed and throughput
+    """
+    jobs = [
+        (player_x, player_o, variant, game_seed(seed, player_x, player_o, index))
+        for player_x, player_o in permutations(entrants, 2)
+        for index in range(games_per_pairing)
+    ]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    started = time.perf_counter()
+    records: List[Dict] = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_records in pool.map(_play_games, chunks):
+                records.extend(chunk_records)
+    else:
+        for chunk in chunks:
+            records.extend(_play_games(chunk))
+    elapsed = time.perf_counter() - started
+
+    return summarize(records, entrants, variant, seed, workers, elapsed)
+
+
+def summarize(
+    records: List[Dict],
+    entrants: List[str],
+    variant: str,
+    seed: int,
+    workers: int,
+    elapsed: float
+) -> Dict:
+    """
+    Aggregate game records into a tournament summary
+
+    Args:
+        records: Records from play_game
+        entrants: Entrant specs
+        variant: Board variant
+        seed: Tournament seed
+        workers: Worker processes used
+        elapsed: Wall-clock seconds
+
+    Returns:
+        Summary dictionary
+    """
+    matrix = {a: {b: {'wins': 0, 'draws': 0, 'losses': 0} for b in entrants if b != a} for a in entrants}
+    speed = {name: {'moves': 0, 'think_time': 0.0, 'nodes': 0} for name in entrants}
+
+    for record in records:
+        sides = {'X': record['x'], 'O': record['o']}
+        for symbol, name in sides.items():
+            opponent = sides['O' if symbol == 'X' else 'X']
+            cell = matrix[name][opponent]
+            if record['winner'] is None:
+                cell['draws'] += 1
+            elif record['winner'] == symbol:
+                cell['wins'] += 1
+            else:
+                cell['losses'] += 1
+
+            for field in ('moves', 'think_time', 'nodes'):
+                speed[name][field] += record['stats'][symbol][field]
+
+    players = {}
+    for name, totals in speed.items():
+        moves = totals['moves'] or 1
+        results = matrix[name].values()
+        players[name] = {
+            'wins': sum(cell['wins'] for cell in results),
+            'draws': sum(cell['draws'] for cell in results),
+            'losses': sum(cell['losses'] for cell in results),
+            'moves': totals['moves'],
+            'avg_think_ms': round(totals['think_time'] / moves * 1000, 3),
+            'avg_nodes': round(totals['nodes'] / moves, 1)
+        }
+
+    return {
+        'variant': variant,
+        'seed': seed,
+        'workers': workers,
+        'games': len(records),
+        'elapsed_seconds': round(elapsed, 3),
+        'games_per_second': round(len(records) / elapsed, 2) if elapsed > 0 else None,
+        'players': players,
+        'matrix': matrix
+    }
+
+
+def write_json(summary: Dict, path: str) -> None:
+    """Write a tournament summary as JSON"""
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+
+def write_csv(summary: Dict, path: str) -> None:
+    """Write one row per pairing (player vs opponent) as CSV"""
+    fields = [
+        'variant', 'seed', 'player', 'opponent', 'wins', 'draws', 'losses',
+        'avg_think_ms', 'avg_nodes', 'games_per_second'
+    ]
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for player, opponents in summary['matrix'].items():
+            for opponent, cell in opponents.items():
+                writer.writerow({
+                    'variant': summary['variant'],
+                    'seed': summary['seed'],
+                    'player': player,
+                    'opponent': opponent,
+                    **cell,
+                    'avg_think_ms': summary['players'][player]['avg_think_ms'],
+                    'avg_nodes': summary['players'][player]['avg_nodes'],
+                    'games_per_second': summary['games_per_second']
+                })
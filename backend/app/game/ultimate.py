@@ -0,0 +1,424 @@
+"""
+Ultimate tic-tac-toe - nine classic boards played as one
+
+Board positions 0-80 are row-major on the 9x9 grid. The cell played inside
+a sub-board sends the opponent to the sub-board at the same index; when that
+sub-board is already decided (won or full) the opponent may play in any open
+sub-board. Winning three sub-boards in a row wins the game.
+
+The board string is the 81 cells followed by one character for the
+sub-board the next player is sent to ('0'-'8', or '*' for any).
+"""
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import time
+
+from .game_logic import GameResult, CLASSIC, EMPTY
+
+ANY_SUB_BOARD = '*'
+FULL_MASK = 0x1FF
+
+# 9-bit masks of the classic lines, and which masks contain a line
+LINE_MASKS = [sum(1 << cell for cell in line) for line in CLASSIC.lines]
+WINS = [any(mask & line == line for line in LINE_MASKS) for mask in range(512)]
+
+# Grid position <-> (sub-board, cell within sub-board)
+POSITION_SUB = [(position // 27) * 3 + (position % 9) // 3 for position in range(81)]
+POSITION_CELL = [((position // 9) % 3) * 3 + position % 3 for position in range(81)]
+SUB_CELL_POSITION = [
+    [(sub // 3) * 27 + (cell // 3) * 9 + (sub % 3) * 3 + cell % 3 for cell in range(9)]
+    for sub in range(9)
+]
+
+# Sub-board status
+OPEN, X_WON, O_WON, DRAWN = 0, 1, 2, 3
+
+WIN_SCORE = 100000
+INFINITY = float('inf')
+
+# Positional weight of each sub-board / cell (center > corner > edge)
+SQUARE_WEIGHTS = [3, 2, 3, 2, 4, 2, 3, 2, 3]
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
+
+
+@lru_cache(maxsize=None)
+def _local_score(own: int, other: int) -> int:
+    """Heuristic value of one sub-board for the owner of `own` (cached per mask pair)"""
+    score = 0
+    for line in LINE_MASKS:
+        if line & other == 0:
+            score += (0, 1, 4, 0)[bin(line & own).count('1')]
+        if line & own == 0:
+            score -= (0, 1, 4, 0)[bin(line & other).count('1')]
+    return score
+
+
+class UltimateState:
+    """
+    Bitboard game state: one 9-bit X mask and O mask per sub-board, plus
+    meta-board masks. Sub-board results are updated incrementally on each
+    move (only the sub-board that changed is re-checked).
+    """
+
+    __slots__ = ('x', 'o', 'status', 'meta_x', 'meta_o', 'meta_done', 'forced')
+
+    def __init__(self, board: str):
+        """
+        Build state from a board string
+
+        Args:
+            board: Ultimate board string (81 cells + sub-board marker)
+        """
+        self.x = [0] * 9
+        self.o = [0] * 9
+        for position in range(81):
+            cell = board[position]
+            if cell == 'X':
+                self.x[POSITION_SUB[position]] |= 1 << POSITION_CELL[position]
+            elif cell == 'O':
+                self.o[POSITION_SUB[position]] |= 1 << POSITION_CELL[position]
+
+        self.status = [OPEN] * 9
+        self.meta_x = self.meta_o = self.meta_done = 0
+        for sub in range(9):
+            self._update_sub(sub)
+
+        marker = board[81] if len(board) > 81 else ANY_SUB_BOARD
+        self.forced = -1 if marker == ANY_SUB_BOARD else int(marker)
+
+    def _update_sub(self, sub: int) -> None:
+        """Recompute one sub-board's result and the meta masks"""
+        bit = 1 << sub
+        if WINS[self.x[sub]]:
+            self.status[sub] = X_WON
+            self.meta_x |= bit
+        elif WINS[self.o[sub]]:
+            self.status[sub] = O_WON
+            self.meta_o |= bit
+        elif self.x[sub] | self.o[sub] == FULL_MASK:
+            self.status[sub] = DRAWN
+        else:
+            return
+        self.meta_done |= bit
+
+    def moves(self) -> List[int]:
+        """Legal grid positions for the player to move"""
+        if self.is_over():
+            return []
+
+        if self.forced >= 0 and not self.meta_done >> self.forced & 1:
+            subs = (self.forced,)
+        else:
+            subs = [sub for sub in range(9) if not self.meta_done >> sub & 1]
+
+        moves = []
+        for sub in subs:
+            empty = ~(self.x[sub] | self.o[sub]) & FULL_MASK
+            cells = SUB_CELL_POSITION[sub]
+            while empty:
+                low = empty & -empty
+                moves.append(cells[low.bit_length() - 1])
+                empty ^= low
+        return moves
+
+    def play(self, position: int, player: int) -> Tuple:
+        """
+        Apply a move (player 1 = X, 2 = O)
+
+        Returns:
+            Undo record for undo()
+        """
+        sub, cell = POSITION_SUB[position], POSITION_CELL[position]
+        undo = (sub, self.status[sub], self.meta_x, self.meta_o, self.meta_done, self.forced)
+
+        if player == 1:
+            self.x[sub] |= 1 << cell
+        else:
+            self.o[sub] |= 1 << cell
+        self._update_sub(sub)
+
+        self.forced = -1 if self.meta_done >> cell & 1 else cell
+        return undo
+
+    def undo(self, position: int, player: int, undo: Tuple) -> None:
+        """Revert a move made with play()"""
+        sub, status, self.meta_x, self.meta_o, self.meta_done, self.forced = undo
+        self.status[sub] = status
+        cell_bit = ~(1 << POSITION_CELL[position])
+        if player == 1:
+            self.x[sub] &= cell_bit
+        else:
+            self.o[sub] &= cell_bit
+
+    def winner(self) -> int:
+        """Meta-board winner: 1 (X), 2 (O) or 0"""
+        if WINS[self.meta_x]:
+            return 1
+        if WINS[self.meta_o]:
+            return 2
+        return 0
+
+    def is_over(self) -> bool:
+        """Game is won or every sub-board is decided"""
+        return self.winner() != 0 or self.meta_done == FULL_MASK
+
+    def evaluate(self) -> int:
+        """Heuristic score from X's point of view"""
+        score = 0
+
+        # Meta-board lines still open for one side
+        for line in LINE_MASKS:
+            blocked_x = (self.meta_o | (self.meta_done & ~self.meta_x)) & line
+            blocked_o = (self.meta_x | (self.meta_done & ~self.meta_o)) & line
+            if not blocked_x:
+                score += (0, 30, 150)[bin(self.meta_x & line).count('1')]
+            if not blocked_o:
+                score -= (0, 30, 150)[bin(self.meta_o & line).count('1')]
+
+        for sub in range(9):
+            status = self.status[sub]
+            if status == X_WON:
+                score += 25 * SQUARE_WEIGHTS[sub]
+            elif status == O_WON:
+                score -= 25 * SQUARE_WEIGHTS[sub]
+            elif status == OPEN:
+                score += _local_score(self.x[sub], self.o[sub]) * SQUARE_WEIGHTS[sub]
+
+        return score
+
+
+class UltimateLogic:
+    """Board logic for ultimate tic-tac-toe (same interface as MNKLogic)"""
+
+    variant = 'ultimate'
+    rows = 9
+    cols = 9
+    win_length = 3
+    size = 81
+
+    def create_empty_board(self) -> str:
+        """Create an empty board (any sub-board may be played first)"""
+        return EMPTY * 81 + ANY_SUB_BOARD
+
+    def get_available_moves(self, board: str) -> List[int]:
+        """Get list of legal positions"""
+        return sorted(UltimateState(board).moves())
+
+    def is_valid_move(self, board: str, position: int) -> bool:
+        """
+        Check if a move is valid (empty cell in an allowed, open sub-board)
+
+        Args:
+            board: Current board state
+            position: Grid position (0-80)
+
+        Returns:
+            True if move is valid, False otherwise
+        """
+        if position < 0 or position >= 81 or board[position] != EMPTY:
+            return False
+
+        state = UltimateState(board)
+        if state.is_over():
+            return False
+
+        sub = POSITION_SUB[position]
+        if state.meta_done >> sub & 1:
+            return False
+        return state.forced < 0 or state.meta_done >> state.forced & 1 or state.forced == sub
+
+    def make_move(self, board: str, position: int, symbol: str) -> str:
+        """
+        Make a move on the board
+
+        Args:
+            board: Current board state
+            position: Grid position (0-80)
+            symbol: Symbol to place ('X' or 'O')
+
+        Returns:
+            New board state (with the next sub-board marker)
+        """
+        if not self.is_valid_move(board, position):
+            raise ValueError(f"Invalid move at position {position}")
+
+        state = UltimateState(board)
+        state.play(position, 1 if symbol == 'X' else 2)
+        marker = ANY_SUB_BOARD if state.forced < 0 else str(state.forced)
+        return board[:position] + symbol + board[position + 1:81] + marker
+
+    def get_winning_line(self, board: str, last_position: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Get the cells of the three sub-boards forming the winning meta line
+
+        Args:
+            board: Current board state
+            last_position: Last played cell (only its meta lines are checked)
+
+        Returns:
+            List of winning positions or None
+        """
+        state = UltimateState(board)
+        for meta, player in ((state.meta_x, 1), (state.meta_o, 2)):
+            for index, line in enumerate(LINE_MASKS):
+                if meta & line != line:
+                    continue
+                subs = CLASSIC.lines[index]
+                if last_position is not None and POSITION_SUB[last_position] not in subs:
+                    continue
+                return sorted(position for sub in subs for position in SUB_CELL_POSITION[sub])
+        return None
+
+    def check_winner(self, board: str, last_position: Optional[int] = None) -> Optional[str]:
+        """Get the winning symbol ('X' or 'O') or None"""
+        winner = UltimateState(board).winner()
+        return {1: 'X', 2: 'O'}.get(winner)
+
+    def is_board_full(self, board: str) -> bool:
+        """No legal moves remain (every sub-board is decided)"""
+        return UltimateState(board).meta_done == FULL_MASK
+
+    def get_game_result(self, board: str, last_position: Optional[int] = None) -> GameResult:
+        """Get the current game result"""
+        state = UltimateState(board)
+        if state.winner():
+            return GameResult.WIN
+        if state.meta_done == FULL_MASK:
+            return GameResult.DRAW
+        return GameResult.ONGOING
+
+    def board_to_matrix(self, board: str) -> List[List[str]]:
+        """Convert board string to a 9x9 matrix"""
+        return [list(board[row * 9:(row + 1) * 9]) for row in range(9)]
+
+
+ULTIMATE = UltimateLogic()
+
+
+class UltimateEngine:
+    """Iterative-deepening alpha-beta search over the bitboard state"""
+
+    def __init__(self):
+        """Initialize search statistics"""
+        self.nodes_searched = 0
+        self.search_depth = 0
+        self._deadline = 0.0
+        self._killers: Dict[int, int] = {}
+
+    def search(
+        self,
+        board: str,
+        symbol: str,
+        max_depth: Optional[int] = None,
+        time_limit: float = 1.0
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Find the best move within a depth and time budget
+
+        Args:
+            board: Current board state
+            symbol: Symbol to move
+            max_depth: Maximum depth in plies (None = until time runs out)
+            time_limit: Seconds allowed for the search
+
+        Returns:
+            Tuple of (score, best_move) from the mover's point of view
+        """
+        state = UltimateState(board)
+        player = 1 if symbol == 'X' else 2
+        empties = board[:81].count(EMPTY)
+        depth_limit = empties if max_depth is None else min(max_depth, empties)
+
+        self.nodes_searched = 0
+        self.search_depth = 0
+        self._deadline = time.monotonic() + time_limit
+        self._killers = {}
+
+        moves = state.moves()
+        best_score, best_move = 0, (moves[0] if moves else None)
+        for depth in range(1, depth_limit + 1):
+            # Don't start a depth once the time is up (a spent limit searches nothing)
+            if time.monotonic() >= self._deadline:
+                break
+            try:
+                score, move = self._search_root(state, player, depth, best_move)
+            except _SearchTimeout:
+                break
+
+            best_score, best_move = score, move
+            self.search_depth = depth
+            if abs(best_score) >= WIN_SCORE - 100:
+                break
+
+        return best_score, best_move
+
+    def _search_root(self, state: UltimateState, player: int, depth: int, pv_move: Optional[int]) -> Tuple[int, int]:
+        """Search all root moves to a fixed depth"""
+        alpha = -INFINITY
+        best_score, best_move = -INFINITY, None
+
+        for move in self._order(state, state.moves(), player, 0, pv_move):
+            score = self._child(state, move, player, depth, -INFINITY, -alpha, 1)
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+
+        return best_score, best_move
+
+    def _child(self, state: UltimateState, move: int, player: int, depth: int, alpha: float, beta: float, ply: int) -> int:
+        """Play a move and score it for the mover"""
+        undo = state.play(move, player)
+        if WINS[state.meta_x if player == 1 else state.meta_o]:
+            score = WIN_SCORE - ply
+        else:
+            score = -self._negamax(state, 3 - player, depth - 1, alpha, beta, ply)
+        state.undo(move, player, undo)
+        return score
+
+    def _negamax(self, state: UltimateState, player: int, depth: int, alpha: float, beta: float, ply: int) -> int:
+        """Negamax with alpha-beta pruning; score for the side to move"""
+        self.nodes_searched += 1
+        if self.nodes_searched & 1023 == 0 and time.monotonic() >= self._deadline:
+            raise _SearchTimeout()
+
+        moves = state.moves()
+        if not moves:
+            return 0
+        if depth == 0:
+            score = state.evaluate()
+            return score if player == 1 else -score
+
+        best_score = -INFINITY
+        for move in self._order(state, moves, player, ply, None):
+            score = self._child(state, move, player, depth, -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self._killers[ply] = move
+                break
+
+        return best_score
+
+    def _order(self, state: UltimateState, moves: List[int], player: int, ply: int, pv_move: Optional[int]) -> List[int]:
+        """Order moves: PV, killer, sub-board wins, then avoid giving a free choice"""
+        own = state.x if player == 1 else state.o
+        killer = self._killers.get(ply)
+
+        def key(move: int) -> int:
+            if move == pv_move:
+                return -1000
+            if move == killer:
+                return -500
+            sub, cell = POSITION_SUB[move], POSITION_CELL[move]
+            wins_sub = WINS[own[sub] | 1 << cell]
+            priority = -100 if wins_sub else 0
+            if state.meta_done >> cell & 1 or (wins_sub and cell == sub):
+                priority += 50  # Sends the opponent anywhere
+            return priority - SQUARE_WEIGHTS[cell]
+
+        return sorted(moves, key=key)
@@ -0,0 +1,18 @@
+"""
+Schema migrations - versioned DDL steps and online backfills
+"""
+from .base import Migration
+from .versions import MIGRATIONS, LATEST_VERSION
+from .runner import upgrade_schema, stamp_current, migration_status, run_backfill, MigrationRunner, migration_runner
+
+__all__ = [
+    "Migration",
+    "MIGRATIONS",
+    "LATEST_VERSION",
+    "upgrade_schema",
+    "stamp_current",
+    "migration_status",
+    "run_backfill",
+    "MigrationRunner",
+    "migration_runner"
+]
@@ -0,0 +1,203 @@
+"""
+Migration definition and idempotent DDL helpers
+
+A schema step runs inside one transaction on a synchronous connection
+(through run_sync) and must be safe to run again: databases created before
+migrations were tracked may already have any subset of the changes, so
+every helper checks the live schema first.
+"""
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from app.models import Base
+
+# backfill(session_factory, job_name, batch_size) -> async iterator of (done, total)
+Backfill = Callable[..., AsyncIterator[Tuple[int, int]]]
+
+
+class Migration:
+    """One schema version: a DDL step and/or an online data backfill"""
+
+    def __init__(
+        self,
+        version: int,
+        name: str,
+        schema: Optional[Callable[[Connection], None]] = None,
+        backfill: Optional[Backfill] = None
+    ):
+        """
+        Initialize migration
+
+        Args:
+            version: Schema version (increasing, never reused)
+            name: Short description
+            schema: DDL step, run on a synchronous connection
+            backfill: Batched data step, run after the schema step. It
+                commits each batch, keeps its progress in JobState under
+                job_name so an interrupted run resumes, and yields
+                (done, total) after every batch.
+        """
+        self.version = version
+        self.name = name
+        self.schema = schema
+        self.backfill = backfill
+
+    @property
+    def job_name(self) -> str:
+        """JobState name of the backfill's progress"""
+        return f"migration_{self.version}"
+
+    def __repr__(self) -> str:
+        """Readable form for logs"""
+        return f"Migration({self.version}, {self.name!r})"
+
+
+def add_column(conn: Connection, table: str, name: str) -> bool:
+    """
+    Add a model column to an existing table if it is missing
+
+    Args:
+        conn: Connection
+        table: Table name
+        name: Column name (type taken from the model)
+
+    Returns:
+        True if the column was added
+    """
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    if name in existing:
+        return False
+
+    column = Base.metadata.tables[table].columns[name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+    return True
+
+
+def create_index(conn: Connection, table: str, name: str) -> bool:
+    """
+    Create a model index if it does not exist
+
+    Args:
+        conn: Connection
+        table: Table name
+        name: Index name
+
+    Returns:
+        True if the index was created
+    """
+    existing = {index['name'] for index in inspect(conn).get_indexes(table)}
+    if name in existing:
+        return False
+
+    index = next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+    index.create(conn)
+    return True
+
+
+def drop_index(conn: Connection, table: str, name: str) -> bool:
+    """
+    Drop an index that is no longer in the models
+
+    Args:
+        conn: Connection
+        table: Table name
+        name: Index name
+
+    Returns:
+        True if the index was dropped
+    """
+    existing = {index['name'] for index in inspect(conn).get_indexes(table)}
+    if name not in existing:
+        return False
+
+    conn.execute(text(f"DROP INDEX {name}"))
+    return True
+
+
+def widen_to_text(conn: Connection, table: str, name: str) -> bool:
+    """
+    Change a column to TEXT (PostgreSQL only; SQLite does not enforce lengths)
+
+    Args:
+        conn: Connection
+        table: Table name
+        name: Column name
+
+    Returns:
+        True if the column was altered
+    """
+    if conn.dialect.name != 'postgresql':
+        return False
+
+    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {name} TYPE TEXT"))
+    return True
+
+
+def has_autoincrement(conn: Connection, table: str) -> bool:
+    """
+    Check whether ids of a table are never reused
+
+    True on databases other than SQLite, whose sequences never hand out an
+    id twice; on SQLite only when the table was created with AUTOINCREMENT
+    (otherwise a new row gets max(id) + 1, the id of a deleted newest row).
+
+    Args:
+        conn: Connection
+        table: Table name
+
+    Returns:
+        True if new rows always get ids above every earlier one
+    """
+    if conn.dialect.name != 'sqlite':
+        return True
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).scalar()
+    return sql is None or 'AUTOINCREMENT' in sql.upper()
+
+
+def rebuild_with_autoincrement(conn: Connection, table: str, floor: int = 0) -> bool:
+    """
+    Rebuild a SQLite table from its model so ids are AUTOINCREMENT
+
+    SQLite cannot alter a primary key, so the rows are copied into a new
+    table (the model must set sqlite_autoincrement), the old one is dropped
+    and the model's indexes are recreated. This rewrites the whole table.
+
+    Args:
+        conn: Connection
+        table: Table name
+        floor: Lowest value to start the id sequence from (ids known to
+            have been handed out before, e.g. of deleted rows)
+
+    Returns:
+        True if the table was rebuilt
+    """
+    if has_autoincrement(conn, table):
+        return False
+
+    model = Base.metadata.tables[table]
+    temp = f"{table}_rebuild"
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    columns = ', '.join(column.name for column in model.columns if column.name in existing)
+
+    ddl = str(CreateTable(model).compile(dialect=conn.dialect))
+    conn.execute(text(f"DROP TABLE IF EXISTS {temp}"))
+    conn.execute(text(ddl.replace(f"CREATE TABLE {table} (", f"CREATE TABLE {temp} (", 1)))
+    conn.execute(text(f"INSERT INTO {temp} ({columns}) SELECT {columns} FROM {table}"))
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.execute(text(f"ALTER TABLE {temp} RENAME TO {table}"))
+    for index in model.indexes:
+        index.create(conn)
+
+    last_id = conn.execute(text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {'name': table})
+    conn.execute(
+        text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+        {'name': table, 'seq': max(last_id, floor)}
+    )
+    return True
@@ -0,0 +1,205 @@
+"""
+Applying migrations
+
+upgrade_schema() runs at startup. When schema_migrations records every
+version as complete it returns after one query, without create_all's
+table-by-table introspection. Otherwise it creates missing tables, runs
+the pending schema steps (each idempotent, all in one transaction) and
+returns the migrations whose backfills still have to run. The server
+runs those in the background with MigrationRunner, in small committed
+batches with a pause between them, so migrations on a live database do
+not hold locks that block game writes; migrate_db.py --upgrade runs them
+in the foreground with progress output.
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+from sqlalchemy import select, insert, update, inspect
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.database import engine, AsyncSessionLocal
+from app.models import Base, SchemaMigration
+from .base import Migration
+from .versions import MIGRATIONS, LATEST_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+async def _applied_versions(conn: AsyncConnection) -> Optional[Dict[int, bool]]:
+    """Recorded versions -> backfill complete (None before migrations were tracked)"""
+    has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(SchemaMigration.__tablename__))
+    if not has_table:
+        return None
+    result = await conn.execute(select(SchemaMigration.version, SchemaMigration.completed_at))
+    return {version: completed_at is not None for version, completed_at in result}
+
+
+async def stamp_current(conn: AsyncConnection) -> None:
+    """
+    Record every version as complete (for a schema just created from the models)
+
+    Args:
+        conn: Connection inside a transaction
+    """
+    applied = await _applied_versions(conn) or {}
+    now = datetime.utcnow()
+    rows = [
+        {'version': migration.version, 'name': migration.name, 'applied_at': now, 'completed_at': now}
+        for migration in MIGRATIONS if migration.version not in applied
+    ]
+    if rows:
+        await conn.execute(insert(SchemaMigration), rows)
+
+
+async def upgrade_schema() -> List[Migration]:
+    """
+    Bring the schema up to date
+
+    Returns:
+        Migrations whose backfill has not completed yet, in version order
+    """
+    async with engine.begin() as conn:
+        applied = await _applied_versions(conn)
+    if applied is not None and all(applied.get(migration.version) for migration in MIGRATIONS):
+        logger.info(f"Database schema is current (version {LATEST_VERSION})")
+        return []
+
+    async with engine.begin() as conn:
+        fresh = not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table('users'))
+        await conn.run_sync(Base.metadata.create_all)
+
+        if fresh:
+            await stamp_current(conn)
+            logger.info(f"Database created at schema version {LATEST_VERSION}")
+            return []
+
+        applied = applied or {}
+        for migration in MIGRATIONS:
+            if migration.version in applied:
+                continue
+            if migration.schema:
+                await conn.run_sync(migration.schema)
+            now = datetime.utcnow()
+            await conn.execute(insert(SchemaMigration).values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=now,
+                completed_at=None if migration.backfill else now
+            ))
+            applied[migration.version] = migration.backfill is None
+            logger.info(f"Applied schema migration {migration.version}: {migration.name}")
+
+    return [migration for migration in MIGRATIONS if not applied[migration.version]]
+
+
+async def migration_status() -> List[Dict]:
+    """
+    Get the state of every migration
+
+    Returns:
+        List of dictionaries with version, name and status
+        ('complete', 'backfilling' or 'pending')
+    """
+    async with engine.begin() as conn:
+        applied = await _applied_versions(conn) or {}
+    status = []
+    for migration in MIGRATIONS:
+        if migration.version not in applied:
+            state = 'pending'
+        else:
+            state = 'complete' if applied[migration.version] else 'backfilling'
+        status.append({'version': migration.version, 'name': migration.name, 'status': state})
+    return status
+
+
+async def run_backfill(
+    migration: Migration,
+    batch_size: int,
+    pause: float = 0.0,
+    report: Optional[Callable[[Migration, int, int], None]] = None
+) -> None:
+    """
+    Run a migration's backfill to the end and mark the migration complete
+
+    Resumes from the last committed batch of an earlier run.
+
+    Args:
+        migration: Migration with a backfill
+        batch_size: Rows per batch (one transaction each)
+        pause: Seconds to sleep between batches
+        report: Called with (migration, done, total) after every batch
+    """
+    async for done, total in migration.backfill(AsyncSessionLocal, migration.job_name, batch_size):
+        if report:
+            report(migration, done, total)
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(SchemaMigration)
+            .where(SchemaMigration.version == migration.version)
+            .values(completed_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+class MigrationRunner:
+    """Runs pending backfills in the background while the server is up"""
+
+    def __init__(self, batch_size: int = 500, pause: float = 0.05):
+        """
+        Initialize runner
+
+        Args:
+            batch_size: Rows per backfill batch
+            pause: Seconds between batches (leaves room for game writes)
+        """
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, pending: List[Migration]) -> None:
+        """
+        Start backfilling
+
+        Args:
+            pending: Migrations returned by upgrade_schema()
+        """
+        if not pending:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(pending))
+            logger.info(f"Backfilling migrations: {', '.join(str(m.version) for m in pending)}")
+
+    async def stop(self) -> None:
+        """Stop backfilling (resumes from the last batch on next start)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _report(migration: Migration, done: int, total: int) -> None:
+        """Log backfill progress"""
+        logger.info(f"Migration {migration.version} backfill: {done}/{total}")
+
+    async def _run(self, pending: List[Migration]) -> None:
+        """Backfill loop (in version order; stops at the first failure)"""
+        for migration in pending:
+            try:
+                await run_backfill(migration, self.batch_size, self.pause, self._report)
+                logger.info(f"Migration {migration.version} complete: {migration.name}")
+            except Exception as e:
+                logger.error(f"Migration {migration.version} backfill failed: {str(e)}")
+                return
+
+
+# Global migration runner
+migration_runner = MigrationRunner(settings.MIGRATION_BATCH_SIZE, settings.MIGRATION_BATCH_PAUSE_SECONDS)
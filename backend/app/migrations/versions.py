@@ -0,0 +1,305 @@
+"""
+Schema versions
+
+Append new migrations to MIGRATIONS with the next version number; never
+renumber or edit one that has shipped. Versions 1-6 bring databases
+created from the original models up to date (fresh databases are created
+from the models directly and recorded as current).
+
+Aggregates maintained live when games end (recent form, bot-game and
+head-to-head records) are backfilled only from games finished before a
+cutoff: the earliest live update already in those tables, or otherwise
+the moment the schema step ran (before the server takes traffic). Games
+after it are counted by the server, so nothing is counted twice.
+"""
+from typing import AsyncIterator, Dict, List, Tuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, update, func, or_, case, literal, String
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.models import Game, UserStats, BotGameStats, HeadToHead, JobState
+from app.game.game_manager import GameManager
+from app.utils.metric_store import EPOCH, to_epoch
+from app.game.analysis import JOB_NAME as ANALYSIS_JOB
+from .base import Migration, add_column, create_index, drop_index, widen_to_text, rebuild_with_autoincrement
+
+# JobState row holding the aggregate backfill cutoff (epoch seconds)
+AGGREGATES_CUTOFF_JOB = 'migration_aggregates_cutoff'
+
+
+# ===== Schema steps =====
+
+def rating_columns(conn: Connection) -> None:
+    """Glicko-2 state on user stats"""
+    add_column(conn, 'user_stats', 'rating_deviation')
+    add_column(conn, 'user_stats', 'rating_volatility')
+
+
+def board_columns(conn: Connection) -> None:
+    """m,n,k boards, variants and bot seeds"""
+    for name in ('variant', 'board_rows', 'board_cols', 'win_length', 'bot_seed'):
+        add_column(conn, 'games', name)
+    add_column(conn, 'invitations', 'variant')
+    widen_to_text(conn, 'games', 'board_state')
+    widen_to_text(conn, 'moves', 'board_state_after')
+
+
+def packed_move_columns(conn: Connection) -> None:
+    """Packed move blobs, and the duplicate of the moves.game_id index"""
+    add_column(conn, 'games', 'move_positions')
+    add_column(conn, 'games', 'move_times')
+    drop_index(conn, 'moves', 'idx_moves_game')
+
+
+def log_and_metric_indexes(conn: Connection) -> None:
+    """Composite indexes for audit queries and metric range scans"""
+    create_index(conn, 'server_logs', 'idx_logs_user_timestamp')
+    create_index(conn, 'server_logs', 'idx_logs_game_timestamp')
+    create_index(conn, 'server_metrics', 'idx_metrics_name_timestamp')
+
+
+def record_aggregates_cutoff(conn: Connection) -> None:
+    """Fix the time before which finished games are backfilled into aggregates"""
+    table = JobState.__table__
+    if conn.execute(select(table.c.name).where(table.c.name == AGGREGATES_CUTOFF_JOB)).first():
+        return
+
+    earliest = [
+        conn.execute(select(func.min(HeadToHead.last_played_at))).scalar(),
+        conn.execute(select(func.min(BotGameStats.last_played_at))).scalar()
+    ]
+    cutoff = min([value for value in earliest if value is not None] or [datetime.utcnow()])
+    conn.execute(insert(table).values(
+        name=AGGREGATES_CUTOFF_JOB, high_water_mark=to_epoch(cutoff), updated_at=datetime.utcnow()
+    ))
+
+
+def recent_form_column(conn: Connection) -> None:
+    """Recent-form string on user stats"""
+    add_column(conn, 'user_stats', 'recent_form')
+    record_aggregates_cutoff(conn)
+
+
+def monotonic_game_ids(conn: Connection) -> None:
+    """
+    Never reuse game ids (SQLite AUTOINCREMENT)
+
+    The archive manifest, the analysis high-water mark and replay ETags all
+    assume a new game gets a higher id than any before it, which plain
+    SQLite breaks once the newest games are pruned. The sequence starts
+    above the analysis high-water mark, the highest game id recorded in
+    the database that may since have been deleted.
+    """
+    table = JobState.__table__
+    analyzed = conn.execute(
+        select(table.c.high_water_mark).where(table.c.name == ANALYSIS_JOB)
+    ).scalar()
+    rebuild_with_autoincrement(conn, 'games', floor=int(analyzed or 0))
+
+
+def last_rated_period_column(conn: Connection) -> None:
+    """Glicko-2 period of each player's last rated game, for live RD growth"""
+    add_column(conn, 'user_stats', 'last_rated_period')
+
+
+# ===== Backfills =====
+
+async def _job_state(db, job_name: str) -> JobState:
+    """Get (or create) a backfill's progress row"""
+    state = await db.get(JobState, job_name)
+    if state is None:
+        state = JobState(name=job_name, high_water_mark=0)
+        db.add(state)
+    return state
+
+
+async def _aggregates_cutoff(db) -> datetime:
+    """Finish time before which games are backfilled"""
+    state = await db.get(JobState, AGGREGATES_CUTOFF_JOB)
+    return EPOCH + timedelta(seconds=state.high_water_mark)
+
+
+async def backfill_recent_form(session_factory, job_name: str, batch_size: int) -> AsyncIterator[Tuple[int, int]]:
+    """
+    Prepend each user's results from before the cutoff to recent_form
+
+    Users are processed in id order, batch_size per transaction. The
+    prefix is added with one UPDATE per user, so results the server
+    appends meanwhile are kept (the string is trimmed on the next game).
+    """
+    size = settings.STATS_RECENT_FORM_SIZE
+    async with session_factory() as db:
+        cutoff = await _aggregates_cutoff(db)
+        state = await _job_state(db, job_name)
+        total = (await db.execute(
+            select(func.count()).select_from(UserStats).where(UserStats.user_id > state.high_water_mark)
+        )).scalar()
+    done = 0
+
+    while True:
+        async with session_factory() as db:
+            state = await _job_state(db, job_name)
+            user_ids = (await db.execute(
+                select(UserStats.user_id)
+                .where(UserStats.user_id > state.high_water_mark)
+                .order_by(UserStats.user_id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not user_ids:
+                return
+
+            for user_id in user_ids:
+                games = (await db.execute(
+                    select(Game.winner_id, Game.result)
+                    .where(or_(Game.player1_id == user_id, Game.player2_id == user_id))
+                    .where(Game.player2_id.isnot(None), Game.result.isnot(None), Game.finished_at < cutoff)
+                    .order_by(Game.finished_at.desc(), Game.id.desc())
+                    .limit(size)
+                )).all()
+                letters = ''.join(
+                    GameManager._form_letter(user_id, winner_id, result) for winner_id, result in reversed(games)
+                )
+                if letters:
+                    await db.execute(
+                        update(UserStats)
+                        .where(UserStats.user_id == user_id)
+                        .values(recent_form=literal(letters, String) + func.coalesce(UserStats.recent_form, ''))
+                    )
+
+            state.high_water_mark = user_ids[-1]
+            state.updated_at = datetime.utcnow()
+            await db.commit()
+
+        done += len(user_ids)
+        yield done, total
+
+
+async def _add_counts(db, model, key: Dict, counts: Dict, last: Dict, last_column) -> None:
+    """
+    Add counts to an aggregate row in one UPDATE, inserting the row if missing
+
+    The last_* values are only taken when they are newer than the row's.
+    """
+    newer = or_(last_column.is_(None), last_column < last[last_column.key])
+    values = {name: getattr(model, name) + value for name, value in counts.items()}
+    values.update({name: case((newer, value), else_=getattr(model, name)) for name, value in last.items()})
+
+    result = await db.execute(
+        update(model)
+        .where(*(getattr(model, name) == value for name, value in key.items()))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.add(model(**key, **counts, **last))
+
+
+async def backfill_bot_and_head_to_head(session_factory, job_name: str, batch_size: int) -> AsyncIterator[Tuple[int, int]]:
+    """
+    Count games finished before the cutoff into bot-game and head-to-head stats
+
+    Games are processed in id order, batch_size per transaction; each
+    batch's totals are added with one UPDATE (or INSERT) per row, so
+    concurrent updates from finishing games are not lost.
+    """
+    async with session_factory() as db:
+        cutoff = await _aggregates_cutoff(db)
+        state = await _job_state(db, job_name)
+        finished = (Game.result.isnot(None), Game.finished_at < cutoff)
+        total = (await db.execute(
+            select(func.count()).select_from(Game).where(*finished, Game.id > state.high_water_mark)
+        )).scalar()
+    done = 0
+
+    while True:
+        async with session_factory() as db:
+            state = await _job_state(db, job_name)
+            games = (await db.execute(
+                select(
+                    Game.id, Game.player1_id, Game.player2_id, Game.is_bot_game,
+                    Game.bot_difficulty, Game.winner_id, Game.result, Game.finished_at
+                )
+                .where(*finished, Game.id > state.high_water_mark)
+                .order_by(Game.id)
+                .limit(batch_size)
+            )).all()
+            if not games:
+                return
+
+            head_to_head: Dict[Tuple[int, int], Dict] = {}
+            bot_games: Dict[Tuple[int, str], Dict] = {}
+            for game_id, player1_id, player2_id, is_bot_game, difficulty, winner_id, result, finished_at in games:
+                if player2_id:
+                    low_id, high_id = sorted((player1_id, player2_id))
+                    counts = head_to_head.setdefault(
+                        (low_id, high_id), {'games': 0, 'low_wins': 0, 'high_wins': 0, 'draws': 0}
+                    )
+                    counts['games'] += 1
+                    if result == 'draw':
+                        counts['draws'] += 1
+                    elif winner_id == low_id:
+                        counts['low_wins'] += 1
+                    elif winner_id == high_id:
+                        counts['high_wins'] += 1
+                    counts['last'] = {'last_game_id': game_id, 'last_played_at': finished_at}
+                elif is_bot_game:
+                    counts = bot_games.setdefault(
+                        (player1_id, difficulty or 'medium'),
+                        {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'abandoned': 0}
+                    )
+                    counts['games'] += 1
+                    if result == 'draw':
+                        counts['draws'] += 1
+                    elif winner_id == player1_id:
+                        counts['wins'] += 1
+                    elif result == 'abandoned':
+                        counts['abandoned'] += 1
+                    else:
+                        counts['losses'] += 1
+                    counts['last'] = {'last_played_at': finished_at}
+
+            for (low_id, high_id), counts in head_to_head.items():
+                last = counts.pop('last')
+                await _add_counts(
+                    db, HeadToHead, {'user_low_id': low_id, 'user_high_id': high_id},
+                    counts, last, HeadToHead.last_played_at
+                )
+
+            games_vs_bot: Dict[int, int] = {}
+            for (user_id, difficulty), counts in bot_games.items():
+                last = counts.pop('last')
+                await _add_counts(
+                    db, BotGameStats, {'user_id': user_id, 'difficulty': difficulty},
+                    counts, last, BotGameStats.last_played_at
+                )
+                games_vs_bot[user_id] = games_vs_bot.get(user_id, 0) + counts['games']
+
+            for user_id, count in games_vs_bot.items():
+                await db.execute(
+                    update(UserStats)
+                    .where(UserStats.user_id == user_id)
+                    .values(games_vs_bot=func.coalesce(UserStats.games_vs_bot, 0) + count)
+                )
+
+            state.high_water_mark = games[-1].id
+            state.updated_at = datetime.utcnow()
+            await db.commit()
+
+        done += len(games)
+        yield done, total
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'glicko2 rating columns', schema=rating_columns),
+    Migration(2, 'board size, variant and bot seed columns', schema=board_columns),
+    Migration(3, 'packed move columns', schema=packed_move_columns),
+    Migration(4, 'log and metric composite indexes', schema=log_and_metric_indexes),
+    Migration(5, 'recent form', schema=recent_form_column, backfill=backfill_recent_form),
+    Migration(6, 'bot-game and head-to-head stats', schema=record_aggregates_cutoff, backfill=backfill_bot_and_head_to_head),
+    Migration(7, 'monotonic game ids', schema=monotonic_game_ids),
+    Migration(8, 'last rated period', schema=last_rated_period_column),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
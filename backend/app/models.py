@@ -2,7 +2,8 @@
 Database models for the application
 """
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Index
+    Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Index,
+    LargeBinary
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -40,15 +41,21 @@ class User(Base):
 class Game(Base):
     """Game model"""
     __tablename__ = "games"
+    __table_args__ = {'sqlite_autoincrement': True}  # ids are never reused (archive and analysis high-water marks)
 
     id = Column(Integer, primary_key=True, index=True)
     player1_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     player2_id = Column(Integer, ForeignKey("users.id"))
     is_bot_game = Column(Boolean, default=False)
     bot_difficulty = Column(String(20))  # 'easy', 'medium', 'hard'
+    bot_seed = Column(Integer)  # bot RNG seed, for replaying bot decisions
     winner_id = Column(Integer, ForeignKey("users.id"))
     status = Column(String(20), nullable=False, default="waiting", index=True)  # 'waiting', 'active', 'finished', 'abandoned'
-    board_state = Column(String(9), default="---------")
+    board_state = Column(Text, default="---------")  # one char per cell, row-major
+    variant = Column(String(20), default="classic")
+    board_rows = Column(Integer, default=3)
+    board_cols = Column(Integer, default=3)
+    win_length = Column(Integer, default=3)
     current_turn = Column(Integer, ForeignKey("users.id"))
     player1_symbol = Column(String(1), default="X")
     player2_symbol = Column(String(1), default="O")
@@ -56,6 +63,8 @@ class Game(Base):
     finished_at = Column(DateTime)
     abandon_by = Column(Integer, ForeignKey("users.id"))
     result = Column(String(20))  # 'win', 'draw', 'abandoned'
+    move_positions = Column(LargeBinary)  # packed move sequence (see game/move_codec.py)
+    move_times = Column(LargeBinary)  # packed move time deltas
 
     # Relationships
     player1 = relationship("User", foreign_keys=[player1_id], back_populates="games_as_player1")
@@ -71,9 +80,9 @@ class Move(Base):
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False, index=True)
     player_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    position = Column(Integer, nullable=False)  # 0-8
+    position = Column(Integer, nullable=False)  # cell index, 0-8 on classic board
     symbol = Column(String(1), nullable=False)  # 'X' or 'O'
-    board_state_after = Column(String(9), nullable=False)
+    board_state_after = Column(Text, nullable=False)
     move_number = Column(Integer, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
@@ -96,11 +105,43 @@ class UserStats(Base):
     win_streak = Column(Integer, default=0)
     best_win_streak = Column(Integer, default=0)
     ranking_points = Column(Integer, default=1000)  # ELO system
+    rating_deviation = Column(Float, default=350.0)  # Glicko-2 RD
+    rating_volatility = Column(Float, default=0.06)  # Glicko-2 volatility
+    last_rated_period = Column(Integer, nullable=True)  # Glicko-2 period of the last rated game
+    recent_form = Column(String(50), default="")  # last results vs players, oldest first ('W', 'L', 'D')
 
     # Relationships
     user = relationship("User", back_populates="stats")
 
 
+class BotGameStats(Base):
+    """Per-user results against the bot, by difficulty"""
+    __tablename__ = "bot_game_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    difficulty = Column(String(20), primary_key=True)
+    games = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    draws = Column(Integer, default=0)
+    abandoned = Column(Integer, default=0)
+    last_played_at = Column(DateTime)
+
+
+class HeadToHead(Base):
+    """Results between two players, keyed by the ordered pair (lower id first)"""
+    __tablename__ = "head_to_head"
+
+    user_low_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    user_high_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    games = Column(Integer, default=0)
+    low_wins = Column(Integer, default=0)
+    high_wins = Column(Integer, default=0)
+    draws = Column(Integer, default=0)
+    last_game_id = Column(Integer)
+    last_played_at = Column(DateTime)
+
+
 class Invitation(Base):
     """Game invitation model"""
     __tablename__ = "invitations"
@@ -109,6 +150,7 @@ class Invitation(Base):
     from_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     to_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     game_id = Column(Integer, ForeignKey("games.id"))
+    variant = Column(String(20), default="classic")  # board variant
     status = Column(String(20), default="pending", index=True)  # 'pending', 'accepted', 'rejected', 'expired'
     created_at = Column(DateTime, default=datetime.utcnow)
     responded_at = Column(DateTime)
@@ -169,8 +211,59 @@ class Session(Base):
     user = relationship("User", back_populates="sessions")
 
 
+class GameAnalysis(Base):
+    """Post-game analysis of a finished game (see game/analysis.py)"""
+    __tablename__ = "game_analysis"
+
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    player1_moves = Column(Integer, default=0)  # moves with a known perfect-play outcome
+    player1_best_moves = Column(Integer, default=0)
+    player1_blunders = Column(Integer, default=0)
+    player1_missed_wins = Column(Integer, default=0)
+    player1_accuracy = Column(Float)
+    player2_moves = Column(Integer, default=0)
+    player2_best_moves = Column(Integer, default=0)
+    player2_blunders = Column(Integer, default=0)
+    player2_missed_wins = Column(Integer, default=0)
+    player2_accuracy = Column(Float)
+    analyzed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class UserAnalysis(Base):
+    """Per-user totals of post-game analysis"""
+    __tablename__ = "user_analysis"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    games_analyzed = Column(Integer, default=0)
+    moves_analyzed = Column(Integer, default=0)
+    best_moves = Column(Integer, default=0)
+    blunders = Column(Integer, default=0)
+    missed_wins = Column(Integer, default=0)
+    accuracy = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class JobState(Base):
+    """Progress of resumable background jobs"""
+    __tablename__ = "job_state"
+
+    name = Column(String(50), primary_key=True)
+    high_water_mark = Column(Integer, default=0)  # every game id up to this is processed
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SchemaMigration(Base):
+    """Applied schema migrations (see migrations/)"""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)  # schema step done
+    completed_at = Column(DateTime)  # backfill done (set with applied_at when there is none)
+
+
 class ServerMetric(Base):
-    """Server metrics for dashboard"""
+    """Server metrics for dashboard - raw samples (see utils/metric_store.py)"""
     __tablename__ = "server_metrics"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -179,14 +272,36 @@ class ServerMetric(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
 
+class MetricRollup(Base):
+    """Aggregated server metric samples per time bucket"""
+    __tablename__ = "metric_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric_name = Column(String(50), nullable=False)
+    resolution = Column(String(4), nullable=False)  # '1m', '1h', '1d'
+    bucket_start = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    p50 = Column(Float, nullable=False)
+    p95 = Column(Float, nullable=False)
+    p99 = Column(Float, nullable=False)
+
+
 # Create indexes for better performance
 Index('idx_games_status', Game.status)
 Index('idx_games_player1', Game.player1_id)
 Index('idx_games_player2', Game.player2_id)
-Index('idx_moves_game', Move.game_id)
+Index('idx_head_to_head_high', HeadToHead.user_high_id)
 Index('idx_invitations_status', Invitation.status)
 Index('idx_invitations_to_user', Invitation.to_user_id)
 Index('idx_sessions_user', Session.user_id)
 Index('idx_sessions_token', Session.token)
 Index('idx_logs_timestamp', ServerLog.timestamp)
 Index('idx_logs_event_type', ServerLog.event_type)
+Index('idx_logs_user_timestamp', ServerLog.user_id, ServerLog.timestamp)
+Index('idx_logs_game_timestamp', ServerLog.game_id, ServerLog.timestamp)
+Index('idx_metrics_name_timestamp', ServerMetric.metric_name, ServerMetric.timestamp)
+Index('idx_rollups_series', MetricRollup.metric_name, MetricRollup.resolution, MetricRollup.bucket_start, unique=True)
+Index('idx_rollups_resolution_bucket', MetricRollup.resolution, MetricRollup.bucket_start)
@@ -2,27 +2,35 @@
 Main server application with FastAPI and Socket.IO
 """
 import socketio
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Header, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, update, delete, func
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
 
 from app.config import settings
-from app.database import init_db, get_db, AsyncSessionLocal
-from app.models import User, Game, UserStats, Invitation, Session as DBSession
+from app.database import init_db, get_db, get_read_db, pool_stats, AsyncSessionLocal
+from app.models import User, Game, UserStats, UserAnalysis, BotGameStats, HeadToHead, Invitation, Session as DBSession
 from app.auth import (
     hash_password,
     authenticate_user,
     create_access_token,
-    get_current_user
+    get_current_user_id,
+    get_current_user,
+    get_current_admin
 )
-from app.auth.session import SessionManager
-from app.game import game_manager
-from app.utils import setup_logging, log_event, validate_username, validate_password
+from app.auth.session import SessionManager, session_cleanup
+from app.game import game_manager, matchmaker, replay_cache, analysis_worker
+from app.game.replay import replay_etag
+from app.migrations import migration_runner
+from app.utils import setup_logging, log_event, validate_username, validate_password, metrics
+from app.utils.metric_store import metric_store, RESOLUTIONS
+from app.utils.log_partitions import log_maintenance, query_logs
+from app.utils.user_search import user_index
+from app.utils.export import EXPORT_TABLES, EXPORT_FORMATS, export_table, export_filename, export_media_type
 from pydantic import BaseModel
 
 # Setup logging
@@ -85,10 +93,37 @@ class LoginResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
-    await init_db()
+    pending_migrations = await init_db()
+
+    async with AsyncSessionLocal() as db:
+        expired = await SessionManager.cleanup_expired_sessions(db)
+        logger.info(f"Removed {expired} expired sessions")
+        await user_index.load(db)
+
+    matchmaker.start()
+    spectator_hub.start()
+    analysis_worker.start()
+    metric_store.start()
+    log_maintenance.start()
+    session_cleanup.start()
+    user_index.start()
+    migration_runner.start(pending_migrations)
     logger.info("Server started successfully")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks on shutdown"""
+    await matchmaker.stop()
+    await spectator_hub.stop()
+    await analysis_worker.stop()
+    await metric_store.stop()
+    await log_maintenance.stop()
+    await session_cleanup.stop()
+    await user_index.stop()
+    await migration_runner.stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -158,6 +193,7 @@ async def register(
     user_stats = UserStats(user_id=new_user.id)
     db.add(user_stats)
     await db.commit()
+    user_index.add(new_user.id, new_user.username, user_stats.ranking_points)
 
     # Log event
     await log_event("INFO", "USER_REGISTER", f"New user registered: {request.username}", db, new_user.id)
@@ -234,10 +270,33 @@ async def get_current_user_info(
     }
 
 
+@app.get("/api/users/search")
+async def search_users(
+    q: str,
+    limit: int = 10,
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Find users by username prefix (typeahead)
+
+    Served from the in-memory user index and connection table, and
+    authenticated from the token alone, without a database query.
+
+    Args:
+        q: Username prefix (case-insensitive, also matches after an underscore)
+        limit: Maximum results (1-50)
+
+    Returns:
+        List of users with id, username, ranking_points and is_online
+    """
+    limit = max(1, min(limit, 50))
+    return user_index.search(q, limit, lambda user_id: str(user_id) in active_connections)
+
+
 @app.get("/api/stats/leaderboard")
 async def get_leaderboard(
     limit: int = 10,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get top players leaderboard"""
     result = await db.execute(
@@ -267,7 +326,7 @@ async def get_leaderboard(
 async def get_game_history(
     limit: int = 20,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get game history for current user"""
     result = await db.execute(
@@ -315,7 +374,7 @@ async def get_game_history(
 @app.get("/api/stats")
 async def get_user_stats(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get statistics for current user"""
     result = await db.execute(
@@ -333,6 +392,8 @@ async def get_user_stats(
             "ranking_points": 1000
         }
 
+    analysis = await db.get(UserAnalysis, current_user.id)
+
     return {
         "total_games": stats.total_games,
         "wins": stats.wins,
@@ -341,8 +402,266 @@ async def get_user_stats(
         "win_rate": round(stats.wins / stats.total_games * 100, 1) if stats.total_games > 0 else 0,
         "ranking_points": stats.ranking_points,
         "current_streak": stats.win_streak,
-        "best_streak": stats.best_win_streak
+        "best_streak": stats.best_win_streak,
+        "accuracy": analysis.accuracy if analysis else None,
+        "games_analyzed": analysis.games_analyzed if analysis else 0,
+        "blunders": analysis.blunders if analysis else 0,
+        "missed_wins": analysis.missed_wins if analysis else 0,
+        "games_vs_bot": stats.games_vs_bot or 0,
+        "recent_form": recent_form_windows(stats.recent_form or "")
+    }
+
+
+def recent_form_windows(form: str) -> dict:
+    """
+    Summarize a recent-form string ('W'/'L'/'D', oldest first)
+
+    Returns:
+        Dictionary with the form string and wins/losses/draws over the
+        last 5, 10 and 20 results
+    """
+    windows = {"form": form[-settings.STATS_RECENT_FORM_SIZE:]}
+    for size in (5, 10, 20):
+        window = form[-size:]
+        windows[f"last_{size}"] = {
+            "games": len(window),
+            "wins": window.count("W"),
+            "losses": window.count("L"),
+            "draws": window.count("D")
+        }
+    return windows
+
+
+@app.get("/api/stats/bots")
+async def get_bot_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current user's results against the bot, by difficulty"""
+    result = await db.execute(
+        select(BotGameStats).where(BotGameStats.user_id == current_user.id)
+    )
+    return [
+        {
+            "difficulty": row.difficulty,
+            "games": row.games,
+            "wins": row.wins,
+            "losses": row.losses,
+            "draws": row.draws,
+            "abandoned": row.abandoned,
+            "win_rate": round(row.wins / row.games * 100, 1) if row.games > 0 else 0,
+            "last_played_at": row.last_played_at.isoformat() if row.last_played_at else None
+        }
+        for row in result.scalars()
+    ]
+
+
+def head_to_head_view(record: HeadToHead, user_id: int, opponent_name: Optional[str] = None) -> dict:
+    """Head-to-head record from one player's side"""
+    is_low = record.user_low_id == user_id
+    return {
+        "opponent_id": record.user_high_id if is_low else record.user_low_id,
+        "opponent": opponent_name,
+        "games": record.games,
+        "wins": record.low_wins if is_low else record.high_wins,
+        "losses": record.high_wins if is_low else record.low_wins,
+        "draws": record.draws,
+        "last_game_id": record.last_game_id,
+        "last_played_at": record.last_played_at.isoformat() if record.last_played_at else None
+    }
+
+
+@app.get("/api/stats/head-to-head")
+async def get_head_to_head_list(
+    limit: int = 20,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current user's head-to-head records, most played opponents first"""
+    result = await db.execute(
+        select(HeadToHead)
+        .where((HeadToHead.user_low_id == current_user.id) | (HeadToHead.user_high_id == current_user.id))
+        .order_by(HeadToHead.games.desc())
+        .limit(limit)
+    )
+    records = result.scalars().all()
+
+    opponent_ids = [
+        record.user_high_id if record.user_low_id == current_user.id else record.user_low_id
+        for record in records
+    ]
+    names = {}
+    if opponent_ids:
+        names = dict((await db.execute(
+            select(User.id, User.username).where(User.id.in_(opponent_ids))
+        )).all())
+
+    return [
+        head_to_head_view(record, current_user.id, names.get(opponent_id))
+        for record, opponent_id in zip(records, opponent_ids)
+    ]
+
+
+@app.get("/api/stats/head-to-head/{opponent_id}")
+async def get_head_to_head(
+    opponent_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current user's record against one opponent"""
+    low_id, high_id = sorted((current_user.id, opponent_id))
+    record = await db.get(HeadToHead, (low_id, high_id))
+    opponent = await db.get(User, opponent_id)
+    if opponent is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if record is None:
+        record = HeadToHead(user_low_id=low_id, user_high_id=high_id, games=0, low_wins=0, high_wins=0, draws=0)
+
+    return head_to_head_view(record, current_user.id, opponent.username)
+
+
+@app.get("/api/metrics")
+async def get_metrics(
+    current_user: User = Depends(get_current_admin)
+):
+    """Get in-process server metrics (admin only)"""
+    metrics.set_gauge('games.active', game_manager.get_active_game_count())
+    metrics.set_gauge('connections.active', len(active_connections))
+    pools = pool_stats()
+    for pool_name, stats in pools.items():
+        metrics.set_gauge(f'db.{pool_name}.in_use', stats['in_use'])
+
+    snapshot = metrics.snapshot()
+    snapshot['spectators_by_game'] = spectator_hub.get_counts()
+    snapshot['db_pools'] = pools
+    return snapshot
+
+
+@app.get("/api/admin/metrics/series")
+async def get_metric_series(
+    name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[str] = None,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get a metric time series for the dashboard (admin only)
+
+    Defaults to the last 24 hours; the resolution is picked from the range
+    unless given ('raw', '1m', '1h' or '1d').
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=1)
+    if resolution is not None and resolution != 'raw' and resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution: {resolution}")
+
+    return await metric_store.query(db, name, start, end, resolution)
+
+
+@app.get("/api/admin/logs")
+async def get_server_logs(
+    user_id: Optional[int] = None,
+    game_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    level: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get server logs newest first, paginated (admin only)
+
+    Pass next_cursor from a page as cursor to get the following page.
+    """
+    limit = max(1, min(limit, 500))
+    try:
+        return await query_logs(db, user_id, game_id, event_type, level, start, end, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/admin/export/{table}")
+async def export_data(
+    table: str,
+    format: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Stream a table export as CSV or NDJSON (admin only)
+
+    Tables: games, moves, server_logs, user_stats. start/end filter on the
+    table's time column, user_id on the user columns.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table: {table}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    logger.info(f"Export of {table} started by {current_user.username}")
+    return StreamingResponse(
+        export_table(table, format, start, end, user_id, compress=gzip),
+        media_type=export_media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(table, format, gzip)}"'}
+    )
+
+
+@app.get("/api/games/live")
+async def get_live_games(limit: int = 50):
+    """Get live games that can be spectated, most watched first"""
+    games = [
+        {**game, 'spectator_count': spectator_hub.get_spectator_count(game['game_id'])}
+        for game in game_manager.get_all_active_games()
+    ]
+    games.sort(key=lambda game: game['spectator_count'], reverse=True)
+    return games[:limit]
+
+
+@app.get("/api/games/{game_id}/replay")
+async def get_game_replay(
+    game_id: int,
+    evaluate: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the move timeline of a game, optionally with per-move bot evaluations
+
+    Replays of finished games are immutable: they carry an ETag, answer a
+    matching If-None-Match with 304, and may be cached by the client.
+    Evaluations are only built for finished games.
+    """
+    # Only finished games hand out ETags, so a match needs no lookup at all
+    etag = replay_etag(game_id, evaluate)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable"
     }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        replay = await replay_cache.get_replay(game_id, evaluate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if replay is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    if not replay.immutable:
+        return Response(
+            content=replay.body,
+            media_type="application/json",
+            headers={"Cache-Control": "no-store"}
+        )
+    return Response(content=replay.body, media_type="application/json", headers=headers)
 
 
 # ===== Socket.IO Events =====
@@ -358,6 +677,8 @@ async def connect(sid, environ, auth=None):
 async def disconnect(sid):
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {sid}")
+    spectator_hub.remove_sid(sid)
+    forget_client(sid)
 
     # Find user by sid and mark as offline
     user_id = None
@@ -367,7 +688,11 @@ async def disconnect(sid):
             break
 
     if user_id:
+        matchmaker.dequeue(user_id)
+
         async with AsyncSessionLocal() as db:
+            await SessionManager.release_socket(sid, db)
+
             result = await db.execute(select(User).where(User.id == user_id))
             user = result.scalar_one_or_none()
 
@@ -391,7 +716,7 @@ async def authenticate(sid, data):
 
     Args:
         sid: Socket ID
-        data: {"token": "jwt_token"}
+        data: {"token": "jwt_token", "protocol": "json" | "compact" (optional)}
     """
     try:
         token = data.get('token')
@@ -424,11 +749,25 @@ async def authenticate(sid, data):
 
             # Store connection (use string keys for consistency)
             active_connections[str(user_id)] = sid
+            protocol = negotiate_protocol(sid, data.get('protocol'))
+
+            # Session the client can resume after a reconnect (reused per token)
+            environ = sio.get_environ(sid) or {}
+            session = await SessionManager.open_session(
+                user_id=user.id,
+                token=token,
+                socket_id=sid,
+                ip_address=environ.get('REMOTE_ADDR'),
+                user_agent=environ.get('HTTP_USER_AGENT'),
+                db=db
+            )
 
             # Send success
             await sio.emit('authenticated', {
                 'user_id': user.id,
-                'username': user.username
+                'username': user.username,
+                'protocol': protocol,
+                'session_id': session.id
             }, room=sid)
 
             # Broadcast updated online users
@@ -443,6 +782,115 @@ async def authenticate(sid, data):
         await sio.emit('error', {'message': 'Authentication failed'}, room=sid)
 
 
+@sio.event
+async def logout(sid, data=None):
+    """
+    End the socket's session (it can no longer be resumed); the client
+    disconnects after the acknowledgement
+
+    Args:
+        sid: Socket ID
+        data: {"session_id": str} (optional; defaults to the socket's session)
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            session_id = (data or {}).get('session_id')
+            if session_id:
+                await db.execute(
+                    delete(DBSession).where(DBSession.id == session_id, DBSession.socket_id == sid)
+                )
+            else:
+                await db.execute(delete(DBSession).where(DBSession.socket_id == sid))
+            await db.commit()
+
+        return {'success': True}
+
+    except Exception as e:
+        logger.error(f"Logout error: {str(e)}")
+        await sio.emit('error', {'message': 'Logout failed'}, room=sid)
+
+
+@sio.event
+async def resume_session(sid, data):
+    """
+    Resume a session after a reconnect in one round-trip
+
+    Rebinds the session to the new socket, rejoins the game room and
+    returns only the moves the client missed. Answered with
+    session_expired once the session or the token it was opened with
+    has expired.
+
+    Args:
+        sid: Socket ID
+        data: {"session_id": str, "game_id": int, "last_seq": int,
+               "protocol": "json" | "compact" (optional)}
+    """
+    try:
+        session_id = data.get('session_id')
+        if not session_id:
+            await sio.emit('error', {'message': 'Session ID required'}, room=sid)
+            return
+
+        async with AsyncSessionLocal() as db:
+            user_id = await SessionManager.update_socket_id(session_id, sid, db)
+
+            if not user_id:
+                await db.rollback()
+                await sio.emit('session_expired', {}, room=sid)
+                return
+
+            await db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(is_online=True, socket_id=sid)
+            )
+            await db.commit()
+
+            active_connections[str(user_id)] = sid
+            protocol = negotiate_protocol(sid, data.get('protocol'))
+
+            resume_data = {
+                'user_id': user_id,
+                'session_id': session_id,
+                'protocol': protocol,
+                'game': None
+            }
+
+            game_id = data.get('game_id')
+            if game_id:
+                last_seq = int(data.get('last_seq') or 0)
+                game_state = await game_manager.get_game_state(game_id)
+
+                if game_state:
+                    if user_id in (game_state['player1_id'], game_state['player2_id']):
+                        await sio.enter_room(sid, f"game_{game_id}")
+                        resume_data['game'] = {**game_state, 'game_over': False}
+                else:
+                    result = await db.execute(select(Game).where(Game.id == game_id))
+                    game = result.scalar_one_or_none()
+                    if game and user_id in (game.player1_id, game.player2_id):
+                        if game.status == 'finished':
+                            resume_data['game'] = game_state_from_row(game)
+                        else:
+                            # Not loaded in memory (e.g. server restart): client rejoins
+                            resume_data['rejoin_required'] = True
+
+                if resume_data['game'] is not None:
+                    resume_data['game']['moves'] = await game_manager.get_moves_since(
+                        game_id, last_seq, db
+                    )
+
+            await sio.emit('session_resumed', resume_data, room=sid)
+
+            await log_event("INFO", "USER_RECONNECT", f"Session resumed for user {user_id}", db, user_id)
+
+        await broadcast_online_users()
+
+    except Exception as e:
+        logger.error(f"Resume error: {str(e)}")
+        await sio.emit('error', {'message': 'Failed to resume session'}, room=sid)
+
+
 async def broadcast_online_users():
     """Broadcast list of online users to all connected clients"""
     async with AsyncSessionLocal() as db:
@@ -464,7 +912,9 @@ async def broadcast_online_users():
 
 
 # Register game events
-from app.websocket.game_events import register_game_events
+from app.websocket.game_events import register_game_events, game_state_from_row
+from app.websocket.spectators import spectator_hub
+from app.websocket.protocol import negotiate_protocol, forget_client
 register_game_events(sio, active_connections)
 
 if __name__ == "__main__":
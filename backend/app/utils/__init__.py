@@ -3,6 +3,7 @@ Utility modules
 """
 from .logger import setup_logging, get_logger, log_event
 from .validators import validate_username, validate_password, validate_move
+from .metrics import MetricsRegistry, metrics
 
 __all__ = [
     "setup_logging",
@@ -10,5 +11,7 @@ __all__ = [
     "log_event",
     "validate_username",
     "validate_password",
-    "validate_move"
+    "validate_move",
+    "MetricsRegistry",
+    "metrics"
 ]
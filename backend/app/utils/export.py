@@ -0,0 +1,262 @@
+"""
+Streaming table exports (CSV / NDJSON, optionally gzipped)
+
+Rows are read batch by batch through the read pool and encoded as they
+arrive, so an export of any size runs in constant memory. On PostgreSQL the rows come from one
+server-side cursor; on SQLite each batch is its own short keyset query
+(id > last id) so no read transaction stays open between batches to block
+writers.
+
+Packed games (MOVE_STORAGE = 'packed') have no rows in the moves table;
+the moves export expands their move blobs after the row-stored moves.
+Games packed by migrate_db.py --pack-moves keep their rows unless
+--delete-move-rows was given; those are exported from the rows only.
+Likewise the server_logs export continues through the day partitions.
+"""
+from typing import AsyncIterator, List, Optional
+from datetime import datetime, timedelta
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select, or_, exists, LargeBinary
+
+from app.database import ReadSessionLocal
+from app.models import Game, Move, ServerLog, UserStats
+from app.game.move_codec import decode_positions, decode_times
+from .log_partitions import LEGACY_PARTITION, list_partitions, partition_table, partition_key
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# table -> (model, key column, time column, user columns)
+EXPORT_TABLES = {
+    'games': (Game, Game.id, Game.started_at, (Game.player1_id, Game.player2_id)),
+    'moves': (Move, Move.id, Move.timestamp, (Move.player_id,)),
+    'server_logs': (ServerLog, ServerLog.id, ServerLog.timestamp, (ServerLog.user_id,)),
+    'user_stats': (UserStats, UserStats.user_id, None, (UserStats.user_id,))
+}
+
+
+def export_columns(table: str) -> List[str]:
+    """
+    Get the exported columns of a table (binary columns are left out)
+
+    Args:
+        table: Table name
+
+    Returns:
+        Column names in table order
+    """
+    model = EXPORT_TABLES[table][0]
+    return [
+        column.name for column in model.__table__.columns
+        if not isinstance(column.type, LargeBinary)
+    ]
+
+
+def _value(value):
+    """Make a column value JSON/CSV friendly"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Encoder:
+    """Encode rows as CSV or NDJSON chunks, optionally through gzip"""
+
+    def __init__(self, columns: List[str], file_format: str, compress: bool):
+        """
+        Initialize encoder
+
+        Args:
+            columns: Column names
+            file_format: 'csv' or 'ndjson'
+            compress: gzip the output
+        """
+        self.columns = columns
+        self.file_format = file_format
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def _out(self, data: bytes) -> bytes:
+        """Pass encoded data through gzip when compressing"""
+        return self._gzip.compress(data) if self._gzip else data
+
+    def header(self) -> bytes:
+        """CSV header line (nothing for NDJSON)"""
+        if self.file_format != 'csv':
+            return b''
+        return self.rows([self.columns])
+
+    def rows(self, rows: List[List]) -> bytes:
+        """Encode a batch of rows (values in column order)"""
+        if self.file_format == 'csv':
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            data = buffer.getvalue()
+        else:
+            data = ''.join(
+                json.dumps(dict(zip(self.columns, row)), separators=(',', ':')) + '\n'
+                for row in rows
+            )
+        return self._out(data.encode())
+
+    def finish(self) -> bytes:
+        """Flush the gzip stream"""
+        return self._gzip.flush() if self._gzip else b''
+
+
+async def _iter_batches(stmt, key_column, batch_size: int) -> AsyncIterator[List]:
+    """Yield result rows in batches (server-side cursor, or keyset pages on SQLite)"""
+    async with ReadSessionLocal() as db:
+        if db.bind.dialect.name != 'sqlite':
+            stream = await db.stream(stmt.order_by(key_column).execution_options(yield_per=batch_size))
+            async for rows in stream.partitions():
+                yield rows
+            return
+
+        last_key = None
+        while True:
+            page = stmt.order_by(key_column).limit(batch_size)
+            if last_key is not None:
+                page = page.where(key_column > last_key)
+            rows = (await db.execute(page)).all()
+            # End the read transaction before handing the batch out
+            await db.rollback()
+            if not rows:
+                return
+            yield rows
+            last_key = rows[-1][0]
+
+
+def _filtered(stmt, time_column, user_columns, start: Optional[datetime], end: Optional[datetime], user_id: Optional[int]):
+    """Apply the time-range and user filters"""
+    if time_column is not None:
+        if start is not None:
+            stmt = stmt.where(time_column >= start)
+        if end is not None:
+            stmt = stmt.where(time_column < end)
+    if user_id is not None:
+        stmt = stmt.where(or_(*(column == user_id for column in user_columns)))
+    return stmt
+
+
+async def _packed_moves(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    user_id: Optional[int],
+    batch_size: int
+) -> AsyncIterator[List[List]]:
+    """Yield move rows expanded from packed games without move rows, in game order"""
+    stmt = select(
+        Game.id, Game.player1_id, Game.player2_id, Game.started_at,
+        Game.move_positions, Game.move_times
+    ).where(Game.move_positions.isnot(None), ~exists().where(Move.game_id == Game.id))
+    if end is not None:
+        stmt = stmt.where(Game.started_at < end)
+    if user_id is not None:
+        stmt = stmt.where(or_(Game.player1_id == user_id, Game.player2_id == user_id))
+
+    async for games in _iter_batches(stmt, Game.id, batch_size):
+        rows = []
+        for game_id, player1_id, player2_id, started_at, positions, times in games:
+            offsets = decode_times(times)
+            for index, position in enumerate(decode_positions(positions)):
+                symbol = 'X' if index % 2 == 0 else 'O'
+                player_id = player1_id if symbol == 'X' else (player2_id or 0)
+                timestamp = None
+                if started_at and index < len(offsets):
+                    timestamp = started_at + timedelta(milliseconds=offsets[index])
+
+                if user_id is not None and player_id != user_id:
+                    continue
+                if timestamp is not None and (
+                    (start is not None and timestamp < start) or (end is not None and timestamp >= end)
+                ):
+                    continue
+                # Same columns as the moves table; boards are not rebuilt here
+                rows.append([None, game_id, player_id, position, symbol, None, index + 1, _value(timestamp)])
+        if rows:
+            yield rows
+
+
+async def export_table(
+    table: str,
+    file_format: str = 'csv',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    compress: bool = False,
+    batch_size: int = 5000
+) -> AsyncIterator[bytes]:
+    """
+    Stream a table export
+
+    Args:
+        table: 'games', 'moves', 'server_logs' or 'user_stats'
+        file_format: 'csv' or 'ndjson'
+        start: Only rows at or after this time
+        end: Only rows before this time
+        user_id: Only rows involving this user
+        compress: gzip the output
+        batch_size: Rows per fetch
+
+    Returns:
+        Async iterator of encoded chunks
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+
+    model, key_column, time_column, user_columns = EXPORT_TABLES[table]
+    columns = export_columns(table)
+    encoder = _Encoder(columns, file_format, compress)
+
+    yield encoder.header()
+
+    # The key column is selected first for keyset paging
+    stmt = select(key_column, *(model.__table__.columns[name] for name in columns if name != key_column.name))
+    order = [key_column.name] + [name for name in columns if name != key_column.name]
+    positions = [order.index(name) for name in columns]
+    stmt = _filtered(stmt, time_column, user_columns, start, end, user_id)
+
+    async for rows in _iter_batches(stmt, key_column, batch_size):
+        yield encoder.rows([[_value(row[i]) for i in positions] for row in rows])
+
+    if table == 'moves':
+        async for rows in _packed_moves(start, end, user_id, batch_size):
+            yield encoder.rows(rows)
+
+    if table == 'server_logs':
+        async with ReadSessionLocal() as db:
+            keys = await list_partitions(db)
+        for key in keys:
+            if key == LEGACY_PARTITION:
+                continue  # server_logs itself, exported above
+            if start is not None and key < partition_key(start.date()):
+                continue
+            if end is not None and key > partition_key(end.date()):
+                continue
+            partition = partition_table(key)
+            stmt = _filtered(
+                select(*(partition.c[name] for name in columns)),
+                partition.c.timestamp, (partition.c.user_id,), start, end, user_id
+            )
+            async for rows in _iter_batches(stmt, partition.c.id, batch_size):
+                yield encoder.rows([[_value(value) for value in row] for row in rows])
+
+    yield encoder.finish()
+
+
+def export_filename(table: str, file_format: str, compress: bool) -> str:
+    """Download file name of an export"""
+    suffix = '.gz' if compress else ''
+    return f"{table}-{datetime.utcnow():%Y%m%dT%H%M%S}.{file_format}{suffix}"
+
+
+def export_media_type(file_format: str, compress: bool) -> str:
+    """Response media type of an export"""
+    if compress:
+        return 'application/gzip'
+    return 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
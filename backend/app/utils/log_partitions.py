@@ -0,0 +1,338 @@
+"""
+Day-partitioned server logs
+
+With LOG_PARTITIONING on, log_event writes each event to a table for its
+UTC day (server_logs_YYYYMMDD) instead of server_logs. Every partition has
+(user_id, timestamp) and (game_id, timestamp) indexes, so an audit query
+only ever searches one day's index per partition it visits, however much
+log volume has piled up overall. Expired days are removed by dropping
+their table (optionally after writing it to a gzipped NDJSON file), which
+costs the same for ten rows or ten million.
+
+Rows written to server_logs before partitioning was enabled stay there
+and are read as the oldest partition.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import date, datetime, timedelta
+import asyncio
+import gzip
+import json
+import logging
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, DateTime, Text, Index,
+    select, insert, delete, inspect
+)
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import ServerLog
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'server_logs_'
+
+# Cursor key of the unpartitioned server_logs table (sorts before every day)
+LEGACY_PARTITION = '00000000'
+
+LOG_COLUMNS = ['id', 'level', 'event_type', 'user_id', 'game_id', 'message', 'ip_address', 'user_agent', 'timestamp']
+
+_metadata = MetaData()
+_tables: Dict[str, Table] = {}
+_created: Set[str] = set()
+
+
+def partition_key(day: date) -> str:
+    """Partition key of a day (YYYYMMDD)"""
+    return f"{day:%Y%m%d}"
+
+
+def partition_table(key: str) -> Table:
+    """
+    Get the table of a partition
+
+    Args:
+        key: Partition key (YYYYMMDD, or LEGACY_PARTITION for server_logs)
+
+    Returns:
+        SQLAlchemy table
+    """
+    if key == LEGACY_PARTITION:
+        return ServerLog.__table__
+
+    table = _tables.get(key)
+    if table is None:
+        name = PARTITION_PREFIX + key
+        table = Table(
+            name, _metadata,
+            Column('id', Integer, primary_key=True),
+            Column('level', String(10), nullable=False),
+            Column('event_type', String(50), nullable=False),
+            Column('user_id', Integer),
+            Column('game_id', Integer),
+            Column('message', Text, nullable=False),
+            Column('ip_address', String(45)),
+            Column('user_agent', Text),
+            Column('timestamp', DateTime, nullable=False),
+            Index(f'idx_{name}_user_timestamp', 'user_id', 'timestamp'),
+            Index(f'idx_{name}_game_timestamp', 'game_id', 'timestamp'),
+            Index(f'idx_{name}_timestamp', 'timestamp')
+        )
+        _tables[key] = table
+    return table
+
+
+async def ensure_partition(db: AsyncSession, key: str) -> Table:
+    """
+    Create a partition table if it does not exist yet
+
+    Args:
+        db: Database session
+        key: Partition key
+
+    Returns:
+        SQLAlchemy table
+    """
+    table = partition_table(key)
+    if key not in _created:
+        await db.run_sync(lambda session: table.create(session.connection(), checkfirst=True))
+        _created.add(key)
+    return table
+
+
+async def list_partitions(db: AsyncSession) -> List[str]:
+    """
+    Get the existing partition keys, oldest first (legacy table included)
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of partition keys
+    """
+    names = await db.run_sync(lambda session: inspect(session.connection()).get_table_names())
+    keys = sorted(
+        name[len(PARTITION_PREFIX):] for name in names
+        if name.startswith(PARTITION_PREFIX) and name[len(PARTITION_PREFIX):].isdigit()
+    )
+    return [LEGACY_PARTITION] + keys
+
+
+async def write_log(db: AsyncSession, values: Dict) -> None:
+    """
+    Insert a log row into its day's partition
+
+    Args:
+        db: Database session
+        values: Column values (timestamp defaults to now)
+    """
+    values.setdefault('timestamp', datetime.utcnow())
+    table = await ensure_partition(db, partition_key(values['timestamp'].date()))
+    await db.execute(insert(table).values(**values))
+
+
+def _row(key: str, row) -> Dict:
+    """Serialize a log row"""
+    entry = dict(zip(LOG_COLUMNS, row))
+    entry['timestamp'] = entry['timestamp'].isoformat() if entry['timestamp'] else None
+    entry['cursor'] = f"{key}:{entry['id']}"
+    return entry
+
+
+async def query_logs(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    game_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    level: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Dict:
+    """
+    Get log rows newest first, one page at a time
+
+    Only partitions overlapping [start, end) are visited, newest first,
+    each with one indexed query, until the page is full.
+
+    Args:
+        db: Database session
+        user_id: Only this user's events
+        game_id: Only this game's events
+        event_type: Only this event type
+        level: Only this level
+        start: Only events at or after this time
+        end: Only events before this time
+        cursor: next_cursor of the previous page
+        limit: Page size
+
+    Returns:
+        Dictionary with logs and next_cursor (None on the last page)
+    """
+    after: Optional[Tuple[str, int]] = None
+    if cursor:
+        key, _, last_id = cursor.partition(':')
+        after = (key, int(last_id))
+
+    keys = await list_partitions(db)
+    if start is not None:
+        first = partition_key(start.date())
+        keys = [key for key in keys if key >= first or key == LEGACY_PARTITION]
+    if end is not None:
+        last = partition_key(end.date())
+        keys = [key for key in keys if key <= last]
+    if after is not None:
+        keys = [key for key in keys if key <= after[0]]
+
+    logs: List[Dict] = []
+    for key in reversed(keys):
+        table = partition_table(key)
+        stmt = select(*(table.c[name] for name in LOG_COLUMNS))
+        if user_id is not None:
+            stmt = stmt.where(table.c.user_id == user_id)
+        if game_id is not None:
+            stmt = stmt.where(table.c.game_id == game_id)
+        if event_type is not None:
+            stmt = stmt.where(table.c.event_type == event_type)
+        if level is not None:
+            stmt = stmt.where(table.c.level == level.upper())
+        if start is not None:
+            stmt = stmt.where(table.c.timestamp >= start)
+        if end is not None:
+            stmt = stmt.where(table.c.timestamp < end)
+        if after is not None and key == after[0]:
+            stmt = stmt.where(table.c.id < after[1])
+
+        result = await db.execute(stmt.order_by(table.c.id.desc()).limit(limit - len(logs) + 1))
+        for row in result:
+            if len(logs) == limit:
+                return {'logs': logs, 'next_cursor': logs[-1]['cursor']}
+            logs.append(_row(key, row))
+
+    return {'logs': logs, 'next_cursor': None}
+
+
+async def _archive_partition(db: AsyncSession, key: str, archive_dir: str) -> str:
+    """Write a partition to <archive_dir>/server_logs_<key>.ndjson.gz"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{PARTITION_PREFIX}{key}.ndjson.gz")
+    table = partition_table(key)
+
+    stream = await db.stream(
+        select(*(table.c[name] for name in LOG_COLUMNS))
+        .order_by(table.c.id)
+        .execution_options(yield_per=5000)
+    )
+    with gzip.open(f"{path}.tmp", 'wt') as f:
+        async for rows in stream.partitions():
+            for row in rows:
+                entry = dict(zip(LOG_COLUMNS, row))
+                entry['timestamp'] = entry['timestamp'].isoformat() if entry['timestamp'] else None
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+async def drop_expired_partitions(
+    db: AsyncSession,
+    retention_days: int,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Drop day partitions older than the retention window
+
+    Args:
+        db: Database session
+        retention_days: Days of logs kept (0 keeps everything)
+        archive_dir: Write each partition to a gzipped NDJSON file first
+        today: Current day (defaults to today, UTC)
+
+    Returns:
+        Dropped partition keys
+    """
+    if retention_days <= 0:
+        return []
+
+    cutoff_day = (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+    cutoff = partition_key(cutoff_day)
+    dropped = []
+
+    for key in await list_partitions(db):
+        if key == LEGACY_PARTITION or key >= cutoff:
+            continue
+        if archive_dir:
+            path = await _archive_partition(db, key, archive_dir)
+            logger.info(f"Archived log partition {key} to {path}")
+
+        table = partition_table(key)
+        await db.run_sync(lambda session: table.drop(session.connection(), checkfirst=True))
+        _created.discard(key)
+        _tables.pop(key, None)
+        dropped.append(key)
+
+    # Rows from before partitioning are trimmed the slow way
+    await db.execute(delete(ServerLog).where(ServerLog.timestamp < datetime.combine(cutoff_day, datetime.min.time())))
+    await db.commit()
+    return dropped
+
+
+class LogMaintenance:
+    """Periodic log retention and next-day partition creation"""
+
+    def __init__(self, interval: float = 3600.0):
+        """
+        Initialize maintenance task
+
+        Args:
+            interval: Seconds between passes
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the maintenance task"""
+        if not settings.LOG_PARTITIONING:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Log maintenance started")
+
+    async def stop(self) -> None:
+        """Stop the maintenance task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_pass(self) -> List[str]:
+        """Create tomorrow's partition ahead of time and drop expired ones"""
+        async with AsyncSessionLocal() as db:
+            tomorrow = datetime.utcnow().date() + timedelta(days=1)
+            await ensure_partition(db, partition_key(tomorrow))
+            await db.commit()
+            dropped = await drop_expired_partitions(
+                db, settings.LOG_RETENTION_DAYS, settings.LOG_ARCHIVE_DIR or None
+            )
+        if dropped:
+            logger.info(f"Dropped log partitions: {', '.join(dropped)}")
+        return dropped
+
+    async def _run(self) -> None:
+        """Maintenance loop"""
+        while True:
+            try:
+                await self.run_pass()
+            except Exception as e:
+                logger.error(f"Log maintenance failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+
+# Global log maintenance task
+log_maintenance = LogMaintenance()
@@ -7,7 +7,9 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import ServerLog
+from .log_partitions import write_log
 
 
 def setup_logging(log_file: str = "logs/server.log", log_level: str = "INFO"):
@@ -72,7 +74,7 @@ async def log_event(
         user_agent: Optional user agent
     """
     try:
-        log = ServerLog(
+        values = dict(
             level=level.upper(),
             event_type=event_type,
             user_id=user_id,
@@ -82,7 +84,10 @@ async def log_event(
             user_agent=user_agent
         )
 
-        db.add(log)
+        if settings.LOG_PARTITIONING:
+            await write_log(db, values)
+        else:
+            db.add(ServerLog(**values))
         await db.commit()
 
         # Also log to file
@@ -0,0 +1,368 @@
+"""
+Metric time series - batched raw samples, rollups and retention
+
+Samples (the metrics registry's gauges and per-interval counter deltas,
+plus anything passed to record()) are buffered in memory and written to
+server_metrics in one batched INSERT per sample interval. A rollup pass
+turns closed time buckets of raw samples into 1-minute, 1-hour and 1-day
+aggregates (count/sum/min/max/p50/p95/p99) in metric_rollups, then drops
+raw samples and rollups past their retention.
+
+Every rollup level is computed from raw samples, so percentiles are exact;
+raw retention only has to cover the open 1-day bucket. Range queries read
+the finest resolution that keeps the result under METRICS_MAX_POINTS, so a
+month of one metric is a few hundred rollup rows.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import math
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import ServerMetric, MetricRollup, JobState
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+# resolution -> bucket width in seconds
+RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}
+
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+def to_epoch(value: datetime) -> int:
+    """Seconds since the epoch of a naive UTC datetime"""
+    return int((value - EPOCH).total_seconds())
+
+
+def bucket_start(value: datetime, width: int) -> datetime:
+    """Start of the bucket containing a time"""
+    return EPOCH + timedelta(seconds=to_epoch(value) // width * width)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """
+    Aggregate a bucket of samples
+
+    Args:
+        values: Sample values
+
+    Returns:
+        Dictionary with count, sum, min, max and nearest-rank percentiles
+    """
+    ordered = sorted(values)
+    count = len(ordered)
+    summary = {
+        'count': count,
+        'sum': sum(ordered),
+        'min': ordered[0],
+        'max': ordered[-1]
+    }
+    for name, fraction in PERCENTILES:
+        summary[name] = ordered[max(0, math.ceil(fraction * count) - 1)]
+    return summary
+
+
+def pick_resolution(start: datetime, end: datetime, max_points: int) -> str:
+    """
+    Finest resolution that keeps a range under max_points buckets
+
+    Args:
+        start: Range start
+        end: Range end
+        max_points: Maximum points wanted
+
+    Returns:
+        'raw', '1m', '1h' or '1d'
+    """
+    span = max(1.0, (end - start).total_seconds())
+    if span / settings.METRICS_SAMPLE_INTERVAL_SECONDS <= max_points and settings.METRICS_SAMPLE_INTERVAL_SECONDS > 0:
+        return 'raw'
+    for resolution, width in RESOLUTIONS.items():
+        if span / width <= max_points:
+            return resolution
+    return '1d'
+
+
+class MetricStore:
+    """Buffered writer, rollup/retention jobs and range queries for metric series"""
+
+    def __init__(self, sample_interval: float = 10.0, rollup_interval: float = 60.0):
+        """
+        Initialize store
+
+        Args:
+            sample_interval: Seconds between registry samples and batched writes (0 = off)
+            rollup_interval: Seconds between rollup and retention passes
+        """
+        self.sample_interval = sample_interval
+        self.rollup_interval = rollup_interval
+        self._buffer: List[Dict] = []
+        self._last_counters: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, name: str, value: float, timestamp: Optional[datetime] = None) -> None:
+        """
+        Buffer one sample (written with the next batch)
+
+        Args:
+            name: Metric name
+            value: Sample value
+            timestamp: Sample time (defaults to now)
+        """
+        self._buffer.append({
+            'metric_name': name,
+            'metric_value': value,
+            'timestamp': timestamp or datetime.utcnow()
+        })
+
+    def sample_registry(self) -> None:
+        """Buffer the current gauges and each counter's change since the last sample"""
+        now = datetime.utcnow()
+        snapshot = metrics.snapshot()
+        for name, value in snapshot['gauges'].items():
+            self.record(name, value, now)
+        for name, value in snapshot['counters'].items():
+            self.record(name, value - self._last_counters.get(name, 0), now)
+            self._last_counters[name] = value
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Write buffered samples in one batched INSERT
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of samples written
+        """
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        await db.execute(insert(ServerMetric), batch)
+        await db.commit()
+        return len(batch)
+
+    async def rollup(self, db: AsyncSession, resolution: str, now: Optional[datetime] = None) -> int:
+        """
+        Aggregate closed buckets of raw samples into one resolution
+
+        Buckets are closed two sample intervals after they end, so the last
+        batch of samples is in. Progress is a JobState high-water mark
+        (epoch seconds) per resolution.
+
+        Args:
+            db: Database session
+            resolution: '1m', '1h' or '1d'
+            now: Current time (defaults to now)
+
+        Returns:
+            Number of rollup rows written
+        """
+        width = RESOLUTIONS[resolution]
+        now = now or datetime.utcnow()
+        end = bucket_start(now - timedelta(seconds=2 * self.sample_interval), width)
+
+        job_name = f"metrics_rollup_{resolution}"
+        state = await db.get(JobState, job_name)
+        if state is None:
+            first = (await db.execute(select(func.min(ServerMetric.timestamp)))).scalar()
+            if first is None:
+                return 0
+            state = JobState(name=job_name, high_water_mark=to_epoch(bucket_start(first, width)))
+            db.add(state)
+
+        start = EPOCH + timedelta(seconds=state.high_water_mark)
+        if start >= end:
+            return 0
+
+        # Ordered by metric, then time, so each bucket's samples arrive together
+        stmt = (
+            select(ServerMetric.metric_name, ServerMetric.metric_value, ServerMetric.timestamp)
+            .where(ServerMetric.timestamp >= start, ServerMetric.timestamp < end)
+            .order_by(ServerMetric.metric_name, ServerMetric.timestamp)
+            .execution_options(yield_per=10000)
+        )
+
+        rows: List[Dict] = []
+        current: Optional[Tuple[str, datetime]] = None
+        values: List[float] = []
+
+        def close_bucket() -> None:
+            if current is not None and values:
+                rows.append({
+                    'metric_name': current[0],
+                    'resolution': resolution,
+                    'bucket_start': current[1],
+                    **summarize(values)
+                })
+
+        # Replace anything a crashed earlier pass wrote for this range
+        await db.execute(
+            delete(MetricRollup)
+            .where(MetricRollup.resolution == resolution)
+            .where(MetricRollup.bucket_start >= start, MetricRollup.bucket_start < end)
+        )
+
+        stream = await db.stream(stmt)
+        async for partition in stream.partitions():
+            for name, value, timestamp in partition:
+                key = (name, bucket_start(timestamp, width))
+                if key != current:
+                    close_bucket()
+                    current, values = key, []
+                values.append(value)
+        close_bucket()
+
+        # Written after the cursor is done (one bucket per metric per row)
+        for i in range(0, len(rows), 1000):
+            await db.execute(insert(MetricRollup), rows[i:i + 1000])
+
+        state.high_water_mark = to_epoch(end)
+        state.updated_at = datetime.utcnow()
+        await db.commit()
+        return len(rows)
+
+    async def apply_retention(self, db: AsyncSession, now: Optional[datetime] = None) -> None:
+        """
+        Delete raw samples and rollups past their retention
+
+        Args:
+            db: Database session
+            now: Current time (defaults to now)
+        """
+        now = now or datetime.utcnow()
+        await db.execute(
+            delete(ServerMetric)
+            .where(ServerMetric.timestamp < now - timedelta(hours=settings.METRICS_RAW_RETENTION_HOURS))
+        )
+
+        retention_days = {
+            '1m': settings.METRICS_1M_RETENTION_DAYS,
+            '1h': settings.METRICS_1H_RETENTION_DAYS,
+            '1d': settings.METRICS_1D_RETENTION_DAYS
+        }
+        for resolution, days in retention_days.items():
+            if days <= 0:
+                continue
+            await db.execute(
+                delete(MetricRollup)
+                .where(MetricRollup.resolution == resolution)
+                .where(MetricRollup.bucket_start < now - timedelta(days=days))
+            )
+        await db.commit()
+
+    async def run_rollups(self, db: AsyncSession) -> Dict[str, int]:
+        """Run every rollup level, then retention"""
+        written = {resolution: await self.rollup(db, resolution) for resolution in RESOLUTIONS}
+        await self.apply_retention(db)
+        return written
+
+    async def query(
+        self,
+        db: AsyncSession,
+        name: str,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None
+    ) -> Dict:
+        """
+        Get a metric series over a time range
+
+        Args:
+            db: Database session
+            name: Metric name
+            start: Range start
+            end: Range end
+            resolution: 'raw', '1m', '1h' or '1d' (picked from the range if omitted)
+
+        Returns:
+            Dictionary with the resolution and the points (raw: timestamp and
+            value; rollups: bucket start, count, avg, min, max and percentiles)
+        """
+        resolution = resolution or pick_resolution(start, end, settings.METRICS_MAX_POINTS)
+
+        if resolution == 'raw':
+            result = await db.execute(
+                select(ServerMetric.timestamp, ServerMetric.metric_value)
+                .where(ServerMetric.metric_name == name)
+                .where(ServerMetric.timestamp >= start, ServerMetric.timestamp < end)
+                .order_by(ServerMetric.timestamp)
+            )
+            points = [{'timestamp': timestamp.isoformat(), 'value': value} for timestamp, value in result]
+            return {'metric': name, 'resolution': resolution, 'points': points}
+
+        result = await db.execute(
+            select(MetricRollup)
+            .where(MetricRollup.metric_name == name, MetricRollup.resolution == resolution)
+            .where(MetricRollup.bucket_start >= bucket_start(start, RESOLUTIONS[resolution]))
+            .where(MetricRollup.bucket_start < end)
+            .order_by(MetricRollup.bucket_start)
+        )
+        points = [
+            {
+                'timestamp': row.bucket_start.isoformat(),
+                'count': row.count,
+                'sum': row.sum,
+                'avg': row.sum / row.count,
+                'min': row.min,
+                'max': row.max,
+                'p50': row.p50,
+                'p95': row.p95,
+                'p99': row.p99
+            }
+            for row in result.scalars()
+        ]
+        return {'metric': name, 'resolution': resolution, 'points': points}
+
+    def start(self) -> None:
+        """Start the sampling and rollup task"""
+        if self.sample_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Metric store started")
+
+    async def stop(self) -> None:
+        """Stop the task and write what is still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await self.flush(db)
+        except Exception as e:
+            logger.error(f"Metric flush on shutdown failed: {str(e)}")
+
+    async def _run(self) -> None:
+        """Sample/flush loop, with a rollup pass every rollup interval"""
+        loop = asyncio.get_running_loop()
+        next_rollup = loop.time() + self.rollup_interval
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            try:
+                self.sample_registry()
+                async with AsyncSessionLocal() as db:
+                    await self.flush(db)
+                    if loop.time() >= next_rollup:
+                        next_rollup = loop.time() + self.rollup_interval
+                        await self.run_rollups(db)
+            except Exception as e:
+                logger.error(f"Metric store pass failed: {str(e)}")
+
+
+# Global metric store
+metric_store = MetricStore(settings.METRICS_SAMPLE_INTERVAL_SECONDS, settings.METRICS_ROLLUP_INTERVAL_SECONDS)
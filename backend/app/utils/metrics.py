@@ -0,0 +1,97 @@
+"""
+In-process metrics registry
+"""
+import time
+from typing import Dict, Optional
+
+
+class MetricsRegistry:
+    """
+    Lightweight in-memory metrics registry
+    Keeps counters, gauges and timing summaries for the admin dashboard
+    """
+
+    def __init__(self):
+        """Initialize empty registry"""
+        self.started_at = time.time()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to its current value
+
+        Args:
+            name: Gauge name
+            value: Current value
+        """
+        self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a timing/size observation
+
+        Args:
+            name: Timing name
+            value: Observed value
+        """
+        summary = self._timings.get(name)
+        if summary is None:
+            self._timings[name] = {
+                'count': 1,
+                'total': value,
+                'min': value,
+                'max': value,
+                'last': value
+            }
+            return
+
+        summary['count'] += 1
+        summary['total'] += value
+        summary['last'] = value
+        if value < summary['min']:
+            summary['min'] = value
+        if value > summary['max']:
+            summary['max'] = value
+
+    def get_gauge(self, name: str) -> Optional[float]:
+        """Get current gauge value"""
+        return self._gauges.get(name)
+
+    def get_counter(self, name: str) -> float:
+        """Get current counter value"""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        """
+        Get a copy of all metrics
+
+        Returns:
+            Dictionary with counters, gauges and timing summaries
+        """
+        timings = {}
+        for name, summary in self._timings.items():
+            timings[name] = dict(summary)
+            timings[name]['avg'] = summary['total'] / summary['count']
+
+        return {
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'counters': dict(self._counters),
+            'gauges': dict(self._gauges),
+            'timings': timings
+        }
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,198 @@
+"""
+In-memory username search index for the lobby
+
+Usernames are kept as a sorted array of lowercase keys, so a prefix query
+is one binary search plus a scan of the matches it returns: O(log n + k),
+well under a millisecond at millions of users. Each part of an underscore
+name is indexed too, so "smith" finds "john_smith". Ratings are held next
+to the keys and updated when games end, so results need no database read.
+recompute_ratings.py rewrites ratings from another process; it marks the
+JobState row below, and the server reloads the index when it sees it.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from bisect import bisect_left, insort
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import User, UserStats, JobState
+
+logger = logging.getLogger(__name__)
+
+# JobState row whose updated_at is the time of the last rating recompute
+RATINGS_RECOMPUTED_JOB = 'ratings_recomputed'
+
+
+def search_keys(username: str) -> List[str]:
+    """
+    Keys a username is found by: the whole name and every part after an underscore
+
+    Args:
+        username: Username
+
+    Returns:
+        Lowercase keys
+    """
+    name = username.lower()
+    keys = [name]
+    for index, char in enumerate(name):
+        if char == '_' and index + 1 < len(name) and name[index + 1] != '_':
+            keys.append(name[index + 1:])
+    return keys
+
+
+class UserSearchIndex:
+    """Sorted-array prefix index over usernames"""
+
+    def __init__(self, refresh_interval: float = 60.0):
+        """
+        Initialize empty index
+
+        Args:
+            refresh_interval: Seconds between checks for a rating recompute
+        """
+        self.refresh_interval = refresh_interval
+        self._entries: List[Tuple[str, int]] = []  # (key, user_id), sorted
+        self._users: Dict[int, List] = {}  # user_id -> [username, ranking_points]
+        self._loaded_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        """Number of indexed users"""
+        return len(self._users)
+
+    async def load(self, db: AsyncSession, batch_size: int = 50000) -> int:
+        """
+        Build the index from the users table
+
+        Args:
+            db: Database session
+            batch_size: Rows per fetch
+
+        Returns:
+            Number of users indexed
+        """
+        started = time.monotonic()
+        loaded_at = datetime.utcnow()
+        entries: List[Tuple[str, int]] = []
+        users: Dict[int, List] = {}
+
+        stream = await db.stream(
+            select(User.id, User.username, UserStats.ranking_points)
+            .outerjoin(UserStats, UserStats.user_id == User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in stream.partitions():
+            for user_id, username, rating in rows:
+                users[user_id] = [username, rating if rating is not None else settings.RATING_INITIAL]
+                entries.extend((key, user_id) for key in search_keys(username))
+
+        entries.sort()
+        self._entries, self._users = entries, users
+        self._loaded_at = loaded_at
+        logger.info(f"User search index loaded: {len(users)} users in {time.monotonic() - started:.2f}s")
+        return len(users)
+
+    def add(self, user_id: int, username: str, ranking_points: Optional[int] = None) -> None:
+        """
+        Index a new user
+
+        Args:
+            user_id: User ID
+            username: Username
+            ranking_points: Rating (defaults to the initial rating)
+        """
+        if user_id in self._users:
+            return
+        self._users[user_id] = [username, ranking_points if ranking_points is not None else settings.RATING_INITIAL]
+        for key in search_keys(username):
+            insort(self._entries, (key, user_id))
+
+    def set_rating(self, user_id: int, ranking_points: int) -> None:
+        """
+        Update a user's rating
+
+        Args:
+            user_id: User ID
+            ranking_points: New rating
+        """
+        user = self._users.get(user_id)
+        if user is not None:
+            user[1] = ranking_points
+
+    def search(self, query: str, limit: int = 10, is_online: Optional[Callable[[int], bool]] = None) -> List[Dict]:
+        """
+        Find users by username prefix
+
+        Args:
+            query: Prefix (case-insensitive)
+            limit: Maximum results
+            is_online: Presence check for a user id
+
+        Returns:
+            List of users in name order with id, username, ranking_points and is_online
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        index = bisect_left(self._entries, (prefix, -1))
+        while index < len(self._entries) and len(results) < limit:
+            key, user_id = self._entries[index]
+            if not key.startswith(prefix):
+                break
+            index += 1
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+
+            username, ranking_points = self._users[user_id]
+            results.append({
+                'id': user_id,
+                'username': username,
+                'ranking_points': ranking_points,
+                'is_online': bool(is_online and is_online(user_id))
+            })
+        return results
+
+    def start(self) -> None:
+        """Start watching for rating recomputes"""
+        if self.refresh_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop watching for rating recomputes"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Reload the index when ratings were recomputed after it was loaded"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    state = await db.get(JobState, RATINGS_RECOMPUTED_JOB)
+                    if state is not None and (self._loaded_at is None or state.updated_at > self._loaded_at):
+                        logger.info("Ratings were recomputed, reloading the user search index")
+                        await self.load(db)
+            except Exception as e:
+                logger.error(f"User search index refresh failed: {str(e)}")
+
+
+# Global user search index
+user_index = UserSearchIndex(settings.USER_INDEX_REFRESH_SECONDS)
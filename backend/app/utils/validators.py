@@ -71,12 +71,13 @@ def validate_email(email: str) -> tuple[bool, str]:
     return True, ""
 
 
-def validate_move(position: int) -> tuple[bool, str]:
+def validate_move(position: int, board_size: int = 9) -> tuple[bool, str]:
     """
     Validate move position
 
     Args:
-        position: Position to validate (0-8)
+        position: Position to validate (0 to board_size - 1)
+        board_size: Number of cells on the board
 
     Returns:
         Tuple of (is_valid, error_message)
@@ -84,7 +85,7 @@ def validate_move(position: int) -> tuple[bool, str]:
     if not isinstance(position, int):
         return False, "Position must be an integer"
 
-    if position < 0 or position > 8:
-        return False, "Position must be between 0 and 8"
+    if position < 0 or position >= board_size:
+        return False, f"Position must be between 0 and {board_size - 1}"
 
     return True, ""
@@ -8,14 +8,47 @@ from sqlalchemy import select
 from typing import Dict
 import logging
 
-from app.models import User, Game, Invitation
-from app.game import game_manager
+from app.config import settings
+from app.models import User, Game, Invitation, UserStats
+from app.game import game_manager, matchmaker, get_game_logic, BOARD_VARIANTS
 from app.database import AsyncSessionLocal
 from app.utils import log_event, validate_move
+from .spectators import spectator_hub
+from .protocol import emit_move
 
 logger = logging.getLogger(__name__)
 
 
+def game_state_from_row(game: Game) -> Dict:
+    """
+    Build a game state dictionary from a games row
+
+    Args:
+        game: Game object
+
+    Returns:
+        Game state dictionary (same keys as GameManager.get_game_state)
+    """
+    logic = get_game_logic(game.variant, game.board_rows, game.board_cols, game.win_length)
+    return {
+        'game_id': game.id,
+        'board': game.board_state,
+        'current_turn': game.current_turn,
+        'player1_id': game.player1_id,
+        'player2_id': game.player2_id,
+        'is_bot_game': game.is_bot_game,
+        'variant': game.variant or 'classic',
+        'board_rows': logic.rows,
+        'board_cols': logic.cols,
+        'win_length': logic.win_length,
+        'move_count': len([c for c in game.board_state[:logic.size] if c != '-']),
+        'game_over': game.status == 'finished',
+        'result': game.result,
+        'winner_id': game.winner_id,
+        'winning_line': logic.get_winning_line(game.board_state) if game.result == 'win' else None
+    }
+
+
 def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int, str]):
     """
     Register all game-related Socket.IO events
@@ -24,6 +57,7 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
         sio: Socket.IO server instance
         active_connections: Dictionary of active user connections
     """
+    spectator_hub.attach(sio)
 
     @sio.event
     async def join_game(sid, data):
@@ -77,35 +111,8 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     # Re-add game to active games if it's still active
                     if game.status == 'active':
                         logger.info(f"Re-loading game {game_id} into active games")
-                        # Recreate game state in memory
-                        game_state = {
-                            'game_id': game_id,
-                            'board': game.board_state,
-                            'current_turn': game.current_turn,
-                            'player1_id': game.player1_id,
-                            'player2_id': game.player2_id,
-                            'is_bot_game': game.is_bot_game,
-                            'move_count': len([c for c in game.board_state if c != '-'])
-                        }
-                        
-                        # Add back to active games
-                        from app.game.bot_ai import BotAI
-                        game_manager.active_games[game_id] = {
-                            'game': game,
-                            'player1_id': game.player1_id,
-                            'player2_id': game.player2_id,
-                            'is_bot_game': game.is_bot_game,
-                            'bot_difficulty': game.bot_difficulty,
-                            'board': game.board_state,
-                            'current_turn': game.current_turn,
-                            'move_count': game_state['move_count'],
-                            'bot_ai': BotAI(game.bot_difficulty, 'O') if game.is_bot_game else None
-                        }
-                        
-                        # Track users
-                        game_manager.user_to_game[game.player1_id] = game_id
-                        if game.player2_id:
-                            game_manager.user_to_game[game.player2_id] = game_id
+                        await game_manager.restore_game(game)
+                        game_state = await game_manager.get_game_state(game_id)
             else:
                 # Game is in active games, verify user is part of it
                 if game_state['player1_id'] != user_id and game_state['player2_id'] != user_id:
@@ -125,6 +132,48 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
             logger.error(f"Error in join_game: {str(e)}")
             await sio.emit('error', {'message': 'Failed to join game'}, room=sid)
 
+    @sio.event
+    async def request_state(sid, data):
+        """
+        Send the full game state (resync after a missed move_delta)
+
+        Args:
+            sid: Socket ID
+            data: {"game_id": int}
+        """
+        try:
+            user_id = None
+            for uid, socket_id in active_connections.items():
+                if socket_id == sid:
+                    user_id = int(uid)
+                    break
+
+            if not user_id:
+                await sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+                return
+
+            game_id = data.get('game_id')
+            game_state = await game_manager.get_game_state(game_id)
+
+            if game_state:
+                await sio.emit('game_state', {**game_state, 'game_over': False}, room=sid)
+                return
+
+            # Game already ended, rebuild the final state from the database
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Game).where(Game.id == game_id))
+                game = result.scalar_one_or_none()
+
+            if not game or user_id not in (game.player1_id, game.player2_id):
+                await sio.emit('error', {'message': 'Game not found'}, room=sid)
+                return
+
+            await sio.emit('game_state', game_state_from_row(game), room=sid)
+
+        except Exception as e:
+            logger.error(f"Error in request_state: {str(e)}")
+            await sio.emit('error', {'message': 'Failed to get game state'}, room=sid)
+
     @sio.event
     async def invite_player(sid, data):
         """
@@ -151,6 +200,11 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                 await sio.emit('error', {'message': 'Target user ID required'}, room=sid)
                 return
 
+            variant = data.get('variant', 'classic')
+            if variant not in BOARD_VARIANTS:
+                await sio.emit('error', {'message': 'Unknown board variant'}, room=sid)
+                return
+
             async with AsyncSessionLocal() as db:
                 # Check if both users exist and are online
                 sender_result = await db.execute(select(User).where(User.id == sender_id))
@@ -176,6 +230,7 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                 invitation = Invitation(
                     from_user_id=sender_id,
                     to_user_id=target_user_id,
+                    variant=variant,
                     status='pending'
                 )
                 db.add(invitation)
@@ -191,7 +246,8 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     await sio.emit('invitation_received', {
                         'invitation_id': invitation.id,
                         'from_user_id': sender_id,
-                        'from_username': sender.username
+                        'from_username': sender.username,
+                        'variant': variant
                     }, room=target_sid)
                 else:
                     logger.warning(f"Target user {target_user_id} not found in active_connections!")
@@ -272,9 +328,13 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     player2_id=invitation.to_user_id,
                     is_bot_game=False,
                     bot_difficulty=None,
-                    db=db
+                    db=db,
+                    variant=invitation.variant or 'classic'
                 )
 
+                matchmaker.dequeue(invitation.from_user_id)
+                matchmaker.dequeue(invitation.to_user_id)
+
                 # Update invitation
                 invitation.status = 'accepted'
                 invitation.game_id = game.id
@@ -293,7 +353,11 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     'player1': {'id': player1.id, 'username': player1.username, 'symbol': 'X'},
                     'player2': {'id': player2.id, 'username': player2.username, 'symbol': 'O'},
                     'board': game.board_state,
-                    'current_turn': game.current_turn
+                    'current_turn': game.current_turn,
+                    'variant': game.variant,
+                    'board_rows': game.board_rows,
+                    'board_cols': game.board_cols,
+                    'win_length': game.win_length
                 }
 
                 player1_sid = active_connections.get(str(invitation.from_user_id))
@@ -391,12 +455,6 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
             game_id = data.get('game_id')
             position = data.get('position')
 
-            # Validate position
-            valid, error = validate_move(position)
-            if not valid:
-                await sio.emit('error', {'message': error}, room=sid)
-                return
-
             async with AsyncSessionLocal() as db:
                 # Get game info BEFORE making the move (important!)
                 game_state = await game_manager.get_game_state(game_id)
@@ -404,6 +462,12 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     await sio.emit('error', {'message': 'Game not found'}, room=sid)
                     return
 
+                # Validate position
+                valid, error = validate_move(position, game_state['board_rows'] * game_state['board_cols'])
+                if not valid:
+                    await sio.emit('error', {'message': error}, room=sid)
+                    return
+
                 # Make the move
                 result = await game_manager.make_move(game_id, user_id, position, db)
 
@@ -414,6 +478,7 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     'player_id': user_id,
                     'board': result['board'],
                     'current_turn': result['current_turn'],
+                    'move_number': result['move_number'],
                     'game_over': result['game_over']
                 }
 
@@ -424,8 +489,13 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
 
                 # Broadcast move to all players in game room
                 game_room = f"game_{game_id}"
+                player_sids = [
+                    active_connections.get(str(game_state['player1_id'])),
+                    active_connections.get(str(game_state['player2_id']))
+                ]
                 logger.info(f"Broadcasting move_made to room {game_room}: game_over={result['game_over']}, result={result.get('result')}")
-                await sio.emit('move_made', move_data, room=game_room)
+                await emit_move(sio, game_room, move_data, result['symbol'], player_sids)
+                spectator_hub.publish(game_id, move_data)
 
                 # If it's a bot game and game is not over, make bot move
                 if game_state['is_bot_game'] and not result['game_over']:
@@ -441,6 +511,7 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                         'player_id': game_state['player2_id'],
                         'board': bot_result['board'],
                         'current_turn': bot_result['current_turn'],
+                        'move_number': bot_result['move_number'],
                         'game_over': bot_result['game_over']
                     }
 
@@ -450,7 +521,8 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                         bot_move_data['winning_line'] = bot_result['winning_line']
 
                     # Broadcast bot move to game room
-                    await sio.emit('move_made', bot_move_data, room=game_room)
+                    await emit_move(sio, game_room, bot_move_data, bot_result['symbol'], player_sids)
+                    spectator_hub.publish(game_id, bot_move_data)
 
                 if result['game_over']:
                     await log_event("INFO", "GAME_END",
@@ -486,8 +558,21 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
             game_id = data.get('game_id')
 
             async with AsyncSessionLocal() as db:
+                game_state = await game_manager.get_game_state(game_id)
                 result = await game_manager.forfeit_game(game_id, user_id, db)
 
+                if game_state:
+                    spectator_hub.publish(game_id, {
+                        'game_id': game_id,
+                        'position': None,
+                        'player_id': user_id,
+                        'board': game_state['board'],
+                        'current_turn': None,
+                        'game_over': True,
+                        'result': 'abandoned',
+                        'winner_id': result['winner_id']
+                    })
+
                 game_state = await game_manager.get_game_state(game_id)
                 if game_state:
                     forfeit_data = {
@@ -535,6 +620,11 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
             if difficulty not in ['easy', 'medium', 'hard']:
                 difficulty = 'medium'
 
+            variant = data.get('variant', 'classic')
+            if variant not in BOARD_VARIANTS:
+                await sio.emit('error', {'message': 'Unknown board variant'}, room=sid)
+                return
+
             async with AsyncSessionLocal() as db:
                 # Check if user already in game
                 if await game_manager.is_user_in_game(user_id):
@@ -547,9 +637,12 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     player2_id=None,
                     is_bot_game=True,
                     bot_difficulty=difficulty,
-                    db=db
+                    db=db,
+                    variant=variant
                 )
 
+                matchmaker.dequeue(user_id)
+
                 # Get user
                 user_result = await db.execute(select(User).where(User.id == user_id))
                 user = user_result.scalar_one()
@@ -561,6 +654,10 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
                     'player2': {'id': None, 'username': f'Bot ({difficulty})', 'symbol': 'O'},
                     'board': game.board_state,
                     'current_turn': game.current_turn,
+                    'variant': game.variant,
+                    'board_rows': game.board_rows,
+                    'board_cols': game.board_cols,
+                    'win_length': game.win_length,
                     'is_bot_game': True,
                     'bot_difficulty': difficulty
                 }
@@ -582,4 +679,188 @@ def register_game_events(sio: socketio.AsyncServer, active_connections: Dict[int
             logger.error(f"Error in play_vs_bot: {str(e)}")
             await sio.emit('error', {'message': 'Failed to start bot game'}, room=sid)
 
+    @sio.event
+    async def find_match(sid, data=None):
+        """
+        Enter the quick-play matchmaking queue
+
+        Args:
+            sid: Socket ID
+            data: Unused
+        """
+        try:
+            user_id = None
+            for uid, socket_id in active_connections.items():
+                if socket_id == sid:
+                    user_id = int(uid)  # Convert to int immediately
+                    break
+
+            if not user_id:
+                await sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+                return
+
+            if await game_manager.is_user_in_game(user_id):
+                await sio.emit('error', {'message': 'Already in a game'}, room=sid)
+                return
+
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(UserStats.ranking_points).where(UserStats.user_id == user_id)
+                )
+                rating = result.scalar_one_or_none()
+            if rating is None:
+                rating = settings.RATING_INITIAL
+
+            matchmaker.enqueue(user_id, rating)
+
+            await sio.emit('match_searching', {
+                'ranking_points': rating,
+                'queue_depth': matchmaker.get_queue_depth()
+            }, room=sid)
+
+            logger.info(f"User {user_id} searching for a match (rating={rating})")
+
+        except Exception as e:
+            logger.error(f"Error in find_match: {str(e)}")
+            await sio.emit('error', {'message': 'Failed to join matchmaking'}, room=sid)
+
+    @sio.event
+    async def cancel_match(sid, data=None):
+        """
+        Leave the quick-play matchmaking queue
+
+        Args:
+            sid: Socket ID
+            data: Unused
+        """
+        user_id = None
+        for uid, socket_id in active_connections.items():
+            if socket_id == sid:
+                user_id = int(uid)  # Convert to int immediately
+                break
+
+        if not user_id:
+            await sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+            return
+
+        matchmaker.dequeue(user_id)
+        await sio.emit('match_cancelled', {}, room=sid)
+
+    @sio.event
+    async def spectate_game(sid, data):
+        """
+        Watch a live game as a spectator
+
+        Args:
+            sid: Socket ID
+            data: {"game_id": int}
+        """
+        try:
+            user_id = None
+            for uid, socket_id in active_connections.items():
+                if socket_id == sid:
+                    user_id = int(uid)  # Convert to int immediately
+                    break
+
+            if not user_id:
+                await sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+                return
+
+            game_id = data.get('game_id')
+            game_state = await game_manager.get_game_state(game_id)
+            if not game_state:
+                await sio.emit('error', {'message': 'Game not found'}, room=sid)
+                return
+
+            if user_id in (game_state['player1_id'], game_state['player2_id']):
+                await sio.emit('error', {'message': 'Players cannot spectate their own game'}, room=sid)
+                return
+
+            if not await spectator_hub.add_spectator(game_id, sid):
+                await sio.emit('error', {'message': 'Spectator limit reached'}, room=sid)
+                return
+
+            # Full state once on join, coalesced spectator_update afterwards
+            await sio.emit('spectate_joined', {
+                **game_state,
+                'spectator_count': spectator_hub.get_spectator_count(game_id)
+            }, room=sid)
+
+            logger.info(f"User {user_id} spectating game {game_id}")
+
+        except Exception as e:
+            logger.error(f"Error in spectate_game: {str(e)}")
+            await sio.emit('error', {'message': 'Failed to spectate game'}, room=sid)
+
+    @sio.event
+    async def leave_spectate(sid, data):
+        """
+        Stop watching a game
+
+        Args:
+            sid: Socket ID
+            data: {"game_id": int}
+        """
+        game_id = data.get('game_id')
+        if game_id:
+            await spectator_hub.remove_spectator(game_id, sid)
+
+    async def start_matched_game(entry1: Dict, entry2: Dict):
+        """
+        Create a game for a pair found by the matchmaker
+
+        Args:
+            entry1: Queue entry of the longest waiter (plays X)
+            entry2: Queue entry of the opponent (plays O)
+        """
+        player1_sid = active_connections.get(str(entry1['user_id']))
+        player2_sid = active_connections.get(str(entry2['user_id']))
+
+        # A player may have left between pairing and game creation
+        if not player1_sid or not player2_sid:
+            for entry, entry_sid in ((entry1, player1_sid), (entry2, player2_sid)):
+                if entry_sid:
+                    matchmaker.enqueue(entry['user_id'], entry['rating'], entry['enqueued_at'])
+            return
+
+        async with AsyncSessionLocal() as db:
+            game = await game_manager.create_game(
+                player1_id=entry1['user_id'],
+                player2_id=entry2['user_id'],
+                is_bot_game=False,
+                bot_difficulty=None,
+                db=db
+            )
+
+            player1_result = await db.execute(select(User).where(User.id == entry1['user_id']))
+            player1 = player1_result.scalar_one()
+
+            player2_result = await db.execute(select(User).where(User.id == entry2['user_id']))
+            player2 = player2_result.scalar_one()
+
+            game_data = {
+                'game_id': game.id,
+                'player1': {'id': player1.id, 'username': player1.username, 'symbol': 'X'},
+                'player2': {'id': player2.id, 'username': player2.username, 'symbol': 'O'},
+                'board': game.board_state,
+                'current_turn': game.current_turn,
+                'variant': game.variant,
+                'board_rows': game.board_rows,
+                'board_cols': game.board_cols,
+                'win_length': game.win_length
+            }
+
+            game_room = f"game_{game.id}"
+            for player_sid in (player1_sid, player2_sid):
+                await sio.enter_room(player_sid, game_room)
+                await sio.emit('game_started', game_data, room=player_sid)
+
+            await log_event("INFO", "GAME_START",
+                           f"Matchmaking game started: {player1.username} vs {player2.username}",
+                           db, game_id=game.id)
+
+            logger.info(f"Matched game {game.id} started: {player1.username} vs {player2.username}")
+
+    matchmaker.set_match_handler(start_matched_game)
+
     return sio
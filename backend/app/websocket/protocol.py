@@ -0,0 +1,179 @@
+"""
+Wire protocols for game events
+
+Clients negotiate a protocol in `authenticate`:
+- 'json' (default): move_made with the full game state as a JSON dict
+- 'compact': move_delta binary packets carrying only the move and a
+  per-game sequence number; clients resync with request_state on a gap
+
+Compact move_delta layout (little-endian):
+    u8   packet type (1 = move delta)
+    u32  game_id
+    u16  sequence number (move number within the game)
+    u16  position (0xFFFF = none)
+    u8   flags: bit0 mover is 'O', bit1 game over, bits2-3 result code
+    i32  current_turn (-1 = none)
+  when game over:
+    i32  winner_id (-1 = none)
+    u8   winning line length n
+    n x u16 winning line positions
+"""
+from typing import Dict, List, Optional
+import struct
+
+import socketio
+
+from app.utils.metrics import metrics
+
+PROTOCOL_JSON = 'json'
+PROTOCOL_COMPACT = 'compact'
+SUPPORTED_PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_COMPACT)
+
+PACKET_MOVE_DELTA = 1
+
+RESULT_CODES = {None: 0, 'win': 1, 'draw': 2, 'abandoned': 3}
+RESULT_NAMES = {code: name for name, code in RESULT_CODES.items()}
+
+_HEADER = struct.Struct('<BIHHBi')
+_GAME_OVER = struct.Struct('<iB')
+
+NO_POSITION = 0xFFFF
+
+# sid -> negotiated protocol (absent means JSON)
+client_protocols: Dict[str, str] = {}
+
+
+def negotiate_protocol(sid: str, requested: Optional[str]) -> str:
+    """
+    Select the wire protocol for a client
+
+    Args:
+        sid: Socket ID
+        requested: Protocol requested by the client
+
+    Returns:
+        Negotiated protocol name
+    """
+    if requested == PROTOCOL_COMPACT:
+        client_protocols[sid] = PROTOCOL_COMPACT
+        return PROTOCOL_COMPACT
+
+    client_protocols.pop(sid, None)
+    return PROTOCOL_JSON
+
+
+def forget_client(sid: str) -> None:
+    """Drop protocol state for a disconnected client"""
+    client_protocols.pop(sid, None)
+
+
+def _int_or_none(value: Optional[int]) -> int:
+    """Encode an optional id as -1 when missing"""
+    return -1 if value is None else int(value)
+
+
+def encode_move_delta(move_data: Dict, symbol: str) -> bytes:
+    """
+    Pack a move into a compact move_delta packet
+
+    Args:
+        move_data: move_made payload (must include move_number)
+        symbol: Symbol of the player who moved
+
+    Returns:
+        Packed bytes
+    """
+    game_over = bool(move_data.get('game_over'))
+    flags = (1 if symbol == 'O' else 0) | (2 if game_over else 0)
+    flags |= RESULT_CODES.get(move_data.get('result'), 0) << 2
+
+    position = move_data.get('position')
+    packet = _HEADER.pack(
+        PACKET_MOVE_DELTA,
+        move_data['game_id'],
+        move_data['move_number'] & 0xFFFF,
+        NO_POSITION if position is None else position,
+        flags,
+        _int_or_none(move_data.get('current_turn'))
+    )
+
+    if game_over:
+        line = move_data.get('winning_line') or []
+        packet += _GAME_OVER.pack(_int_or_none(move_data.get('winner_id')), len(line))
+        packet += struct.pack(f'<{len(line)}H', *line)
+
+    return packet
+
+
+def decode_move_delta(packet: bytes) -> Dict:
+    """
+    Unpack a move_delta packet (mirror of the client decoder)
+
+    Args:
+        packet: Packed bytes
+
+    Returns:
+        Dictionary with the move fields
+    """
+    packet_type, game_id, seq, position, flags, current_turn = _HEADER.unpack_from(packet)
+    if packet_type != PACKET_MOVE_DELTA:
+        raise ValueError(f"Unknown packet type {packet_type}")
+
+    data = {
+        'game_id': game_id,
+        'move_number': seq,
+        'position': None if position == NO_POSITION else position,
+        'symbol': 'O' if flags & 1 else 'X',
+        'current_turn': None if current_turn == -1 else current_turn,
+        'game_over': bool(flags & 2)
+    }
+
+    if data['game_over']:
+        offset = _HEADER.size
+        winner_id, line_length = _GAME_OVER.unpack_from(packet, offset)
+        offset += _GAME_OVER.size
+        line = list(struct.unpack_from(f'<{line_length}H', packet, offset))
+        data['result'] = RESULT_NAMES.get((flags >> 2) & 3)
+        data['winner_id'] = None if winner_id == -1 else winner_id
+        data['winning_line'] = line or None
+
+    return data
+
+
+async def emit_move(
+    sio: socketio.AsyncServer,
+    game_room: str,
+    move_data: Dict,
+    symbol: str,
+    player_sids: List[Optional[str]]
+) -> None:
+    """
+    Send a move to a game room, honouring each player's protocol
+
+    JSON clients get move_made through one room emit; compact clients are
+    skipped there and get a single shared move_delta packet instead.
+
+    Args:
+        sio: Socket.IO server instance
+        game_room: Game room name
+        move_data: move_made payload
+        symbol: Symbol of the player who moved
+        player_sids: Socket IDs of the players in the room
+    """
+    compact_sids = [
+        sid for sid in player_sids
+        if sid and client_protocols.get(sid) == PROTOCOL_COMPACT
+    ]
+
+    if not compact_sids:
+        await sio.emit('move_made', move_data, room=game_room)
+        return
+
+    await sio.emit('move_made', move_data, room=game_room, skip_sid=compact_sids)
+
+    packet = encode_move_delta(move_data, symbol)
+    for sid in compact_sids:
+        await sio.emit('move_delta', packet, room=sid)
+
+    metrics.increment('protocol.compact_moves_sent', len(compact_sids))
+    metrics.increment('protocol.compact_bytes_sent', len(packet) * len(compact_sids))
@@ -0,0 +1,244 @@
+"""
+Spectator fan-out for game rooms
+"""
+from typing import Dict, List, Optional, Set
+from collections import deque
+import asyncio
+import logging
+import time
+
+import socketio
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SpectatorHub:
+    """
+    Manages spectators of live games
+
+    Spectators join a separate room tier (spectate_{game_id}) so they never
+    share the players' game room. Moves are queued without awaiting anything
+    and a background task flushes them periodically: every flush sends one
+    coalesced spectator_update per game, however many moves it contains,
+    so each game costs one serialized payload per flush regardless of the
+    number of watchers.
+    """
+
+    def __init__(self, max_per_game: int = 1000, flush_interval: float = 0.25, delay: float = 0.0):
+        """
+        Initialize spectator hub
+
+        Args:
+            max_per_game: Maximum spectators per game
+            flush_interval: Seconds between spectator flushes
+            delay: Seconds moves are held back before spectators see them
+        """
+        self.max_per_game = max_per_game
+        self.flush_interval = flush_interval
+        self.delay = delay
+        self.sio: Optional[socketio.AsyncServer] = None
+
+        self._spectators: Dict[int, Set[str]] = {}  # game_id -> sids
+        self._sid_to_games: Dict[str, Set[int]] = {}  # sid -> game_ids
+        self._pending: Dict[int, deque] = {}  # game_id -> deque[(ready_at, move_data)]
+        self._total = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def get_room(game_id: int) -> str:
+        """Get spectator room name for a game"""
+        return f"spectate_{game_id}"
+
+    def attach(self, sio: socketio.AsyncServer) -> None:
+        """
+        Attach the Socket.IO server used for fan-out
+
+        Args:
+            sio: Socket.IO server instance
+        """
+        self.sio = sio
+
+    async def add_spectator(self, game_id: int, sid: str) -> bool:
+        """
+        Add a spectator to a game
+
+        Args:
+            game_id: Game ID
+            sid: Socket ID
+
+        Returns:
+            True if added, False if the spectator cap is reached
+        """
+        spectators = self._spectators.setdefault(game_id, set())
+        if sid not in spectators and len(spectators) >= self.max_per_game:
+            return False
+
+        if sid not in spectators:
+            spectators.add(sid)
+            self._total += 1
+        self._sid_to_games.setdefault(sid, set()).add(game_id)
+        await self.sio.enter_room(sid, self.get_room(game_id))
+        self._update_gauges()
+        return True
+
+    async def remove_spectator(self, game_id: int, sid: str) -> None:
+        """
+        Remove a spectator from a game
+
+        Args:
+            game_id: Game ID
+            sid: Socket ID
+        """
+        self._discard(game_id, sid)
+        await self.sio.leave_room(sid, self.get_room(game_id))
+        self._update_gauges()
+
+    def remove_sid(self, sid: str) -> None:
+        """
+        Forget a disconnected socket (Socket.IO already dropped its rooms)
+
+        Args:
+            sid: Socket ID
+        """
+        for game_id in list(self._sid_to_games.get(sid, ())):
+            self._discard(game_id, sid)
+        self._update_gauges()
+
+    def get_spectator_count(self, game_id: int) -> int:
+        """Get number of spectators of a game"""
+        return len(self._spectators.get(game_id, ()))
+
+    def get_counts(self) -> Dict[int, int]:
+        """Get spectator count per watched game"""
+        return {game_id: len(sids) for game_id, sids in self._spectators.items()}
+
+    def publish(self, game_id: int, move_data: Dict) -> None:
+        """
+        Queue a move for spectators (never awaits)
+
+        Args:
+            game_id: Game ID
+            move_data: move_made payload sent to the players
+        """
+        if not self._spectators.get(game_id):
+            return
+
+        self._pending.setdefault(game_id, deque()).append(
+            (time.monotonic() + self.delay, move_data)
+        )
+
+    def start(self) -> None:
+        """Start the periodic flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Spectator fan-out started")
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def flush(self) -> int:
+        """
+        Send queued moves to spectators, one payload per game
+
+        Returns:
+            Number of games flushed
+        """
+        now = time.monotonic()
+        flushed = 0
+
+        for game_id in list(self._pending):
+            queue = self._pending.get(game_id)
+            if queue is None:
+                continue  # Spectators left while flushing
+
+            moves: List[Dict] = []
+            while queue and queue[0][0] <= now:
+                moves.append(queue.popleft()[1])
+
+            if not queue:
+                del self._pending[game_id]
+
+            if not moves:
+                continue
+
+            latest = moves[-1]
+            update_data = {
+                'game_id': game_id,
+                'moves': [
+                    {'position': move['position'], 'player_id': move['player_id']}
+                    for move in moves
+                ],
+                'board': latest['board'],
+                'current_turn': latest['current_turn'],
+                'game_over': latest['game_over']
+            }
+            if latest['game_over']:
+                for key in ('result', 'winner_id', 'winning_line'):
+                    if key in latest:
+                        update_data[key] = latest[key]
+
+            await self.sio.emit('spectator_update', update_data, room=self.get_room(game_id))
+            metrics.increment('spectators.updates_sent')
+            metrics.observe('spectators.moves_per_update', len(moves))
+            flushed += 1
+
+            if latest['game_over']:
+                await self._close_game(game_id)
+
+        return flushed
+
+    async def _run(self) -> None:
+        """Flush loop"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Spectator flush failed: {str(e)}")
+
+    async def _close_game(self, game_id: int) -> None:
+        """Drop all spectators of a finished game"""
+        self._pending.pop(game_id, None)
+        for sid in list(self._spectators.get(game_id, ())):
+            self._discard(game_id, sid)
+        await self.sio.close_room(self.get_room(game_id))
+        self._update_gauges()
+
+    def _discard(self, game_id: int, sid: str) -> None:
+        """Remove a spectator from the bookkeeping maps"""
+        spectators = self._spectators.get(game_id)
+        if spectators is not None and sid in spectators:
+            spectators.remove(sid)
+            self._total -= 1
+            if not spectators:
+                del self._spectators[game_id]
+                self._pending.pop(game_id, None)
+
+        games = self._sid_to_games.get(sid)
+        if games is not None:
+            games.discard(game_id)
+            if not games:
+                del self._sid_to_games[sid]
+
+    def _update_gauges(self) -> None:
+        """Publish spectator gauges"""
+        metrics.set_gauge('spectators.total', self._total)
+        metrics.set_gauge('spectators.games_watched', len(self._spectators))
+
+
+# Global spectator hub instance
+spectator_hub = SpectatorHub(
+    max_per_game=settings.SPECTATOR_MAX_PER_GAME,
+    flush_interval=settings.SPECTATOR_FLUSH_INTERVAL_SECONDS,
+    delay=settings.SPECTATOR_DELAY_SECONDS
+)
@@ -0,0 +1,64 @@
+"""
+Game archive script
+Exports finished games and their moves to compact columnar files
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import AsyncSessionLocal
+from app.game.archive import archive_games
+
+
+async def main(output_dir: str, batch_size: int, prune: bool, file_format: str):
+    """Main archive function"""
+    print("=" * 60)
+    print("GAME ARCHIVE")
+    print("=" * 60)
+
+    started = time.monotonic()
+
+    try:
+        async with AsyncSessionLocal() as stream_session, AsyncSessionLocal() as lookup_session:
+            summary = await archive_games(
+                stream_session,
+                lookup_session,
+                output_dir,
+                batch_size=batch_size,
+                prune=prune,
+                file_format=file_format
+            )
+
+        print(f"\n[OK] Games archived: {summary['games_archived']}")
+        print(f"[OK] Files written: {summary['files_written']} ({summary['format']})")
+        print(f"[OK] High-water mark: game {summary['last_game_id']}")
+        if summary['pruned']:
+            print("[OK] Archived rows pruned from the live database")
+        print(f"[OK] Finished in {time.monotonic() - started:.1f}s")
+
+    except Exception as e:
+        print(f"\n[ERROR] Archive failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive finished games to columnar files")
+    parser.add_argument("--output-dir", default="archive",
+                        help="Archive root directory")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Games per fetch and per file")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete archived games, moves and chat from the database")
+    parser.add_argument("--format", choices=["parquet", "packed"], default=None,
+                        help="Output format (defaults to parquet when pyarrow is installed)")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.output_dir, args.batch_size, args.prune, args.format))
@@ -0,0 +1,64 @@
+"""
+Bot tournament script
+Plays bots against each other to benchmark strength and speed (no database)
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.game.game_logic import BOARD_VARIANTS
+from app.game.tournament import run_tournament, write_json, write_csv
+
+
+def main(args):
+    """Main tournament function"""
+    print("=" * 60)
+    print("BOT TOURNAMENT")
+    print("=" * 60)
+
+    summary = run_tournament(
+        args.entrants,
+        games_per_pairing=args.games,
+        variant=args.variant,
+        workers=args.workers,
+        seed=args.seed
+    )
+
+    print(f"\n{'player':<16}{'W':>7}{'D':>7}{'L':>7}{'ms/move':>10}{'nodes/move':>12}")
+    for name, player in summary['players'].items():
+        print(
+            f"{name:<16}{player['wins']:>7}{player['draws']:>7}{player['losses']:>7}"
+            f"{player['avg_think_ms']:>10.2f}{player['avg_nodes']:>12.1f}"
+        )
+
+    print(f"\n[OK] {summary['games']} games in {summary['elapsed_seconds']}s "
+          f"({summary['games_per_second']} games/s)")
+
+    if args.json:
+        write_json(summary, args.json)
+        print(f"[OK] Wrote {args.json}")
+    if args.csv:
+        write_csv(summary, args.csv)
+        print(f"[OK] Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-robin self-play tournament between bots")
+    parser.add_argument("entrants", nargs="*", default=["easy", "medium", "hard"],
+                        help="Entrants as 'difficulty' or 'strategy:difficulty' (e.g. mcts:hard)")
+    parser.add_argument("--games", type=int, default=100,
+                        help="Games per ordered pairing")
+    parser.add_argument("--variant", choices=sorted(BOARD_VARIANTS), default="classic",
+                        help="Board variant")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Tournament seed")
+    parser.add_argument("--json", default=None, help="Write the summary to this JSON file")
+    parser.add_argument("--csv", default=None, help="Write per-pairing rows to this CSV file")
+
+    main(parser.parse_args())
@@ -0,0 +1,53 @@
+"""
+Opening book build script
+Solves bot positions offline and writes the memory-mapped book files
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.game.game_logic import BOARD_VARIANTS, ULTIMATE_VARIANT, get_variant_logic
+from app.game.opening_book import build_book, write_book, book_filename, book_dir
+
+
+def main(args):
+    """Main build function"""
+    print("=" * 60)
+    print("OPENING BOOK BUILD")
+    print("=" * 60)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for variant in args.variants:
+        logic = get_variant_logic(variant)
+        started = time.monotonic()
+
+        # Whole-game books only fit small boards; larger ones get the first plies
+        max_plies = args.max_plies if logic.size > 9 else None
+        entries = build_book(logic, max_plies=max_plies, time_limit=args.time_limit)
+
+        path = os.path.join(args.output_dir, book_filename(logic))
+        count = write_book(path, logic, entries)
+        print(f"[OK] {variant}: {count} positions -> {path} "
+              f"({os.path.getsize(path)} bytes, {time.monotonic() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build bot opening book files")
+    parser.add_argument("variants", nargs="*", default=["classic"],
+                        choices=sorted(name for name in BOARD_VARIANTS if name != ULTIMATE_VARIANT),
+                        help="Board variants to build")
+    parser.add_argument("--output-dir", default=book_dir(),
+                        help="Directory for the book files")
+    parser.add_argument("--max-plies", type=int, default=1,
+                        help="Deepest ply for boards larger than 3x3")
+    parser.add_argument("--time-limit", type=float, default=0.1,
+                        help="Seconds per position search for boards larger than 3x3")
+
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+"""
+Data export script
+Streams games, moves, server logs or user stats to a CSV/NDJSON file
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.export import EXPORT_TABLES, EXPORT_FORMATS, export_table, export_filename
+
+
+async def main(table: str, file_format: str, start, end, user_id, compress: bool, output: str, batch_size: int):
+    """Main export function"""
+    print("=" * 60)
+    print("DATA EXPORT")
+    print("=" * 60)
+
+    started = time.monotonic()
+    output = output or export_filename(table, file_format, compress)
+
+    try:
+        written = 0
+        with open(output, 'wb') as f:
+            async for chunk in export_table(
+                table, file_format, start, end, user_id,
+                compress=compress, batch_size=batch_size
+            ):
+                f.write(chunk)
+                written += len(chunk)
+
+        print(f"\n[OK] Exported {table} to {output} ({written / 1024 / 1024:.1f} MB)")
+        print(f"[OK] Finished in {time.monotonic() - started:.1f}s")
+
+    except Exception as e:
+        print(f"\n[ERROR] Export failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a table as CSV or NDJSON")
+    parser.add_argument("table", choices=list(EXPORT_TABLES),
+                        help="Table to export")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv",
+                        help="Output format")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None,
+                        help="Only rows at or after this time (ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="Only rows before this time (ISO 8601)")
+    parser.add_argument("--user-id", type=int, default=None,
+                        help="Only rows involving this user")
+    parser.add_argument("--gzip", action="store_true",
+                        help="gzip the output")
+    parser.add_argument("--output", default=None,
+                        help="Output file (defaults to <table>-<timestamp>.<format>[.gz])")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Rows per fetch")
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        args.table, args.format, args.start, args.end, args.user_id,
+        args.gzip, args.output, args.batch_size
+    ))
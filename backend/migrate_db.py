@@ -1,7 +1,10 @@
 """
 Database migration script
-Creates all tables and initial data
+Creates all tables and initial data, applies pending schema migrations to
+an existing database (--upgrade), or migrates per-move rows to packed move
+storage (--pack-moves)
 """
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -14,8 +17,10 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from app.models import Base
 from app.database import engine, init_db
 from app.auth.password import hash_password
-from app.models import User, UserStats
+from app.models import User, UserStats, Game, Move
 from app.database import AsyncSessionLocal
+from app.game.move_codec import encode_positions, encode_times
+from app.game.move_history import move_offset_ms
 from datetime import datetime
 
 
@@ -51,6 +56,123 @@ async def create_tables():
         await conn.run_sync(Base.metadata.create_all)
         print("[OK] Created all tables")
 
+        # Tables match the models, so every migration counts as applied
+        from app.migrations import stamp_current
+        await stamp_current(conn)
+        print("[OK] Recorded schema version")
+
+
+async def upgrade_database(batch_size: int = 1000):
+    """
+    Apply pending schema migrations and run their backfills to completion
+
+    Safe to run while the server is up: each backfill batch is its own
+    transaction, and an interrupted run resumes from the last batch.
+
+    Args:
+        batch_size: Rows per backfill batch
+    """
+    print("Upgrading database schema...")
+
+    from app.migrations import upgrade_schema, run_backfill, LATEST_VERSION
+
+    def report(migration, done, total):
+        print(f"    [OK] {done}/{total}")
+
+    pending = await upgrade_schema()
+    for migration in pending:
+        print(f"  Backfilling migration {migration.version}: {migration.name}")
+        await run_backfill(migration, batch_size, report=report)
+        print(f"  [OK] Migration {migration.version} complete")
+
+    print(f"[OK] Schema is at version {LATEST_VERSION}")
+
+
+async def show_status():
+    """Print the state of every migration"""
+    from app.migrations import migration_status
+
+    print("\nMigrations:")
+    for migration in await migration_status():
+        print(f"  {migration['version']:>3}  {migration['status']:<12} {migration['name']}")
+
+
+async def pack_move_rows(batch_size: int = 1000, delete_rows: bool = False):
+    """
+    Backfill packed move blobs from the moves table
+
+    Games are processed in id order, batch_size games per transaction, so
+    an interrupted run resumes where it stopped (packed games are skipped).
+    Run it with the server stopped: games loaded in memory keep writing
+    Move rows until they are restored again.
+
+    Args:
+        batch_size: Games per batch
+        delete_rows: Delete the Move rows of each packed game
+    """
+    print("\nPacking move rows...")
+
+    from sqlalchemy import select, update, delete
+
+    packed = moves_packed = 0
+    after_id = 0
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            try:
+                games = (await session.execute(
+                    select(Game.id, Game.board_rows, Game.board_cols, Game.started_at)
+                    .where(Game.move_positions.is_(None), Game.id > after_id)
+                    .order_by(Game.id)
+                    .limit(batch_size)
+                )).all()
+                if not games:
+                    break
+
+                game_ids = [game.id for game in games]
+                moves = {}
+                move_rows = await session.execute(
+                    select(Move.game_id, Move.position, Move.timestamp)
+                    .where(Move.game_id.in_(game_ids))
+                    .order_by(Move.game_id, Move.move_number)
+                )
+                for game_id, position, timestamp in move_rows:
+                    moves.setdefault(game_id, []).append((position, timestamp))
+
+                values = []
+                for game in games:
+                    game_moves = moves.get(game.id, [])
+                    board_size = (game.board_rows or 3) * (game.board_cols or 3)
+                    values.append({
+                        'id': game.id,
+                        'move_positions': encode_positions(
+                            [position for position, _ in game_moves], board_size
+                        ),
+                        'move_times': encode_times([
+                            move_offset_ms(game.started_at, timestamp) if timestamp else 0
+                            for _, timestamp in game_moves
+                        ])
+                    })
+                    moves_packed += len(game_moves)
+
+                await session.execute(update(Game), values)
+                if delete_rows:
+                    await session.execute(delete(Move).where(Move.game_id.in_(game_ids)))
+                await session.commit()
+
+            except Exception as e:
+                await session.rollback()
+                print(f"[ERROR] Error packing games after id {after_id}: {e}")
+                raise
+
+        packed += len(games)
+        after_id = game_ids[-1]
+        print(f"  [OK] Packed games up to id {after_id} ({packed} games, {moves_packed} moves)")
+
+    print(f"[OK] Packed {packed} games ({moves_packed} moves)")
+    if delete_rows:
+        print("[OK] Deleted packed move rows")
+
 
 async def create_admin_user():
     """Create default admin user"""
@@ -171,7 +293,13 @@ async def create_test_users():
             raise
 
 
-async def main():
+async def main(
+    pack_moves: bool = False,
+    delete_move_rows: bool = False,
+    batch_size: int = 1000,
+    upgrade: bool = False,
+    status: bool = False
+):
     """Main migration function"""
     print("=" * 60)
     print("DATABASE MIGRATION")
@@ -181,7 +309,30 @@ async def main():
         # Check database connection
         from app.config import settings
         print(f"\nDatabase URL: {settings.DATABASE_URL}")
-        
+
+        if status:
+            await show_status()
+            return
+
+        if upgrade and not pack_moves:
+            # Migrate an existing database in place
+            await upgrade_database(batch_size)
+
+            print("\n" + "=" * 60)
+            print("[OK] UPGRADE COMPLETED SUCCESSFULLY!")
+            print("=" * 60)
+            return
+
+        if pack_moves:
+            # Migrate an existing database in place
+            await upgrade_database(batch_size)
+            await pack_move_rows(batch_size, delete_move_rows)
+
+            print("\n" + "=" * 60)
+            print("[OK] MOVE PACKING COMPLETED SUCCESSFULLY!")
+            print("=" * 60)
+            return
+
         # Create tables
         await create_tables()
         
@@ -201,5 +352,18 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Create the database or migrate it in place")
+    parser.add_argument("--upgrade", action="store_true",
+                        help="Apply pending schema migrations and backfills instead of recreating tables")
+    parser.add_argument("--status", action="store_true",
+                        help="Show which schema migrations are applied")
+    parser.add_argument("--pack-moves", action="store_true",
+                        help="Migrate per-move rows to packed move storage instead of recreating tables")
+    parser.add_argument("--delete-move-rows", action="store_true",
+                        help="With --pack-moves, delete the Move rows of packed games")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Games (or rows) per packing or backfill batch")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.pack_moves, args.delete_move_rows, args.batch_size, args.upgrade, args.status))
 
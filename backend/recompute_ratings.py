@@ -0,0 +1,58 @@
+"""
+Rating recompute script
+Replays all finished games to rebuild every player rating from scratch
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import AsyncSessionLocal
+from app.game.rating import recompute_ratings
+
+
+async def main(system: str, period_days: float, batch_size: int):
+    """Main recompute function"""
+    print("=" * 60)
+    print("RATING RECOMPUTE")
+    print("=" * 60)
+
+    started = time.monotonic()
+
+    try:
+        async with AsyncSessionLocal() as session:
+            summary = await recompute_ratings(
+                session,
+                system=system,
+                period_days=period_days,
+                batch_size=batch_size
+            )
+
+        print(f"\n[OK] Rating system: {summary['system']}")
+        print(f"[OK] Games replayed: {summary['games_replayed']}")
+        print(f"[OK] Players rated: {summary['players_rated']}")
+        print(f"[OK] Finished in {time.monotonic() - started:.1f}s")
+
+    except Exception as e:
+        print(f"\n[ERROR] Recompute failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild player ratings from the games table")
+    parser.add_argument("--system", choices=["elo", "glicko2"], default=None,
+                        help="Rating system (defaults to RATING_SYSTEM setting)")
+    parser.add_argument("--period-days", type=float, default=None,
+                        help="Glicko-2 rating period length in days (0 = no idle RD growth)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Rows per fetch and per UPDATE batch")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.system, args.period_days, args.batch_size))
@@ -0,0 +1,60 @@
+"""
+Bot scheduler tests - heavy (MCTS/ultimate) turns stay within the batch time budget
+"""
+import asyncio
+import time
+
+from app.game.bot_ai import BotAI
+from app.game.bot_scheduler import BotMoveScheduler
+from app.game.game_logic import get_logic
+
+GOMOKU = get_logic(15, 15, 5)
+
+
+def open_position() -> str:
+    """Gomoku position with no immediate win or block, so every turn is searched"""
+    board = list(GOMOKU.create_empty_board())
+    board[112] = 'X'
+    board[96] = 'O'
+    return ''.join(board)
+
+
+def hard_bots(count: int):
+    """Hard MCTS bots playing O"""
+    return [BotAI('hard', 'O', GOMOKU, seed=seed) for seed in range(count)]
+
+
+def test_batch_stays_within_time_budget():
+    scheduler = BotMoveScheduler(time_budget=0.2)
+    board = open_position()
+
+    start = time.monotonic()
+    moves = scheduler.resolve_batch([(bot, board) for bot in hard_bots(200)])
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.2 + 0.1
+    played = [move for move in moves if move is not None]
+    assert played
+    assert all(board[move] == '-' for move in played)
+
+
+def test_batch_always_starts_one_heavy_turn():
+    scheduler = BotMoveScheduler(time_budget=0.0)
+    moves = scheduler.resolve_batch([(bot, open_position()) for bot in hard_bots(3)])
+
+    assert moves[0] is not None
+    assert moves[1:] == [None, None]
+
+
+def test_carried_over_turns_are_resolved():
+    scheduler = BotMoveScheduler(window=0.001, time_budget=0.02)
+    board = open_position()
+
+    async def play_all():
+        return await asyncio.gather(*(scheduler.request_move(bot, board) for bot in hard_bots(50)))
+
+    moves = asyncio.run(play_all())
+
+    assert len(moves) == 50
+    assert all(board[move] == '-' for move in moves)
+    assert scheduler.get_pending_count() == 0
@@ -4,7 +4,8 @@ const CONFIG = {
     STORAGE_KEYS: {
         TOKEN: 'tictactoe_token',
         USER_ID: 'tictactoe_user_id',
-        USERNAME: 'tictactoe_username'
+        USERNAME: 'tictactoe_username',
+        SESSION_ID: 'tictactoe_session_id'
     },
     GAME: {
         MOVE_TIMEOUT: 30000,
@@ -34,10 +35,23 @@ const Storage = {
         };
     },
 
+    setSessionId(sessionId) {
+        localStorage.setItem(CONFIG.STORAGE_KEYS.SESSION_ID, sessionId);
+    },
+
+    getSessionId() {
+        return localStorage.getItem(CONFIG.STORAGE_KEYS.SESSION_ID);
+    },
+
+    clearSessionId() {
+        localStorage.removeItem(CONFIG.STORAGE_KEYS.SESSION_ID);
+    },
+
     clearAll() {
         localStorage.removeItem(CONFIG.STORAGE_KEYS.TOKEN);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USER_ID);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USERNAME);
+        localStorage.removeItem(CONFIG.STORAGE_KEYS.SESSION_ID);
     },
 
     isAuthenticated() {
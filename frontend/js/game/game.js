@@ -17,6 +17,12 @@ let currentBoard = gameData.board || "---------";
 let currentTurn = gameData.current_turn;
 let mySymbol = gameData.player1.id == userInfo.userId ? "X" : "O";
 let gameOver = false;
+// Sequence number of the last move applied (moves already on the board)
+let lastSeq = currentBoard.split("").filter((c) => c !== "-").length;
+
+// Compact move_delta packet constants (see backend/app/websocket/protocol.py)
+const PACKET_MOVE_DELTA = 1;
+const RESULT_NAMES = [null, "win", "draw", "abandoned"];
 
 function initGameUI() {
   document.getElementById("player1-name").textContent =
@@ -48,17 +54,37 @@ function initSocket() {
   });
 
   socket.on("connect", () => {
-    socket.emit("authenticate", {
-      token: Storage.getToken(),
-    });
+    const sessionId = Storage.getSessionId();
+
+    // Resume in one round-trip when we have a session, otherwise authenticate
+    if (sessionId) {
+      socket.emit("resume_session", {
+        session_id: sessionId,
+        game_id: gameData.game_id,
+        last_seq: lastSeq,
+        protocol: "compact",
+      });
+    } else {
+      authenticate();
+    }
   });
 
-  socket.on("authenticated", () => {
+  socket.on("authenticated", (data) => {
+    Storage.setSessionId(data.session_id);
     socket.emit("join_game", {
       game_id: gameData.game_id,
     });
   });
 
+  socket.on("session_resumed", (data) => {
+    handleSessionResumed(data);
+  });
+
+  socket.on("session_expired", () => {
+    Storage.clearSessionId();
+    authenticate();
+  });
+
   socket.on("game_joined", (data) => {
     hideLoading();
     Notification.success("Connected to game!");
@@ -68,6 +94,14 @@ function initSocket() {
     handleMoveMade(data);
   });
 
+  socket.on("move_delta", (packet) => {
+    handleMoveDelta(packet);
+  });
+
+  socket.on("game_state", (data) => {
+    handleGameState(data);
+  });
+
   socket.on("game_forfeited", (data) => {
     handleGameForfeited(data);
   });
@@ -76,9 +110,7 @@ function initSocket() {
     Notification.error(data.message);
 
     if (data.message === "Not authenticated") {
-      socket.emit("authenticate", {
-        token: Storage.getToken(),
-      });
+      authenticate();
     }
   });
 
@@ -87,6 +119,42 @@ function initSocket() {
   });
 }
 
+function authenticate() {
+  socket.emit("authenticate", {
+    token: Storage.getToken(),
+    protocol: "compact",
+  });
+}
+
+function handleSessionResumed(data) {
+  if (data.rejoin_required || !data.game) {
+    socket.emit("join_game", {
+      game_id: gameData.game_id,
+    });
+    return;
+  }
+
+  hideLoading();
+
+  // Replay only the moves missed while disconnected
+  const board = currentBoard.split("");
+  data.game.moves.forEach((move) => {
+    if (move.move_number > lastSeq) {
+      board[move.position] = move.symbol;
+      lastSeq = move.move_number;
+    }
+  });
+
+  updateBoard(board.join(""));
+
+  if (data.game.game_over) {
+    gameOver = true;
+    handleGameOver(data.game);
+  } else {
+    updateTurn(data.game.current_turn);
+  }
+}
+
 function updateBoard(board) {
   const cells = document.querySelectorAll(".cell");
 
@@ -178,7 +246,83 @@ function makeMove(position) {
   });
 }
 
+function decodeMoveDelta(packet) {
+  const view = new DataView(packet instanceof ArrayBuffer ? packet : packet.buffer);
+  const offset = packet instanceof ArrayBuffer ? 0 : packet.byteOffset;
+
+  if (view.getUint8(offset) !== PACKET_MOVE_DELTA) {
+    throw new Error("Unknown packet type");
+  }
+
+  const position = view.getUint16(offset + 7, true);
+  const flags = view.getUint8(offset + 9);
+  const currentTurn = view.getInt32(offset + 10, true);
+
+  const data = {
+    game_id: view.getUint32(offset + 1, true),
+    move_number: view.getUint16(offset + 5, true),
+    position: position === 0xffff ? null : position,
+    symbol: flags & 1 ? "O" : "X",
+    current_turn: currentTurn === -1 ? null : currentTurn,
+    game_over: (flags & 2) !== 0,
+  };
+
+  if (data.game_over) {
+    const winnerId = view.getInt32(offset + 14, true);
+    const lineLength = view.getUint8(offset + 18);
+    const line = [];
+    for (let i = 0; i < lineLength; i++) {
+      line.push(view.getUint16(offset + 19 + i * 2, true));
+    }
+    data.result = RESULT_NAMES[(flags >> 2) & 3];
+    data.winner_id = winnerId === -1 ? null : winnerId;
+    data.winning_line = line.length ? line : null;
+  }
+
+  return data;
+}
+
+function handleMoveDelta(packet) {
+  const delta = decodeMoveDelta(packet);
+  if (delta.game_id != gameData.game_id) return;
+
+  // Duplicate or stale packet
+  if (delta.move_number <= lastSeq) return;
+
+  // Missed a move: ask for a full-state resync
+  if (delta.move_number !== lastSeq + 1) {
+    socket.emit("request_state", { game_id: gameData.game_id });
+    return;
+  }
+
+  const board = currentBoard.split("");
+  if (delta.position !== null) {
+    board[delta.position] = delta.symbol;
+  }
+  delta.board = board.join("");
+
+  handleMoveMade(delta);
+}
+
+function handleGameState(data) {
+  if (data.game_id != gameData.game_id) return;
+
+  lastSeq = data.move_count;
+  updateBoard(data.board);
+
+  if (data.game_over) {
+    gameOver = true;
+    handleGameOver(data);
+  } else {
+    updateTurn(data.current_turn);
+  }
+}
+
 function handleMoveMade(data) {
+  if (data.move_number !== undefined) {
+    lastSeq = data.move_number;
+  }
+
   updateBoard(data.board);
 
   if (!data.game_over) {
@@ -15,6 +15,7 @@ if (!userInfo || !userInfo.userId || !userInfo.username) {
 
 let socket = null;
 let currentInvitations = [];
+let searchingMatch = false;
 
 document.getElementById(
   "username-display"
@@ -22,10 +23,20 @@ document.getElementById(
 
 document.getElementById("logout-btn").addEventListener("click", () => {
   Storage.clearAll();
-  if (socket) {
-    socket.disconnect();
+
+  const leave = () => {
+    if (socket) {
+      socket.disconnect();
+    }
+    window.location.href = "index.html";
+  };
+
+  // End the server-side session first so it cannot be resumed
+  if (socket && socket.connected) {
+    socket.timeout(2000).emit("logout", {}, leave);
+  } else {
+    leave();
   }
-  window.location.href = "index.html";
 });
 
 function initSocket() {
@@ -50,6 +61,7 @@ function initSocket() {
   });
 
   socket.on("authenticated", (data) => {
+    Storage.setSessionId(data.session_id);
     hideLoading();
     Notification.success("Connected to game server!");
     loadLeaderboard();
@@ -77,6 +89,15 @@ function initSocket() {
     Notification.success(`Invitation sent to ${data.to_username}`);
   });
 
+  socket.on("match_searching", (data) => {
+    setSearchingMatch(true);
+    Notification.info(`Searching for an opponent (${data.queue_depth} in queue)...`);
+  });
+
+  socket.on("match_cancelled", () => {
+    setSearchingMatch(false);
+  });
+
   socket.on("game_started", (data) => {
     localStorage.setItem("current_game", JSON.stringify(data));
     window.location.href = "game.html";
@@ -197,6 +218,19 @@ function rejectInvitation(invitationId) {
   Notification.info("Invitation rejected");
 }
 
+function toggleQuickPlay() {
+  if (!socket) return;
+
+  socket.emit(searchingMatch ? "cancel_match" : "find_match", {});
+}
+
+function setSearchingMatch(searching) {
+  searchingMatch = searching;
+  document.getElementById("quick-play-btn").textContent = searching
+    ? "Cancel Search"
+    : "Find Match";
+}
+
 function playVsBot(difficulty) {
   if (!socket) return;
 